@@ -0,0 +1,131 @@
+"""Buffered AuditLog writer.
+
+AuditLogMiddleware and log_audit hand unsaved AuditLog instances to
+`audit_writer.submit()` instead of inserting them on the request thread. A
+daemon thread drains the queue and inserts entries with bulk_create once
+AUDIT_LOG_BATCH_SIZE are waiting or AUDIT_LOG_FLUSH_INTERVAL seconds have
+passed, whichever comes first.
+
+The queue holds at most AUDIT_LOG_QUEUE_SIZE entries. When it is full a
+producer waits up to AUDIT_LOG_ENQUEUE_TIMEOUT seconds for room and then
+drops the entry (counted in `dropped`), so a slow database cannot grow
+worker memory without bound. Pending entries are flushed at interpreter
+exit. Set AUDIT_LOG_ASYNC to False to write synchronously.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogWriter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._stop = threading.Event()
+        self.written = 0
+        self.dropped = 0
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'AUDIT_LOG_BATCH_SIZE', 100)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'AUDIT_LOG_FLUSH_INTERVAL', 2.0)
+
+    def submit(self, entry):
+        """Queue an unsaved AuditLog for writing."""
+        if not getattr(settings, 'AUDIT_LOG_ASYNC', True):
+            self._write([entry])
+            return
+        self._ensure_started()
+        try:
+            self._queue.put(entry, timeout=getattr(settings, 'AUDIT_LOG_ENQUEUE_TIMEOUT', 0.05))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.warning('Audit log queue full; dropped entry %s %s', entry.action, entry.path)
+
+    def flush(self):
+        """Write everything currently queued from the calling thread."""
+        if self._queue is None:
+            return
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def shutdown(self, timeout=5.0):
+        """Stop the drain thread and flush whatever is left."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self.flush()
+
+    def _ensure_started(self):
+        # Re-create the queue and thread after a fork (e.g. gunicorn --preload)
+        pid = os.getpid()
+        if self._pid == pid and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == pid and self._thread.is_alive():
+                return
+            self._pid = pid
+            self._queue = queue.Queue(maxsize=getattr(settings, 'AUDIT_LOG_QUEUE_SIZE', 10000))
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+                close_old_connections()
+
+    def _next_batch(self):
+        """Collect up to batch_size entries, waiting at most flush_interval."""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, entries):
+        try:
+            AuditLog.objects.bulk_create(entries, batch_size=self.batch_size)
+            with self._lock:
+                self.written += len(entries)
+        except Exception:
+            # Never break business flows for audit failures
+            logger.exception('Failed to write %d audit log entries', len(entries))
+
+
+audit_writer = AuditLogWriter()
+atexit.register(audit_writer.shutdown)
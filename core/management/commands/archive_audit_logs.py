@@ -0,0 +1,122 @@
+"""
+Move audit log rows older than the retention window out of the live table.
+
+Rows are appended to monthly gzip-compressed JSONL files
+(`audit-YYYY-MM.jsonl.gz`) chunk by chunk. Once a chunk has been written it
+is summarised into AuditLogDailyRollup (per day, action and status code)
+and deleted in the same transaction, so every row is counted exactly once.
+An interrupted run can at worst write a chunk to the archive twice; it
+never loses rows. Safe to run from cron.
+"""
+import gzip
+import json
+import os
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.models import AuditLog, AuditLogDailyRollup
+from core.utils_audit import audit_export_rows
+
+
+class Command(BaseCommand):
+    help = 'Archive audit logs older than N days into monthly JSONL.gz files and keep daily rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=getattr(settings, 'AUDIT_LOG_RETENTION_DAYS', 90),
+                            help='Keep this many days of rows in the live table (default: AUDIT_LOG_RETENTION_DAYS).')
+        parser.add_argument('--archive-dir', default=getattr(settings, 'AUDIT_LOG_ARCHIVE_DIR', 'audit_archive'),
+                            help='Directory for the monthly archive files (default: AUDIT_LOG_ARCHIVE_DIR).')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be archived without changing anything.')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        cutoff_day = today - timedelta(days=options['days'])
+        # Cut at local midnight so every archived day is archived in full
+        cutoff = timezone.make_aware(datetime.combine(cutoff_day, time.min))
+        expired = AuditLog.objects.filter(timestamp__lt=cutoff)
+
+        total = expired.count()
+        if not total:
+            self.stdout.write(self.style.SUCCESS(f'No audit logs older than {cutoff_day}.'))
+            return
+        if options['dry_run']:
+            self.stdout.write(self.style.NOTICE(f'{total} audit logs older than {cutoff_day} would be archived.'))
+            return
+
+        archived, rolled = self._archive(expired, options['archive_dir'], options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Updated {rolled} daily rollup rows.'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {archived} audit logs older than {cutoff_day} into {options["archive_dir"]}.'
+        ))
+
+    def _rollup(self, queryset):
+        """Add the rows of `queryset` to the daily rollups; return the keys touched.
+
+        Must run in the transaction that deletes those rows: rollups only
+        ever grow, so rows counted but not deleted would be counted again.
+        """
+        counts = (
+            queryset.order_by()
+            .annotate(day=TruncDate('timestamp'))
+            .values('day', 'action', 'status_code')
+            .annotate(count=Count('id'))
+        )
+        incoming = {}
+        for row in counts:
+            key = (row['day'], row['action'], row['status_code'] or 0)
+            incoming[key] = incoming.get(key, 0) + row['count']
+        if not incoming:
+            return set()
+
+        # Add to existing rollups: rows counted earlier are already gone
+        existing = {
+            (r.date, r.action, r.status_code): r
+            for r in AuditLogDailyRollup.objects.select_for_update().filter(date__in={k[0] for k in incoming})
+        }
+        to_update, to_create = [], []
+        for (day, action, status_code), count in incoming.items():
+            rollup = existing.get((day, action, status_code))
+            if rollup:
+                rollup.count += count
+                to_update.append(rollup)
+            else:
+                to_create.append(AuditLogDailyRollup(date=day, action=action, status_code=status_code, count=count))
+        AuditLogDailyRollup.objects.bulk_update(to_update, ['count'])
+        AuditLogDailyRollup.objects.bulk_create(to_create)
+        return set(incoming)
+
+    def _archive(self, queryset, archive_dir, chunk_size):
+        os.makedirs(archive_dir, exist_ok=True)
+        archived, rolled = 0, set()
+        handles = {}
+        try:
+            while True:
+                # Always take the oldest remaining chunk; archived rows are deleted below
+                rows = list(audit_export_rows(queryset.order_by('timestamp', 'id')[:chunk_size], chunk_size=chunk_size))
+                if not rows:
+                    break
+                for row in rows:
+                    month = row['timestamp'][:7]
+                    if month not in handles:
+                        # Appending adds a new gzip member; readers see one continuous stream
+                        path = os.path.join(archive_dir, f'audit-{month}.jsonl.gz')
+                        handles[month] = gzip.open(path, 'at', encoding='utf-8')
+                    handles[month].write(json.dumps(row, default=str) + '\n')
+                for handle in handles.values():
+                    handle.flush()
+                chunk = AuditLog.objects.filter(pk__in=[row['id'] for row in rows])
+                with transaction.atomic():
+                    rolled |= self._rollup(chunk)
+                    chunk.delete()
+                archived += len(rows)
+        finally:
+            for handle in handles.values():
+                handle.close()
+        return archived, len(rolled)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_auditlogdailyrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['timestamp', 'id'], name='core_auditl_timesta_3238cd_idx'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.utils import timezone
 
+from . import settings_cache
+
 
 class SoftDeleteQuerySet(models.QuerySet):
     def delete(self):
@@ -59,16 +61,19 @@ class SystemSetting(models.Model):
     class Meta:
         ordering = ['key']
 
+    # Typed accessors read the process-local cache in core.settings_cache,
+    # so they do not query the database on the hot path.
     @classmethod
     def get_int(cls, key, default=None):
-        try:
-            s = cls.objects.get(key=key)
-            if s.int_value is not None:
-                return s.int_value
-            if s.decimal_value is not None:
-                return int(s.decimal_value)
-        except cls.DoesNotExist:
-            return default
+        return settings_cache.get_int(key, default)
+
+    @classmethod
+    def get_decimal(cls, key, default=None):
+        return settings_cache.get_decimal(key, default)
+
+    @classmethod
+    def get_text(cls, key, default=None):
+        return settings_cache.get_text(key, default)
 
 
 class AuditLog(models.Model):
@@ -77,7 +82,8 @@ class AuditLog(models.Model):
     Captures who did what, when, and basic HTTP context so CEO can review.
     """
 
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Stamped when the entry is built, not when the buffered writer inserts it
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     actor = models.ForeignKey('hr.CustomUser', on_delete=models.SET_NULL, null=True, blank=True, related_name='audit_logs')
     action = models.CharField(max_length=100, blank=True)  # short code e.g., 'api_call', 'user_disabled', 'complaint_created'
     summary = models.TextField(blank=True)  # human-friendly description
@@ -95,19 +101,33 @@ class AuditLog(models.Model):
         indexes = [
             models.Index(fields=['timestamp']),
             models.Index(fields=['action']),
+            # Keyset pagination walks (timestamp, id) in descending order
+            models.Index(fields=['timestamp', 'id']),
         ]
 
     def __str__(self):
         who = getattr(self.actor, 'email', 'system') if self.actor else 'anonymous'
         return f"[{self.timestamp:%Y-%m-%d %H:%M:%S}] {who} {self.action}: {self.summary[:60]}"
 
-    @classmethod
-    def get_decimal(cls, key, default=None):
-        try:
-            s = cls.objects.get(key=key)
-            if s.decimal_value is not None:
-                return s.decimal_value
-            if s.int_value is not None:
-                return s.int_value
-        except cls.DoesNotExist:
-            return default
+
+class AuditLogDailyRollup(models.Model):
+    """Per-day counts of archived audit rows by action and status code.
+
+    Written by the `archive_audit_logs` command before rows leave the live
+    table, so historical volumes stay queryable after archival. A status
+    code of 0 stands for entries logged without an HTTP status.
+    """
+
+    date = models.DateField()
+    action = models.CharField(max_length=100, blank=True)
+    status_code = models.IntegerField(default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-date', 'action']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'action', 'status_code'], name='uniq_auditlog_rollup_day_action_status'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.action} {self.status_code}: {self.count}"
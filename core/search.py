@@ -0,0 +1,185 @@
+"""Full-text search over denormalized document tables.
+
+A search table is an ordinary model whose primary key is the id of the row
+it describes and whose `document` column holds the searchable text (see
+`normalize`). Apps keep those rows current from signals; the vendor index
+on top is created by the operations from `index_operations()`:
+
+- SQLite: an FTS5 external-content table `<table>_fts`, kept in step with
+  the search table by triggers and ranked with bm25().
+- PostgreSQL: a GIN index over to_tsvector('simple', document), ranked
+  with ts_rank().
+- Anything else: no index; `search()` falls back to unranked LIKE matching.
+
+Every query term matches as a prefix, and all terms must match. `search()`
+returns ranked ids, `matches()` a filter for ordinary (paginated) lists
+and `highlight()` marks the matching words in the original text.
+"""
+import re
+
+from django.db import connection, migrations
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+
+TOKEN_RE = re.compile(r'\w+')
+MAX_TERMS = 8
+
+
+def normalize(*parts):
+    """Lower-cased word tokens of `parts`, joined by spaces.
+
+    Punctuation separates tokens, so "jane.doe@example.com" is searchable
+    as "jane", "doe" or "example".
+    """
+    return ' '.join(token.lower() for part in parts if part for token in TOKEN_RE.findall(str(part)))
+
+
+def terms(text):
+    return [token.lower() for token in TOKEN_RE.findall(text or '')][:MAX_TERMS]
+
+
+def _fts_table(table):
+    return f'{table}_fts'
+
+
+def _sqlite_statements(table, pk):
+    fts = _fts_table(table)
+    delete_old = f"INSERT INTO {fts}({fts}, rowid, document) VALUES ('delete', old.{pk}, old.document);"
+    insert_new = f"INSERT INTO {fts}(rowid, document) VALUES (new.{pk}, new.document);"
+    forwards = [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5("
+        f"document, content='{table}', content_rowid='{pk}', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER {table}_fts_ai AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER {table}_fts_ad AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER {table}_fts_au AFTER UPDATE ON {table} BEGIN {delete_old} {insert_new} END",
+        # Index rows that already exist
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+    backwards = [f"DROP TRIGGER IF EXISTS {table}_fts_{suffix}" for suffix in ('ai', 'ad', 'au')]
+    backwards.append(f"DROP TABLE IF EXISTS {fts}")
+    return forwards, backwards
+
+
+def _postgresql_statements(table, pk):
+    index = f'{table}_document_fts'
+    forwards = [f"CREATE INDEX {index} ON {table} USING GIN (to_tsvector('simple', document))"]
+    return forwards, [f"DROP INDEX IF EXISTS {index}"]
+
+
+VENDOR_STATEMENTS = {'sqlite': _sqlite_statements, 'postgresql': _postgresql_statements}
+
+
+def index_operations(table, pk):
+    """Migration operations adding the vendor search index to `table`."""
+    def run(direction):
+        def apply(apps, schema_editor):
+            statements = VENDOR_STATEMENTS.get(schema_editor.connection.vendor)
+            if statements:
+                for sql in statements(table, pk)[direction]:
+                    schema_editor.execute(sql)
+        return apply
+
+    return [migrations.RunPython(run(0), run(1), elidable=False)]
+
+
+def _sqlite_match(tokens):
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _tsquery(tokens):
+    return ' & '.join(f'{token}:*' for token in tokens)
+
+
+def matches(model, text, field='pk'):
+    """A Q() keeping rows whose `field` is the key of a document matching `text`."""
+    tokens = terms(text)
+    if not tokens:
+        return Q()
+    table = model._meta.db_table
+    pk = model._meta.pk.column
+    if connection.vendor == 'sqlite':
+        fts = _fts_table(table)
+        hits = RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', [_sqlite_match(tokens)])
+    elif connection.vendor == 'postgresql':
+        hits = RawSQL(
+            f"SELECT {pk} FROM {table} WHERE to_tsvector('simple', document) @@ to_tsquery('simple', %s)",
+            [_tsquery(tokens)],
+        )
+    else:
+        hits = model.objects.filter(*[Q(document__contains=token) for token in tokens]).values('pk')
+    return Q(**{f'{field}__in': hits})
+
+
+def highlight(text, text_terms, width=None):
+    """HTML-escape `text`, wrapping words that start with any term in <mark>.
+
+    With `width`, return about that many characters around the first hit,
+    with "…" where text was cut. Returns None when no word matches.
+    """
+    if not text:
+        return None
+    hits = [m for m in TOKEN_RE.finditer(text) if m.group().lower().startswith(tuple(text_terms))]
+    if not hits:
+        return None
+    start, end = 0, len(text)
+    if width and len(text) > width:
+        start = max(0, hits[0].start() - width // 3)
+        end = min(len(text), start + width)
+    parts, position = [], start
+    for hit in hits:
+        if hit.start() < start or hit.end() > end:
+            continue
+        parts.extend([escape(text[position:hit.start()]), '<mark>', escape(hit.group()), '</mark>'])
+        position = hit.end()
+    parts.append(escape(text[position:end]))
+    return ('…' if start else '') + ''.join(parts).strip() + ('…' if end < len(text) else '')
+
+
+def search(model, text, limit=20, queryset=None):
+    """Return primary keys of `model` rows matching `text`, best first.
+
+    `queryset` (over the model the documents describe) restricts the
+    candidates inside the same statement, so scoping never drops results
+    that a later filter would have needed.
+    """
+    tokens = terms(text)
+    if not tokens:
+        return []
+    table = model._meta.db_table
+    pk = model._meta.pk.column
+    scope_sql, scope_params = None, []
+    if queryset is not None:
+        scope_sql, scope_params = queryset.order_by().values('pk').query.sql_with_params()
+
+    def scope(column):
+        return f' AND {column} IN ({scope_sql})' if scope_sql else ''
+
+    if connection.vendor == 'sqlite':
+        fts = _fts_table(table)
+        match = _sqlite_match(tokens)
+        # Run the MATCH once and filter its hits; otherwise SQLite may probe
+        # the full-text index once per row of the scope subquery
+        materialized = 'MATERIALIZED ' if connection.Database.sqlite_version_info >= (3, 35) else ''
+        sql = (
+            f'WITH hits AS {materialized}(SELECT rowid AS id, bm25({fts}) AS score FROM {fts} WHERE {fts} MATCH %s) '
+            f'SELECT id FROM hits WHERE 1 = 1{scope("id")} ORDER BY score LIMIT %s'
+        )
+        params = [match, *scope_params, limit]
+    elif connection.vendor == 'postgresql':
+        vector = "to_tsvector('simple', document)"
+        sql = (
+            f"SELECT {pk} FROM {table}, to_tsquery('simple', %s) query "
+            f"WHERE {vector} @@ query{scope(pk)} "
+            f"ORDER BY ts_rank({vector}, query) DESC, {pk} LIMIT %s"
+        )
+        params = [_tsquery(tokens), *scope_params, limit]
+    else:
+        rows = model.objects.filter(*[Q(document__contains=token) for token in tokens])
+        if queryset is not None:
+            rows = rows.filter(pk__in=queryset.values('pk'))
+        return list(rows.order_by('pk').values_list('pk', flat=True)[:limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
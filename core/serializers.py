@@ -5,6 +5,8 @@ from .models import SystemSetting, AuditLog
 ALLOWED_SETTINGS = {
     # key: expected type ('int' or 'decimal' or 'text')
     'annual_leave_request_max_days': 'int',
+    # Most people from one department allowed off on the same day (0 = no limit)
+    'leave_max_concurrent_absences': 'int',
 }
 
 
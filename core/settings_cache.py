@@ -0,0 +1,109 @@
+"""Process-local cache of SystemSetting rows.
+
+The settings table is tiny and read on hot paths (the leave cap is checked
+for every serialized leave request), so each process keeps a copy of every
+row in memory. Within SYSTEM_SETTINGS_CACHE_TTL seconds of the last check a
+lookup is a dict read with no I/O at all.
+
+When the TTL runs out the process compares its version stamp with the one
+in the 'default' cache. If nothing changed it keeps its copy for another
+TTL, otherwise it reloads the table with one query. Copies older than
+SYSTEM_SETTINGS_CACHE_MAX_AGE seconds are reloaded regardless.
+
+The version stamp only carries a change to other workers when the
+'default' cache is shared between them. The default locmem backend is per
+process, so there a change made in one worker reaches the others only
+through SYSTEM_SETTINGS_CACHE_MAX_AGE.
+
+core.signals calls `invalidate()` whenever a SystemSetting is saved or
+deleted, which drops this process's copy and bumps the shared version.
+"""
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+
+VERSION_KEY = 'system_settings:version'
+
+_lock = threading.Lock()
+_state = {'values': None, 'version': None, 'loaded_at': 0.0, 'checked_at': 0.0}
+
+
+def _shared_version():
+    cache = caches['default']
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(VERSION_KEY, version, timeout=None):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def _load():
+    from .models import SystemSetting
+
+    version = _shared_version()
+    values = {
+        key: (int_value, decimal_value, text_value)
+        for key, int_value, decimal_value, text_value in SystemSetting.objects.values_list(
+            'key', 'int_value', 'decimal_value', 'text_value'
+        )
+    }
+    now = time.monotonic()
+    _state.update(values=values, version=version, loaded_at=now, checked_at=now)
+    return values
+
+
+def _values():
+    now = time.monotonic()
+    # Read once: invalidate() may reset _state['values'] to None at any time
+    values = _state['values']
+    if values is not None and now - _state['checked_at'] < getattr(settings, 'SYSTEM_SETTINGS_CACHE_TTL', 30):
+        return values
+    with _lock:
+        now = time.monotonic()
+        values = _state['values']
+        if values is None or now - _state['loaded_at'] >= getattr(settings, 'SYSTEM_SETTINGS_CACHE_MAX_AGE', 300):
+            values = _load()
+        elif now - _state['checked_at'] >= getattr(settings, 'SYSTEM_SETTINGS_CACHE_TTL', 30):
+            if _shared_version() == _state['version']:
+                _state['checked_at'] = now
+            else:
+                values = _load()
+        return values
+
+
+def invalidate():
+    """Forget this process's copy and tell other processes to reload theirs."""
+    with _lock:
+        _state['values'] = None
+    cache = caches['default']
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def get_int(key, default=None):
+    int_value, decimal_value, _ = _values().get(key, (None, None, ''))
+    if int_value is not None:
+        return int_value
+    if decimal_value is not None:
+        return int(decimal_value)
+    return default
+
+
+def get_decimal(key, default=None):
+    int_value, decimal_value, _ = _values().get(key, (None, None, ''))
+    if decimal_value is not None:
+        return decimal_value
+    if int_value is not None:
+        return Decimal(int_value)
+    return default
+
+
+def get_text(key, default=None):
+    _, _, text_value = _values().get(key, (None, None, ''))
+    return text_value if text_value else default
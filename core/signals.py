@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import settings_cache
+from .models import SystemSetting
+
+
+@receiver(post_save, sender=SystemSetting, dispatch_uid='system_setting_saved')
+@receiver(post_delete, sender=SystemSetting, dispatch_uid='system_setting_deleted')
+def invalidate_settings_cache(sender, **kwargs):
+    settings_cache.invalidate()
+    # Invalidate again once the write is visible, so no process can reload
+    # the old value in between and keep it until the next bump
+    transaction.on_commit(settings_cache.invalidate)
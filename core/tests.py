@@ -0,0 +1,248 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from . import settings_cache
+from .audit_writer import AuditLogWriter
+from .models import AuditLog, AuditLogDailyRollup, SystemSetting
+
+
+class AuditLogRetentionTests(APITestCase):
+    def setUp(self):
+        self.ceo = get_user_model().objects.create_user(email="ceo@example.com", password="pass", role="ceo")
+        now = timezone.now()
+        self.old_day = now - timedelta(days=120)
+        for _ in range(3):
+            AuditLog.objects.create(actor=self.ceo, action='login_success', status_code=200, path='/api/auth/login/', timestamp=self.old_day)
+        AuditLog.objects.create(action='api_call', status_code=500, path='/api/users/', timestamp=self.old_day)
+        AuditLog.objects.create(actor=self.ceo, action='login_success', status_code=200, path='/api/auth/login/', timestamp=now)
+
+    def test_archive_moves_old_rows_and_keeps_rollups(self):
+        with tempfile.TemporaryDirectory() as archive_dir:
+            call_command('archive_audit_logs', days=90, archive_dir=archive_dir, stdout=open(os.devnull, 'w'))
+            month = self.old_day.strftime('%Y-%m')
+            with gzip.open(os.path.join(archive_dir, f'audit-{month}.jsonl.gz'), 'rt') as fh:
+                archived = [json.loads(line) for line in fh]
+
+        self.assertEqual(len(archived), 4)
+        self.assertEqual(archived[0]['actor_email'], 'ceo@example.com')
+        self.assertEqual(AuditLog.objects.count(), 1)
+        rollups = {(r.action, r.status_code): r.count for r in AuditLogDailyRollup.objects.all()}
+        self.assertEqual(rollups, {('login_success', 200): 3, ('api_call', 500): 1})
+
+        self.client.force_authenticate(user=self.ceo)
+        res = self.client.get('/api/settings/logs/rollups/', {'action': 'login_success'})
+        self.assertEqual([(r['date'], r['count']) for r in res.data['results']], [
+            (timezone.localdate().isoformat(), 1),
+            (timezone.localtime(self.old_day).date().isoformat(), 3),
+        ])
+
+    def test_interrupted_run_does_not_count_rows_twice(self):
+        dumps, calls = json.dumps, []
+
+        def failing_dumps(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 3:
+                raise OSError('disk full')
+            return dumps(*args, **kwargs)
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            with mock.patch('core.management.commands.archive_audit_logs.json.dumps', failing_dumps):
+                with self.assertRaises(OSError):
+                    call_command('archive_audit_logs', days=90, archive_dir=archive_dir, chunk_size=2, stdout=open(os.devnull, 'w'))
+            self.assertEqual(AuditLog.objects.count(), 3)
+            call_command('archive_audit_logs', days=90, archive_dir=archive_dir, chunk_size=2, stdout=open(os.devnull, 'w'))
+
+        self.assertEqual(AuditLog.objects.count(), 1)
+        rollups = {(r.action, r.status_code): r.count for r in AuditLogDailyRollup.objects.all()}
+        self.assertEqual(rollups, {('login_success', 200): 3, ('api_call', 500): 1})
+
+    def test_time_range_filters(self):
+        self.client.force_authenticate(user=self.ceo)
+        since = (timezone.localdate() - timedelta(days=1)).isoformat()
+        res = self.client.get('/api/settings/logs/', {'since': since})
+        self.assertEqual(res.data['count'], 1)
+        res = self.client.get('/api/settings/logs/', {'until': since})
+        self.assertEqual(res.data['count'], 4)
+        self.assertEqual(self.client.get('/api/settings/logs/', {'since': 'yesterday'}).status_code, 400)
+
+
+class AuditLogKeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.ceo = get_user_model().objects.create_user(email="ceo@example.com", password="pass", role="ceo")
+        self.other = get_user_model().objects.create_user(email="other@example.com", password="pass", role="hr")
+        now = timezone.now()
+        # Several rows share a timestamp so ties must be broken by id
+        for i in range(7):
+            AuditLog.objects.create(actor=self.ceo, action='api_call', timestamp=now - timedelta(minutes=i // 3))
+        AuditLog.objects.create(actor=self.other, action='api_call', timestamp=now)
+        self.client.force_authenticate(user=self.ceo)
+
+    def test_cursor_walks_every_row_once_without_counting(self):
+        expected = list(AuditLog.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
+        seen = []
+        res = self.client.get('/api/settings/logs/', {'pagination': 'cursor', 'page_size': 3})
+        while True:
+            self.assertNotIn('count', res.data)
+            seen.extend(row['id'] for row in res.data['results'])
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+        self.assertEqual(seen, expected)
+
+    def test_actor_filter_matches_exact_email_or_prefix(self):
+        res = self.client.get('/api/settings/logs/', {'actor': 'other@example.com'})
+        self.assertEqual(res.data['count'], 1)
+        res = self.client.get('/api/settings/logs/', {'actor': 'ceo'})
+        self.assertEqual(res.data['count'], 7)
+        res = self.client.get('/api/settings/logs/', {'actor': 'example.com'})
+        self.assertEqual(res.data['count'], 0)
+        # Case-insensitive, through the lower(email) index
+        self.assertEqual(self.client.get('/api/settings/logs/', {'actor': 'Other@Example.COM'}).data['count'], 1)
+        self.assertEqual(self.client.get('/api/settings/logs/', {'actor': 'CE'}).data['count'], 7)
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(self.client.get('/api/settings/logs/', {'cursor': 'bogus'}).status_code, 400)
+
+
+class AuditLogExportTests(APITestCase):
+    def setUp(self):
+        self.ceo = get_user_model().objects.create_user(email="ceo@example.com", password="pass", role="ceo")
+        AuditLog.objects.create(actor=self.ceo, action='login_success', summary='Signed in, "ok"', extra={'k': 1})
+        AuditLog.objects.create(action='api_call', path='/api/users/', status_code=500)
+        self.client.force_authenticate(user=self.ceo)
+
+    def test_csv_export_streams_filtered_rows(self):
+        res = self.client.get('/api/settings/logs/export/', {'action': 'login_success'})
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.streaming)
+        rows = list(csv.DictReader(io.StringIO(b''.join(res.streaming_content).decode())))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['actor_email'], 'ceo@example.com')
+        self.assertEqual(rows[0]['summary'], 'Signed in, "ok"')
+        self.assertEqual(json.loads(rows[0]['extra']), {'k': 1})
+
+    def test_gzipped_ndjson_export(self):
+        res = self.client.get('/api/settings/logs/export/', {'fmt': 'ndjson', 'gzip': '1'})
+        self.assertEqual(res['Content-Type'], 'application/gzip')
+        lines = gzip.decompress(b''.join(res.streaming_content)).decode().splitlines()
+        self.assertEqual([json.loads(line)['action'] for line in lines], ['api_call', 'login_success'])
+
+    def test_unknown_format_is_rejected(self):
+        self.assertEqual(self.client.get('/api/settings/logs/export/', {'fmt': 'xml'}).status_code, 400)
+
+
+@override_settings(AUDIT_LOG_ASYNC=True, AUDIT_LOG_BATCH_SIZE=3, AUDIT_LOG_FLUSH_INTERVAL=60, AUDIT_LOG_ENQUEUE_TIMEOUT=0.01)
+class AuditLogWriterTests(APITestCase):
+    """The test settings write synchronously; these enable the buffered writer."""
+
+    def setUp(self):
+        self.writer = AuditLogWriter()
+        self.addCleanup(self.writer._stop.set)
+
+    def _entry(self, i=0):
+        return AuditLog(action='api_call', path=f'/api/{i}/', status_code=200)
+
+    def _hold_queue(self):
+        # Keep the drain thread idle so entries stay queued
+        self.writer._run = lambda: self.writer._stop.wait()
+
+    def test_drain_thread_writes_full_batches(self):
+        batches, done = [], threading.Event()
+
+        def record(entries):
+            batches.append(len(entries))
+            if sum(batches) >= 6:
+                done.set()
+
+        self.writer._write = record
+        for i in range(6):
+            self.writer.submit(self._entry(i))
+        self.assertTrue(done.wait(5))
+        self.assertEqual(batches, [3, 3])
+
+    @override_settings(AUDIT_LOG_BATCH_SIZE=100, AUDIT_LOG_FLUSH_INTERVAL=0.05)
+    def test_partial_batch_is_written_after_flush_interval(self):
+        batches, done = [], threading.Event()
+        self.writer._write = lambda entries: (batches.append(len(entries)), done.set())
+        self.writer.submit(self._entry(1))
+        self.writer.submit(self._entry(2))
+        self.assertTrue(done.wait(5))
+        self.assertEqual(batches, [2])
+
+    def test_flush_writes_queued_entries_in_batches(self):
+        self._hold_queue()
+        for i in range(5):
+            self.writer.submit(self._entry(i))
+        self.assertEqual(AuditLog.objects.count(), 0)
+        with self.assertNumQueries(2):
+            self.writer.flush()
+        self.assertEqual(AuditLog.objects.count(), 5)
+        self.assertEqual((self.writer.written, self.writer.dropped), (5, 0))
+
+    @override_settings(AUDIT_LOG_QUEUE_SIZE=2)
+    def test_entries_are_dropped_and_counted_when_queue_is_full(self):
+        self._hold_queue()
+        with self.assertLogs('core.audit_writer', 'WARNING') as logs:
+            for i in range(4):
+                self.writer.submit(self._entry(i))
+        self.assertEqual(len(logs.output), 2)
+        self.writer.flush()
+        self.assertEqual((self.writer.written, self.writer.dropped), (2, 2))
+        self.assertEqual(AuditLog.objects.count(), 2)
+
+
+class SystemSettingCacheTests(APITestCase):
+    def setUp(self):
+        settings_cache.invalidate()
+        self.ceo = get_user_model().objects.create_user(email="ceo@example.com", password="pass", role="ceo")
+        self.client.force_authenticate(user=self.ceo)
+
+    def test_reads_are_cached_and_writes_invalidate(self):
+        self.assertEqual(SystemSetting.get_int('annual_leave_request_max_days', default=15), 15)
+        with self.assertNumQueries(0):
+            for _ in range(5):
+                self.assertEqual(SystemSetting.get_int('annual_leave_request_max_days', default=15), 15)
+
+        res = self.client.post('/api/settings/system/by-key/annual_leave_request_max_days/', {'int_value': 20})
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(SystemSetting.get_int('annual_leave_request_max_days', default=15), 20)
+
+        res = self.client.patch('/api/settings/system/by-key/annual_leave_request_max_days/', {'int_value': 25})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(SystemSetting.get_int('annual_leave_request_max_days'), 25)
+        self.assertEqual(SystemSetting.get_decimal('annual_leave_request_max_days'), Decimal(25))
+        self.assertEqual(SystemSetting.get_text('annual_leave_request_max_days', default='n/a'), 'n/a')
+
+    @override_settings(SYSTEM_SETTINGS_CACHE_TTL=0)
+    def test_expired_copy_is_kept_while_version_is_unchanged(self):
+        SystemSetting.get_int('annual_leave_request_max_days')
+        with self.assertNumQueries(0):
+            SystemSetting.get_int('annual_leave_request_max_days')
+        # Another worker's write, as seen through a shared default cache:
+        # no local signal, only a version bump (locmem relies on MAX_AGE)
+        SystemSetting.objects.bulk_create([SystemSetting(key='annual_leave_request_max_days', int_value=12)])
+        caches['default'].incr(settings_cache.VERSION_KEY)
+        self.assertEqual(SystemSetting.get_int('annual_leave_request_max_days'), 12)
+
+    def test_max_age_reloads_without_a_version_bump(self):
+        SystemSetting.get_int('annual_leave_request_max_days')
+        # Another worker's write with a per-process default cache: nothing changes here
+        SystemSetting.objects.bulk_create([SystemSetting(key='annual_leave_request_max_days', int_value=12)])
+        self.assertIsNone(SystemSetting.get_int('annual_leave_request_max_days'))
+        with override_settings(SYSTEM_SETTINGS_CACHE_TTL=0, SYSTEM_SETTINGS_CACHE_MAX_AGE=0):
+            self.assertEqual(SystemSetting.get_int('annual_leave_request_max_days'), 12)
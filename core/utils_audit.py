@@ -1,7 +1,12 @@
+import csv
+import io
+import json
+import zlib
 from typing import Optional, Dict, Any
 from django.http import HttpRequest
 from django.utils import timezone
 from .models import AuditLog
+from .audit_writer import audit_writer
 
 
 def log_audit(request: Optional[HttpRequest] = None,
@@ -14,7 +19,8 @@ def log_audit(request: Optional[HttpRequest] = None,
               extra: Optional[Dict[str, Any]] = None):
     """Create an AuditLog record with safe defaults.
 
-    Either pass `request` (preferred) or explicit `actor`.
+    Either pass `request` (preferred) or explicit `actor`. The row is handed
+    to the buffered audit writer, so it may land a moment after this returns.
     """
     try:
         if request is not None:
@@ -31,7 +37,7 @@ def log_audit(request: Optional[HttpRequest] = None,
             path = ''
             ip = ''
             ua = ''
-        AuditLog.objects.create(
+        audit_writer.submit(AuditLog(
             actor=actor_obj,
             action=action,
             summary=summary,
@@ -43,7 +49,75 @@ def log_audit(request: Optional[HttpRequest] = None,
             target_model=target_model or '',
             target_object_id=str(target_object_id or ''),
             extra=extra or {},
-        )
+        ))
     except Exception:
         # Never break business flows for audit failures
         pass
+
+
+# Column order shared by archives and exports
+AUDIT_EXPORT_FIELDS = [
+    'id', 'timestamp', 'actor_id', 'actor_email', 'action', 'summary', 'method', 'path', 'status_code',
+    'ip_address', 'user_agent', 'target_model', 'target_object_id', 'extra',
+]
+
+
+def audit_export_rows(queryset, chunk_size: int = 2000):
+    """Yield AuditLog rows as plain dicts keyed by AUDIT_EXPORT_FIELDS.
+
+    Reads with `.values()` and a server-side iterator so memory stays flat
+    regardless of how many rows are exported.
+    """
+    columns = [f if f != 'actor_email' else 'actor__email' for f in AUDIT_EXPORT_FIELDS]
+    for values in queryset.values_list(*columns).iterator(chunk_size=chunk_size):
+        row = dict(zip(AUDIT_EXPORT_FIELDS, values))
+        row['timestamp'] = row['timestamp'].isoformat() if row['timestamp'] else None
+        yield row
+
+
+def _batched_text(rows, render, batch_rows: int):
+    buffer = []
+    for i, row in enumerate(rows, 1):
+        buffer.append(render(row))
+        if i % batch_rows == 0:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def audit_csv_stream(rows, batch_rows: int = 500):
+    """Render export rows as CSV text chunks, header first.
+
+    `extra` is written as a JSON string so the column stays one cell.
+    """
+    out = io.StringIO()
+    writer = csv.writer(out)
+
+    def render(values):
+        out.seek(0)
+        out.truncate()
+        writer.writerow(values)
+        return out.getvalue()
+
+    yield render(AUDIT_EXPORT_FIELDS)
+    yield from _batched_text(
+        rows,
+        lambda row: render([row[f] for f in AUDIT_EXPORT_FIELDS[:-1]] + [json.dumps(row['extra'] or {}, default=str)]),
+        batch_rows,
+    )
+
+
+def audit_ndjson_stream(rows, batch_rows: int = 500):
+    """Render export rows as newline-delimited JSON text chunks."""
+    yield from _batched_text(rows, lambda row: json.dumps(row, default=str) + '\n', batch_rows)
+
+
+def gzip_stream(chunks):
+    """Gzip a stream of text chunks on the fly."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
@@ -3,15 +3,26 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .models import SystemSetting, AuditLog
+from .models import SystemSetting, AuditLog, AuditLogDailyRollup
 from .serializers import SystemSettingSerializer, ALLOWED_SETTINGS, AuditLogSerializer
+from .utils_audit import audit_csv_stream, audit_export_rows, audit_ndjson_stream, gzip_stream
 from hr.permissions import AnyOf, IsCEO, IsHR
+import base64
+import binascii
 import logging
 from rest_framework.exceptions import ValidationError
 from django.db import IntegrityError
 from rest_framework.views import APIView
+from rest_framework.utils.urls import replace_query_param
+from hr.models import CustomUser
 from rest_framework.permissions import IsAuthenticated as DRFIsAuthenticated
 from rest_framework import viewsets, pagination
+from datetime import datetime, time, timedelta
+from django.db.models import Count, Q
+from django.db.models.functions import Lower, TruncDate
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 logger = logging.getLogger(__name__)
 
@@ -144,6 +155,87 @@ class FifteenPerPagePagination(pagination.PageNumberPagination):
     max_page_size = 50
 
 
+class AuditLogKeysetPagination(pagination.BasePagination):
+    """Keyset (cursor) pagination on (timestamp, id), newest first.
+
+    The opaque cursor carries the last row's timestamp and id, and the next
+    page is fetched with `(timestamp, id) < cursor` straight off the index.
+    No COUNT(*) is issued and deep pages cost the same as the first one.
+    Pages only move forward; clients keep earlier cursors to go back.
+    """
+    page_size = 15
+    max_page_size = 50
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, timestamp, pk):
+        raw = f'{timestamp.isoformat()}|{pk}'.encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    def decode_cursor(self, request):
+        value = request.query_params.get(self.cursor_query_param)
+        if not value:
+            return None
+        try:
+            timestamp, pk = base64.urlsafe_b64decode(value.encode()).decode().split('|')
+            parsed = parse_datetime(timestamp)
+            if parsed is None:
+                raise ValueError(timestamp)
+            return parsed, int(pk)
+        except (ValueError, UnicodeDecodeError, binascii.Error):
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by('-timestamp', '-id')
+        position = self.decode_cursor(request)
+        if position:
+            timestamp, pk = position
+            queryset = queryset.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk))
+        rows = list(queryset[:page_size + 1])
+        self.next_position = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            self.next_position = (rows[-1].timestamp, rows[-1].pk)
+        return rows
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(*self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+
+def _parse_time_bound(value, end=False):
+    """Parse an ISO date or datetime query param into an aware datetime.
+
+    A bare date used as an upper bound means "through the end of that day",
+    so it is returned as the following midnight (exclusive).
+    """
+    dt = parse_datetime(value)
+    if dt is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError({'detail': f'Invalid date/time: {value}'})
+        if end:
+            day += timedelta(days=1)
+        dt = datetime.combine(day, time.min)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = AuditLog.objects.all()
     serializer_class = AuditLogSerializer
@@ -154,16 +246,125 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
         # Instantiate the base DRF permission and our composite AnyOf(IsCEO)
         return [DRFIsAuthenticated(), AnyOf(IsCEO)]
 
+    @property
+    def paginator(self):
+        """Keyset pagination when `?pagination=cursor` or a cursor is given."""
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = AuditLogKeysetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_time_range(self):
+        """Return the (since, until) bounds from the query params, either may be None."""
+        since = self.request.query_params.get('since')
+        until = self.request.query_params.get('until')
+        return (
+            _parse_time_bound(since) if since else None,
+            _parse_time_bound(until, end=True) if until else None,
+        )
+
     def get_queryset(self):
         qs = super().get_queryset()
-        # Optional filters: action, actor email contains, path contains
+        # Optional filters: action, actor email (exact or prefix), path contains,
+        # and a since/until time range that narrows the scan via the timestamp index
         action = self.request.query_params.get('action')
         actor = self.request.query_params.get('actor')
         path = self.request.query_params.get('path')
+        since, until = self.get_time_range()
+        if since:
+            qs = qs.filter(timestamp__gte=since)
+        if until:
+            qs = qs.filter(timestamp__lt=until)
         if action:
             qs = qs.filter(action__iexact=action)
         if actor:
-            qs = qs.filter(actor__email__icontains=actor)
+            # Resolve matching users first (small table) and filter on the indexed
+            # actor_id column instead of scanning audit rows with LIKE '%...%'.
+            # Emails are matched on lower(email), which has its own index; a
+            # prefix also gets a range on it so that index can serve it.
+            actor = actor.strip().lower()
+            users = CustomUser.all_objects.alias(email_lower=Lower('email'))
+            if '@' in actor:
+                users = users.filter(email_lower=actor)
+            elif actor:
+                after = actor[:-1] + chr(ord(actor[-1]) + 1)
+                users = users.filter(email_lower__gte=actor, email_lower__lt=after, email_lower__startswith=actor)
+            qs = qs.filter(actor_id__in=users.values('pk'))
         if path:
             qs = qs.filter(path__icontains=path)
         return qs
+
+    @action(detail=False, methods=['get'], url_path='rollups')
+    def rollups(self, request):
+        """Daily counts per action and status code.
+
+        Archived days come from AuditLogDailyRollup; days still in the live
+        table are grouped on the fly. Accepts the same since/until params.
+        """
+        since, until = self.get_time_range()
+        archived = AuditLogDailyRollup.objects.all()
+        live = AuditLog.objects.all()
+        if since:
+            archived = archived.filter(date__gte=timezone.localtime(since).date())
+            live = live.filter(timestamp__gte=since)
+        if until:
+            archived = archived.filter(date__lt=timezone.localtime(until).date())
+            live = live.filter(timestamp__lt=until)
+        action_filter = request.query_params.get('action')
+        if action_filter:
+            archived = archived.filter(action__iexact=action_filter)
+            live = live.filter(action__iexact=action_filter)
+
+        counts = {}
+        for row in archived.values('date', 'action', 'status_code', 'count'):
+            key = (row['date'], row['action'], row['status_code'])
+            counts[key] = counts.get(key, 0) + row['count']
+        live_rows = (
+            live.order_by()
+            .annotate(date=TruncDate('timestamp'))
+            .values('date', 'action', 'status_code')
+            .annotate(count=Count('id'))
+        )
+        for row in live_rows:
+            key = (row['date'], row['action'], row['status_code'] or 0)
+            counts[key] = counts.get(key, 0) + row['count']
+
+        results = [
+            {'date': day.isoformat(), 'action': action_name, 'status_code': status_code, 'count': count}
+            for (day, action_name, status_code), count in sorted(counts.items(), reverse=True)
+        ]
+        return Response({'results': results})
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """Stream the filtered audit log as CSV or NDJSON.
+
+        Takes the list filters plus `fmt=csv|ndjson` (default csv) and
+        `gzip=1`. Rows are read with a server-side iterator and written as
+        they arrive, so memory stays flat however large the export is.
+        """
+        fmt = request.query_params.get('fmt', 'csv').lower()
+        renderers = {
+            'csv': (audit_csv_stream, 'text/csv; charset=utf-8'),
+            'ndjson': (audit_ndjson_stream, 'application/x-ndjson; charset=utf-8'),
+        }
+        if fmt not in renderers:
+            return Response({'detail': 'fmt must be one of: csv, ndjson.'}, status=status.HTTP_400_BAD_REQUEST)
+        render, content_type = renderers[fmt]
+
+        queryset = self.get_queryset().order_by('-timestamp', '-id')
+        chunks = render(audit_export_rows(queryset))
+        filename = f'audit-logs-{timezone.localtime():%Y%m%d-%H%M%S}.{fmt}'
+        if request.query_params.get('gzip', '').lower() in ('1', 'true', 'yes'):
+            chunks = gzip_stream(chunks)
+            content_type = 'application/gzip'
+            filename += '.gz'
+        else:
+            chunks = (chunk.encode('utf-8') for chunk in chunks)
+
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
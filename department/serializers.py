@@ -1,9 +1,26 @@
 # filepath: department/serializers.py
+from django.db.models import Count, Q
 from rest_framework import serializers
 from .models import Department
 from hr.models import CustomUser
 
 
+def with_head_count(queryset):
+    """Join the manager and annotate `head_count` for DepartmentSerializer."""
+    return queryset.select_related('manager').annotate(
+        head_count=Count('custom_users', filter=Q(custom_users__deleted_at__isnull=True))
+    )
+
+
+def head_counts(department_ids):
+    """Map department id -> number of users, in one grouped query."""
+    rows = (
+        CustomUser.objects.filter(department_id__in=set(department_ids) - {None}, deleted_at__isnull=True)
+        .order_by().values('department_id').annotate(count=Count('pk'))
+    )
+    return {row['department_id']: row['count'] for row in rows}
+
+
 class ManagerSerializer(serializers.ModelSerializer):
     class Meta:
         model = CustomUser
@@ -21,8 +38,14 @@ class DepartmentSerializer(serializers.ModelSerializer):
         # head_count will be included automatically
 
     def get_head_count(self, obj):
-        # Count users linked to this department
-        return obj.custom_users.count()
+        # Annotated by with_head_count(), or precomputed per page by the
+        # caller (see UserViewSet.list); otherwise count on demand
+        if hasattr(obj, 'head_count'):
+            return obj.head_count
+        memo = self.context.setdefault('department_head_counts', {})
+        if obj.pk not in memo:
+            memo.update(head_counts([obj.pk]))
+        return memo.get(obj.pk, 0)
 
     def validate_manager(self, value):
         if value and str(value.role).lower() != 'manager':
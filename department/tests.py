@@ -1,3 +1,44 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from .models import Department
+
+
+class DepartmentListQueryTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.ceo = User.objects.create_user(email="ceo@example.com", password="pass", role="ceo")
+        self.client.force_authenticate(user=self.ceo)
+
+    def _add_department(self, i, staff):
+        User = get_user_model()
+        manager = User.objects.create_user(email=f"mgr{i}@example.com", password="pass", role="manager")
+        dept = Department.objects.create(name=f"Dept {i}", code=f"D{i}", manager=manager)
+        for n in range(staff):
+            User.objects.create_user(email=f"e{i}-{n}@example.com", password="pass", role="employee", department=dept)
+        return dept
+
+    def _list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get('/api/departments/')
+        self.assertEqual(res.status_code, 200)
+        return len(ctx.captured_queries), res.data
+
+    def test_head_count_and_manager_do_not_add_queries_per_department(self):
+        self._add_department(1, staff=2)
+        few, _ = self._list_queries()
+        for i in range(2, 6):
+            self._add_department(i, staff=i)
+        many, data = self._list_queries()
+        self.assertEqual(few, many)
+
+        rows = {row['code']: row for row in data['results']}
+        self.assertEqual(rows['D3']['head_count'], 3)
+        self.assertEqual(rows['D3']['manager']['email'], 'mgr3@example.com')
+
+    def test_soft_deleted_users_are_not_counted(self):
+        dept = self._add_department(1, staff=2)
+        dept.custom_users.first().delete()
+        self.assertEqual(self.client.get(f'/api/departments/{dept.pk}/').data['head_count'], 1)
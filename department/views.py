@@ -2,7 +2,7 @@ from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from .permissions import IsCEOOrReadOnly
 from .models import Department
-from .serializers import DepartmentSerializer
+from .serializers import DepartmentSerializer, with_head_count
 
 
 class DepartmentViewSet(viewsets.ModelViewSet):
@@ -10,3 +10,7 @@ class DepartmentViewSet(viewsets.ModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
     permission_classes = [IsAuthenticated, IsCEOOrReadOnly]
+
+    def get_queryset(self):
+        # Meta.ordering does not apply to the grouped query
+        return with_head_count(super().get_queryset()).order_by('name')
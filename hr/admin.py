@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, PerformanceReview, Attendance, Complaint
+from .models import CustomUser, PerformanceReview, Attendance, AttendanceMonthlyRollup, Complaint
 from department.models import Department
 from .models import PasswordResetOTP
 
@@ -12,6 +12,11 @@ admin.site.register(CustomUser, CustomUserAdmin)
 admin.site.register(PerformanceReview)
 admin.site.register(Attendance)
 admin.site.register(PasswordResetOTP)
+@admin.register(AttendanceMonthlyRollup)
+class AttendanceMonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = ("employee", "year", "month", "present_days", "absent_days", "leave_days", "late_arrivals", "work_seconds")
+    list_filter = ("year", "month")
+    search_fields = ("employee__email",)
 @admin.register(Complaint)
 class ComplaintAdmin(admin.ModelAdmin):
     list_display = ("id", "type", "subject", "created_by", "target_user", "status", "created_at")
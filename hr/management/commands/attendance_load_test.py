@@ -0,0 +1,108 @@
+"""
+Simulate the morning check-in peak against the configured database.
+
+Creates (or reuses) N synthetic employees with `@loadtest.invalid` emails,
+then has a thread pool check every one of them in, optionally twice to
+mimic double-clicks, and check them out again. Each punch goes through
+hr.services.attendance, i.e. the same single-statement path as the API.
+The command reports throughput, latency percentiles and how many punches
+were accepted; with double-clicks exactly one check-in per employee must
+win. Synthetic users and their rows are hard-deleted afterwards unless
+--keep is given.
+
+Run it against a staging copy, never production: it writes real rows.
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from hr.models import Attendance
+from hr.services.attendance import PunchError, check_in, check_out
+
+DOMAIN = 'loadtest.invalid'
+
+
+class Command(BaseCommand):
+    help = 'Load-test the check-in/check-out path with a simulated morning peak'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=2000)
+        parser.add_argument('--workers', type=int, default=32, help='Concurrent punching threads (default: 32).')
+        parser.add_argument('--double-click', action='store_true', help='Send every check-in twice concurrently.')
+        parser.add_argument('--date', help='Day to punch, YYYY-MM-DD (default: today).')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic users and their attendance.')
+
+    def handle(self, *args, **options):
+        day = parse_date(options['date']) if options['date'] else timezone.localdate()
+        if day is None:
+            raise CommandError('--date must be YYYY-MM-DD.')
+        if options['employees'] < 1 or options['workers'] < 1:
+            raise CommandError('--employees and --workers must be positive.')
+
+        users = self._users(options['employees'])
+        # Start from a clean day so repeated runs measure the insert path
+        Attendance.all_objects.filter(employee__in=users, date=day).hard_delete()
+        try:
+            # Arrivals spread over an hour from 08:30, departures nine hours later
+            start = timezone.make_aware(datetime.combine(day, datetime.min.time())) + timedelta(hours=8, minutes=30)
+            step = timedelta(seconds=3600 / len(users))
+            arrivals = [(user, start + i * step) for i, user in enumerate(users)]
+            if options['double_click']:
+                arrivals = [punch for punch in arrivals for _ in range(2)]
+            departures = [(user, at + timedelta(hours=9)) for user, at in arrivals[::2 if options['double_click'] else 1]]
+
+            self._report('check-in', self._run(check_in, arrivals, options['workers']), len(users))
+            self._report('check-out', self._run(check_out, departures, options['workers']), len(users))
+        finally:
+            if not options['keep']:
+                get_user_model().all_objects.filter(pk__in=[u.pk for u in users]).hard_delete()
+
+    def _users(self, count):
+        User = get_user_model()
+        emails = [f'employee{i:05d}@{DOMAIN}' for i in range(count)]
+        existing = set(User.all_objects.filter(email__in=emails).values_list('email', flat=True))
+        password = make_password(None)
+        User.objects.bulk_create(
+            [User(email=email, password=password, role='employee') for email in emails if email not in existing],
+            batch_size=1000,
+        )
+        return list(User.all_objects.filter(email__in=emails).order_by('email'))
+
+    def _run(self, punch, jobs, workers):
+        def timed(job):
+            user, at = job
+            began = time.perf_counter()
+            try:
+                punch(user, at)
+                accepted = True
+            except PunchError:
+                accepted = False
+            finally:
+                close_old_connections()
+            return time.perf_counter() - began, accepted
+
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(timed, jobs))
+        return time.perf_counter() - began, results
+
+    def _report(self, label, run, employees):
+        elapsed, results = run
+        latencies = sorted(seconds * 1000 for seconds, _ in results)
+        accepted = sum(1 for _, ok in results if ok)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f'{label}: {len(results)} punches in {elapsed:.2f}s ({len(results) / elapsed:.0f}/s), '
+            f'p50 {statistics.median(latencies):.1f}ms, p95 {p95:.1f}ms, max {latencies[-1]:.1f}ms, '
+            f'{accepted} accepted'
+        )
+        if accepted != employees:
+            self.stdout.write(self.style.ERROR(f'{label}: expected {employees} accepted punches, got {accepted}.'))
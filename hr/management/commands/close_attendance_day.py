@@ -0,0 +1,104 @@
+"""
+Close out a day of attendance in a few set-based statements.
+
+For the given day (default: yesterday) the command
+  1. marks `Leave` for active users covered by an approved leave request
+     (inserting missing rows and converting empty `Absent` rows),
+  2. marks `Absent` for every other active user with no row, and
+  3. closes check-ins left open on or before that day at
+     ATTENDANCE_AUTO_CHECKOUT_TIME, computing work_duration in SQL,
+and then recomputes the monthly attendance rollups it touched. Steps 1
+and 2 only run on working days (see leave.services.working_calendar).
+The statement count does not depend on headcount, and re-running for the
+same day changes nothing, so it is safe to schedule from cron.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import DurationField, Exists, ExpressionWrapper, F, OuterRef, TimeField, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_time
+
+from hr.models import Attendance
+from hr.services.attendance_rollup import refresh_rollups
+from hr.signals import mark_dashboards_stale
+from leave.models import LeaveRequest
+from leave.services.working_calendar import is_working_day
+
+
+class Command(BaseCommand):
+    help = 'Mark absences and leave, and close open check-ins, for a finished day'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to close, YYYY-MM-DD (default: yesterday).')
+        parser.add_argument('--checkout-time', default=getattr(settings, 'ATTENDANCE_AUTO_CHECKOUT_TIME', '18:00'),
+                            help='Check-out time for open check-ins (default: ATTENDANCE_AUTO_CHECKOUT_TIME).')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing.')
+
+    def handle(self, *args, **options):
+        day = parse_date(options['date']) if options['date'] else timezone.localdate() - timedelta(days=1)
+        checkout = parse_time(options['checkout_time'])
+        if day is None or checkout is None:
+            raise CommandError('--date must be YYYY-MM-DD and --checkout-time HH:MM.')
+
+        with transaction.atomic():
+            stats, keys = self._close(day, checkout)
+            user_ids = {employee_id for employee_id, _ in keys}
+            if options['dry_run']:
+                transaction.set_rollback(True)
+            elif keys:
+                # bulk_create/update send no model signals
+                refresh_rollups(keys)
+                User = get_user_model()
+                department_ids = set(User.all_objects.filter(pk__in=user_ids).values_list('department_id', flat=True))
+                mark_dashboards_stale(user_ids=user_ids, department_ids=department_ids)
+
+        prefix = 'Would mark' if options['dry_run'] else 'Marked'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {stats['leave']} leave and {stats['absent']} absent for {day}; "
+            f"closed {stats['checked_out']} open check-ins."
+        ))
+
+    def _close(self, day, checkout):
+        User = get_user_model()
+        stats = {'leave': 0, 'absent': 0, 'checked_out': 0}
+        keys = set()
+
+        if is_working_day(day):
+            active = User.all_objects.filter(is_active=True, deleted_at__isnull=True, date_joined__date__lte=day)
+            covering = LeaveRequest.objects.approved().filter(deleted_at__isnull=True, start_date__lte=day, end_date__gte=day)
+            on_leave = covering.filter(employee=OuterRef('pk'))
+            has_row = Attendance.all_objects.filter(employee=OuterRef('pk'), date=day)
+
+            # Empty "Absent" rows (e.g. from reset-today) for people on approved leave
+            converted = list(
+                Attendance.objects.filter(date=day, status='Absent', check_in_time__isnull=True)
+                .filter(Exists(covering.filter(employee=OuterRef('employee'))))
+                .values_list('employee_id', flat=True)
+            )
+            Attendance.objects.filter(date=day, employee_id__in=converted).update(status='Leave')
+
+            missing = dict(
+                active.filter(~Exists(has_row)).annotate(on_leave=Exists(on_leave)).values_list('pk', 'on_leave')
+            )
+            Attendance.objects.bulk_create(
+                [Attendance(employee_id=pk, date=day, status='Leave' if leave else 'Absent') for pk, leave in missing.items()],
+                batch_size=1000, ignore_conflicts=True,
+            )
+            stats['leave'] = len(converted) + sum(missing.values())
+            stats['absent'] = len(missing) - sum(missing.values())
+            keys.update((pk, day) for pk in [*converted, *missing])
+
+        # Open check-ins close at `checkout`, or at the check-in itself if that was later
+        open_rows = Attendance.objects.filter(date__lte=day, check_in_time__isnull=False, check_out_time__isnull=True)
+        keys.update(open_rows.values_list('employee_id', 'date'))
+        closed_at = Greatest(Value(checkout, output_field=TimeField()), F('check_in_time'))
+        stats['checked_out'] = open_rows.update(
+            check_out_time=closed_at,
+            work_duration=ExpressionWrapper(closed_at - F('check_in_time'), output_field=DurationField()),
+        )
+        return stats, keys
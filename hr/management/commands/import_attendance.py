@@ -0,0 +1,56 @@
+"""
+Bulk-load attendance rows from a CSV or NDJSON file (optionally gzipped).
+
+Rows are validated and upserted in chunks on (employee, date); see
+hr.services.attendance_import for the accepted fields. Use it to onboard a
+site or to backfill after a badge-reader outage. Pass '-' to read stdin.
+"""
+import gzip
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hr.services.attendance_import import FORMATS, import_attendance, iter_records
+
+
+class Command(BaseCommand):
+    help = 'Import attendance rows from CSV or NDJSON, upserting on (employee, date)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import ('.gz' is decompressed; '-' reads stdin).")
+        parser.add_argument('--format', choices=FORMATS, help='Input format (default: from the file extension, else csv).')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Validate only; write nothing.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format']
+        if not fmt:
+            stem = path[:-3] if path.endswith('.gz') else path
+            fmt = 'ndjson' if stem.endswith(('.ndjson', '.jsonl')) else 'csv'
+
+        if path == '-':
+            stream = sys.stdin
+        else:
+            try:
+                opener = gzip.open if path.endswith('.gz') else open
+                stream = opener(path, 'rt', encoding='utf-8-sig', newline='')
+            except OSError as exc:
+                raise CommandError(str(exc))
+
+        try:
+            summary = import_attendance(
+                iter_records(stream, fmt), chunk_size=options['chunk_size'], dry_run=options['dry_run']
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        for error in summary['errors']:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        if summary['error_count'] > len(summary['errors']):
+            self.stderr.write(f"... and {summary['error_count'] - len(summary['errors'])} more errors")
+        verb = 'Validated' if options['dry_run'] else 'Upserted'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {summary['upserted']} of {summary['processed']} rows ({summary['error_count']} rejected)."
+        ))
@@ -0,0 +1,43 @@
+"""
+Recompute AttendanceMonthlyRollup from the raw Attendance rows.
+
+Rebuilds every month that has attendance or rollup rows (or only the
+months selected with --year/--month), one grouped query per month.
+Migration hr.0018 fills the table on deploy; run this after changing
+ATTENDANCE_LATE_AFTER and after any write that bypassed
+hr.services.attendance_rollup. Safe to run at any time.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from hr.models import Attendance, AttendanceMonthlyRollup
+from hr.services.attendance_rollup import refresh_month
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the monthly attendance rollups from attendance records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Only rebuild this year (default: all years).')
+        parser.add_argument('--month', type=int, help='Only rebuild this month of --year.')
+
+    def handle(self, *args, **options):
+        year, month = options['year'], options['month']
+        if month is not None and (year is None or not 1 <= month <= 12):
+            raise CommandError('--month needs --year and must be between 1 and 12.')
+
+        if month is not None:
+            months = {(year, month)}
+        else:
+            records = Attendance.objects.all()
+            rollups = AttendanceMonthlyRollup.objects.all()
+            if year is not None:
+                records = records.filter(date__year=year)
+                rollups = rollups.filter(year=year)
+            months = set(
+                records.order_by().annotate(y=ExtractYear('date'), m=ExtractMonth('date')).values_list('y', 'm').distinct()
+            )
+            months.update(rollups.order_by().values_list('year', 'month').distinct())
+
+        written = sum(refresh_month(y, m) for y, m in sorted(months))
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} attendance rollups across {len(months)} months.'))
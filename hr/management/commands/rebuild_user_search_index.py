@@ -0,0 +1,31 @@
+"""
+Recreate every UserSearchDocument from the user and department tables.
+
+Migration hr.0019 builds the documents on deploy; run this after bulk
+writes to users or departments that bypassed the model signals (e.g.
+bulk_create).
+The vendor index follows the documents (triggers on SQLite, an expression
+index on PostgreSQL), so nothing else needs rebuilding.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from hr.models import UserSearchDocument
+from hr.services.user_search import refresh_user_documents
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the employee directory search documents'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        user_ids = list(get_user_model().all_objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(user_ids), chunk_size):
+            refresh_user_documents(user_ids[start:start + chunk_size])
+        # Documents of users that no longer exist
+        UserSearchDocument.objects.exclude(user__in=get_user_model().all_objects.all()).delete()
+        count = UserSearchDocument.objects.count()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} users for directory search.'))
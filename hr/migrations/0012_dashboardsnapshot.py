@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0003_rename_hr_complain_type_sta_0b1f6a_idx_hr_complain_type_e19e75_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=50, unique=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('computed_at', models.DateTimeField()),
+                ('invalidated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
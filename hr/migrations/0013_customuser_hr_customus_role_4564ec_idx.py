@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('department', '0005_alter_department_options'),
+        ('hr', '0012_dashboardsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['role', 'department'], name='hr_customus_role_4564ec_idx'),
+        ),
+    ]
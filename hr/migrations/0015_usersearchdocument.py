@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from core.search import index_operations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0014_attendancemonthlyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchDocument',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('document', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        # FTS5 table and triggers on SQLite, a GIN tsvector index on PostgreSQL
+        *index_operations('hr_usersearchdocument', 'user_id'),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+def lowercase_roles(apps, schema_editor):
+    """Store roles in the lowercase form of CustomUser.Role.
+
+    Approver lookups and the users list filter on exact roles (so the
+    (role, department) index from 0013 can be used); rows saved as e.g.
+    'Manager' before that change would otherwise stop matching.
+    """
+    CustomUser = apps.get_model('hr', 'CustomUser')
+    CustomUser.objects.exclude(role=Lower('role')).update(role=Lower('role'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0015_usersearchdocument'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_roles, migrations.RunPython.noop),
+    ]
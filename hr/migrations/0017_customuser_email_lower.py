@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:41
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('department', '0005_alter_department_options'),
+        ('hr', '0016_lowercase_customuser_role'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='hr_customuser_email_lower'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils.dateparse import parse_time
+
+
+def backfill_rollups(apps, schema_editor):
+    """Fill AttendanceMonthlyRollup from existing attendance records.
+
+    Same totals as the rebuild_attendance_rollups command (one grouped
+    query over all months), computed with the historical models so the
+    migration does not depend on later code.
+    """
+    Attendance = apps.get_model('hr', 'Attendance')
+    AttendanceMonthlyRollup = apps.get_model('hr', 'AttendanceMonthlyRollup')
+
+    late_after = parse_time(getattr(settings, 'ATTENDANCE_LATE_AFTER', '09:15'))
+    rows = (
+        Attendance.objects.filter(deleted_at__isnull=True)
+        .order_by()
+        .annotate(y=ExtractYear('date'), m=ExtractMonth('date'))
+        .values('employee_id', 'y', 'm')
+        .annotate(
+            present_days=Count('pk', filter=Q(status='Present')),
+            absent_days=Count('pk', filter=Q(status='Absent')),
+            leave_days=Count('pk', filter=Q(status='Leave')),
+            late_arrivals=Count('pk', filter=Q(status='Present', check_in_time__gt=late_after)),
+            work=Sum('work_duration'),
+        )
+    )
+    rollups = [
+        AttendanceMonthlyRollup(
+            employee_id=row['employee_id'], year=row['y'], month=row['m'],
+            present_days=row['present_days'], absent_days=row['absent_days'], leave_days=row['leave_days'],
+            late_arrivals=row['late_arrivals'],
+            work_seconds=int(row['work'].total_seconds()) if row['work'] else 0,
+        )
+        for row in rows.iterator()
+    ]
+    # Punches since 0014 only incremented their month; recompute everything
+    AttendanceMonthlyRollup.objects.all().delete()
+    AttendanceMonthlyRollup.objects.bulk_create(rollups, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0017_customuser_email_lower'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+from core.search import normalize
+
+
+def backfill_documents(apps, schema_editor):
+    """Build search documents for users created before directory search existed.
+
+    Same documents as hr.services.user_search.document_for; the search
+    index triggers or GIN index pick the rows up as they are inserted.
+    """
+    CustomUser = apps.get_model('hr', 'CustomUser')
+    UserSearchDocument = apps.get_model('hr', 'UserSearchDocument')
+
+    existing = set(UserSearchDocument.objects.values_list('pk', flat=True))
+    users = CustomUser.objects.filter(deleted_at__isnull=True).select_related('department')
+    documents = []
+    for user in users.iterator(chunk_size=1000):
+        if user.pk in existing:
+            continue
+        department = user.department
+        phone_digits = ''.join(ch for ch in user.phone_number or '' if ch.isdigit())
+        documents.append(UserSearchDocument(user_id=user.pk, document=normalize(
+            user.first_name, user.last_name, user.email, user.job_title, user.phone_number, phone_digits,
+            department.name if department else '', department.code if department else '',
+        )))
+    UserSearchDocument.objects.bulk_create(documents, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0018_backfill_attendance_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.utils.translation import gettext_lazy as _
@@ -67,6 +68,12 @@ class CustomUser(AbstractUser, SoftDeleteModel):
     
     class Meta:
         ordering = ['email']
+        indexes = [
+            # Approver lookups filter on role, managers additionally on department
+            models.Index(fields=['role', 'department']),
+            # Case-insensitive email lookups (e.g. the audit log actor filter)
+            models.Index(Lower('email'), name='hr_customuser_email_lower'),
+        ]
 
 
 # ----- Performance Management models (review cycles, competency, reviews, scores) -----
@@ -278,19 +285,57 @@ class Attendance(SoftDeleteModel):
         return f"{self.employee} on {self.date}: {self.status}"
 
     def finalize_duration(self):
+        from .services.attendance import compute_work_duration
         if self.check_in_time and self.check_out_time:
             if not self.work_duration:
-                dt_in = timezone.datetime.combine(self.date, self.check_in_time, tzinfo=timezone.get_current_timezone())
-                dt_out = timezone.datetime.combine(self.date, self.check_out_time, tzinfo=timezone.get_current_timezone())
-                if dt_out < dt_in:
-                    dt_out = dt_out + timezone.timedelta(days=1)
-                self.work_duration = dt_out - dt_in
+                self.work_duration = compute_work_duration(self.date, self.check_in_time, self.check_out_time)
                 self.save(update_fields=["work_duration"])
 
     class Meta:
         constraints = [models.UniqueConstraint(fields=["employee", "date"], name="uniq_attendance_employee_date")]
 
 
+class AttendanceMonthlyRollup(models.Model):
+    """Attendance totals per employee and month, kept in step with Attendance.
+
+    Maintained by hr.services.attendance_rollup and rebuilt with
+    `manage.py rebuild_attendance_rollups`. Month and period analytics read
+    this table instead of scanning Attendance.
+    """
+    employee = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="attendance_rollups")
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    present_days = models.PositiveIntegerField(default=0)
+    absent_days = models.PositiveIntegerField(default=0)
+    leave_days = models.PositiveIntegerField(default=0)
+    late_arrivals = models.PositiveIntegerField(default=0)
+    work_seconds = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.employee} {self.year}-{self.month:02d}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["employee", "year", "month"], name="uniq_attendance_rollup_employee_month")
+        ]
+        indexes = [models.Index(fields=["year", "month"])]
+
+
+class UserSearchDocument(models.Model):
+    """Denormalized searchable text for one user, including the department.
+
+    Kept current by hr.signals and indexed by the vendor search index (see
+    core.search); `manage.py rebuild_user_search_index` recreates every row.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="search_document")
+    document = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Search document for {self.user_id}"
+
+
 class PasswordResetOTP(models.Model):
     email = models.EmailField()
     otp = models.CharField(max_length=6)
@@ -360,3 +405,27 @@ class Complaint(SoftDeleteModel):
     def __str__(self):
         return f"{self.get_type_display()} #{self.pk} - {self.subject}"
 
+
+
+# ----- Dashboard snapshots -----
+
+
+class DashboardSnapshot(models.Model):
+    """Materialized dashboard payload keyed by scope (e.g. 'ceo').
+
+    Rows are rebuilt lazily by hr.services.dashboard. Signal handlers in
+    hr.signals stamp `invalidated_at` whenever a source model changes, so a
+    snapshot is stale when it was invalidated after it was computed.
+    """
+
+    key = models.CharField(max_length=50, unique=True)
+    payload = models.JSONField(default=dict)
+    computed_at = models.DateTimeField()
+    invalidated_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.key} @ {self.computed_at}"
+
+    @property
+    def is_stale(self):
+        return self.invalidated_at is not None and self.invalidated_at >= self.computed_at
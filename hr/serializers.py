@@ -54,6 +54,18 @@ class UserSerializer(serializers.ModelSerializer):
             'department'
         ]
 
+    def __init__(self, *args, **kwargs):
+        # Optional sparse fieldset: only these readable fields are rendered
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in self.readable_field_names() - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def readable_field_names(cls):
+        return {name for name in cls.Meta.fields if name not in ('password', 'department_id')}
+
     def create(self, validated_data):
         return User.objects.create_user(**validated_data)
 
@@ -0,0 +1,115 @@
+"""Attendance helpers shared by the punch endpoints, imports and batch jobs."""
+from datetime import datetime, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, DurationField, ExpressionWrapper, F, Q, TimeField, Value, When
+from django.utils import timezone
+
+
+def compute_work_duration(day, check_in, check_out):
+    """Time worked between two punches on `day`, or None if either is missing.
+
+    A check-out earlier than the check-in is taken to be past midnight;
+    `check_out` applies the same rule in SQL.
+    """
+    if check_in is None or check_out is None:
+        return None
+    duration = datetime.combine(day, check_out) - datetime.combine(day, check_in)
+    if duration < timedelta(0):
+        duration += timedelta(days=1)
+    return duration
+
+
+class PunchError(Exception):
+    """A punch that cannot be recorded; `extra` is merged into the 400 response."""
+
+    def __init__(self, detail, **extra):
+        super().__init__(detail)
+        self.detail = detail
+        self.extra = extra
+
+
+def _hours(duration):
+    return round(duration.total_seconds() / 3600, 2) if duration else None
+
+
+def check_in(user, at=None):
+    """Record `user`'s check-in for the day of `at` (default: now) and return the time.
+
+    The common case, the first punch of the day, is a single INSERT. If a
+    row already exists (created by HR, an import or reset-today, or
+    soft-deleted) a conditional UPDATE claims it only while it has no
+    check-in, so concurrent double-clicks record exactly one punch. The
+    month's AttendanceMonthlyRollup is updated in the same transaction.
+    """
+    from hr.models import Attendance
+    from hr.services.attendance_rollup import record_check_in, refresh_rollups
+    from hr.services.dashboard_cache import invalidate_dashboards
+    from hr.signals import mark_dashboards_stale
+
+    at = timezone.localtime(at)
+    day, punched = at.date(), at.time()
+    try:
+        with transaction.atomic():
+            Attendance.objects.bulk_create([
+                Attendance(employee=user, date=day, status='Present', check_in_time=punched)
+            ])
+            record_check_in(user.pk, day, punched)
+        # Dashboards show this month's rollup; the CEO snapshot does not
+        invalidate_dashboards(user_ids={user.pk}, department_ids={user.department_id})
+        return punched
+    except IntegrityError:
+        pass
+
+    with transaction.atomic():
+        claimed = Attendance.all_objects.filter(employee=user, date=day).filter(
+            Q(check_in_time__isnull=True) | Q(deleted_at__isnull=False)
+        ).update(
+            check_in_time=punched, check_out_time=None, work_duration=None, status='Present', deleted_at=None,
+        )
+        if claimed:
+            # The claimed row may have been counted as absent or leave
+            refresh_rollups({(user.pk, day)})
+    if not claimed:
+        existing = Attendance.objects.filter(employee=user, date=day).values_list('check_in_time', flat=True).first()
+        raise PunchError('Already checked in.', check_in_time=existing)
+    mark_dashboards_stale(user_ids={user.pk}, department_ids={user.department_id})
+    return punched
+
+
+def check_out(user, at=None):
+    """Record `user`'s check-out for the day of `at`; return (time, total hours).
+
+    One conditional UPDATE sets the check-out and computes work_duration in
+    SQL (with the overnight rule of `compute_work_duration`), succeeding
+    only for a checked-in, not yet checked-out row; a second read returns
+    the stored duration, which is added to the rollup.
+    """
+    from hr.models import Attendance
+    from hr.services.attendance_rollup import record_check_out
+    from hr.services.dashboard_cache import invalidate_dashboards
+
+    at = timezone.localtime(at)
+    day, punched = at.date(), at.time()
+    rows = Attendance.objects.filter(employee=user, date=day)
+    elapsed = ExpressionWrapper(Value(punched, output_field=TimeField()) - F('check_in_time'), output_field=DurationField())
+    with transaction.atomic():
+        updated = rows.filter(check_in_time__isnull=False, check_out_time__isnull=True).update(
+            check_out_time=punched,
+            work_duration=Case(
+                When(check_in_time__gt=punched, then=elapsed + Value(timedelta(days=1))),
+                default=elapsed,
+                output_field=DurationField(),
+            ),
+        )
+        record = rows.values('check_in_time', 'check_out_time', 'work_duration').first()
+        if updated:
+            record_check_out(user.pk, day, record['work_duration'])
+    if updated:
+        invalidate_dashboards(user_ids={user.pk}, department_ids={user.department_id})
+        return punched, _hours(record['work_duration'])
+    if record is None:
+        raise PunchError('No check-in found for today.')
+    if record['check_in_time'] is None:
+        raise PunchError('Cannot check-out without check-in.')
+    raise PunchError('Already checked out.', check_out_time=record['check_out_time'], total_hours=_hours(record['work_duration']))
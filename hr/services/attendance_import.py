@@ -0,0 +1,176 @@
+"""Bulk attendance import shared by `import_attendance` and POST /api/attendance/bulk/.
+
+Records are read lazily from CSV or NDJSON and handled in chunks: each
+chunk resolves its employees with one query, validates every record,
+computes work_duration in Python and upserts the valid rows with a single
+bulk_create(update_conflicts=True) on the (employee, date) unique
+constraint. Memory use is bounded by the chunk size, not the file size.
+
+Accepted fields: `employee` (user id) or `employee_email`, `date`
+(YYYY-MM-DD), optional `status` (Present/Absent/Leave, default Present),
+`check_in_time` and `check_out_time` (HH:MM[:SS]). An existing row for the
+same employee and day is overwritten, including soft-deleted ones.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils.dateparse import parse_date, parse_time
+
+from hr.models import Attendance
+from .attendance import compute_work_duration
+
+STATUSES = {value for value, _ in Attendance._meta.get_field('status').choices}
+UPSERT_FIELDS = ['status', 'check_in_time', 'check_out_time', 'work_duration', 'deleted_at']
+MAX_REPORTED_ERRORS = 100
+FORMATS = ('csv', 'ndjson')
+
+
+def iter_records(stream, fmt):
+    """Yield (line_number, dict) pairs from a text stream."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_number, record if isinstance(record, dict) else {'__error__': 'Invalid JSON object.'}
+
+
+def _text(record, field):
+    value = record.get(field)
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def _parse_time(record, field):
+    """Return (time or None, ok) for an optional HH:MM[:SS] field."""
+    raw = _text(record, field)
+    if not raw:
+        return None, True
+    try:
+        value = parse_time(raw)
+    except ValueError:
+        value = None
+    return value, value is not None
+
+
+def _parse(record, ids_by_email, departments):
+    """Return (Attendance, None) for a valid record or (None, error message)."""
+    if '__error__' in record:
+        return None, record['__error__']
+    email = _text(record, 'employee_email').lower()
+    employee_ref = _text(record, 'employee')
+    if email:
+        employee_id = ids_by_email.get(email)
+    elif employee_ref.isdigit():
+        employee_id = int(employee_ref) if int(employee_ref) in departments else None
+    else:
+        return None, 'employee or employee_email is required.'
+    if employee_id is None:
+        return None, f'Unknown employee {email or employee_ref}.'
+
+    try:
+        day = parse_date(_text(record, 'date'))
+    except ValueError:
+        day = None
+    if day is None:
+        return None, 'date must be YYYY-MM-DD.'
+    check_in, in_ok = _parse_time(record, 'check_in_time')
+    check_out, out_ok = _parse_time(record, 'check_out_time')
+    if not (in_ok and out_ok):
+        return None, 'check_in_time/check_out_time must be HH:MM[:SS].'
+    if check_out is not None and check_in is None:
+        return None, 'check_out_time requires check_in_time.'
+    status = _text(record, 'status').capitalize() or 'Present'
+    if status not in STATUSES:
+        return None, f'status must be one of {", ".join(sorted(STATUSES))}.'
+
+    return Attendance(
+        employee_id=employee_id, date=day, status=status,
+        check_in_time=check_in, check_out_time=check_out,
+        work_duration=compute_work_duration(day, check_in, check_out),
+        deleted_at=None,
+    ), None
+
+
+def _resolve_employees(records):
+    """Look up a chunk's employees in one query.
+
+    Returns ({lowercased email: id}, {id: department_id}) for active,
+    non-deleted users referenced by id or email.
+    """
+    ids, emails = set(), set()
+    for _, record in records:
+        email = _text(record, 'employee_email').lower()
+        if email:
+            emails.add(email)
+        elif _text(record, 'employee').isdigit():
+            ids.add(int(_text(record, 'employee')))
+    users = (
+        get_user_model().all_objects.filter(deleted_at__isnull=True)
+        .annotate(email_lower=Lower('email'))
+        .filter(Q(pk__in=ids) | Q(email_lower__in=emails))
+        .values_list('pk', 'email_lower', 'department_id')
+    )
+    ids_by_email, departments = {}, {}
+    for pk, email, department_id in users:
+        ids_by_email[email] = pk
+        departments[pk] = department_id
+    return ids_by_email, departments
+
+
+def import_attendance(records, chunk_size=1000, dry_run=False):
+    """Validate and upsert (line_number, record) pairs; return a summary dict.
+
+    Invalid records are skipped and reported; each chunk of valid rows is
+    written in its own transaction. Within a chunk the last record for an
+    employee and day wins.
+    """
+    from hr.services.attendance_rollup import refresh_rollups
+    from hr.signals import mark_dashboards_stale
+
+    summary = {'processed': 0, 'upserted': 0, 'error_count': 0, 'errors': []}
+    user_ids, department_ids = set(), set()
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        ids_by_email, departments = _resolve_employees(chunk)
+        rows = {}
+        for line_number, record in chunk:
+            summary['processed'] += 1
+            row, error = _parse(record, ids_by_email, departments)
+            if error:
+                summary['error_count'] += 1
+                if len(summary['errors']) < MAX_REPORTED_ERRORS:
+                    summary['errors'].append({'line': line_number, 'error': error})
+                continue
+            rows[(row.employee_id, row.date)] = row
+            user_ids.add(row.employee_id)
+            department_ids.add(departments[row.employee_id])
+        if rows and not dry_run:
+            with transaction.atomic():
+                Attendance.all_objects.bulk_create(
+                    rows.values(), batch_size=chunk_size,
+                    update_conflicts=True, unique_fields=['employee', 'date'], update_fields=UPSERT_FIELDS,
+                )
+                refresh_rollups(rows)
+        summary['upserted'] += len(rows)
+
+    if user_ids and not dry_run:
+        # bulk_create sends no model signals
+        mark_dashboards_stale(user_ids=user_ids, department_ids=department_ids)
+    return summary
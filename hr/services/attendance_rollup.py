@@ -0,0 +1,102 @@
+"""Per-employee monthly attendance totals (AttendanceMonthlyRollup).
+
+Punches adjust their month's row with F() increments (`record_check_in`,
+`record_check_out`). Every other write to Attendance recomputes the
+affected (employee, month) rows from the raw table with `refresh_rollups`:
+model saves and deletes through hr.signals, bulk writes by calling it
+directly. `rebuild_attendance_rollups` recomputes whole months.
+"""
+from collections import defaultdict
+from datetime import date
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils.dateparse import parse_time
+
+from hr.models import Attendance, AttendanceMonthlyRollup
+
+COUNTERS = ('present_days', 'absent_days', 'leave_days', 'late_arrivals', 'work_seconds')
+
+
+def late_after():
+    """Check-ins after this time of day count as late arrivals."""
+    return parse_time(getattr(settings, 'ATTENDANCE_LATE_AFTER', '09:15'))
+
+
+def month_bounds(year, month):
+    """Return the first day of the month and of the month after."""
+    return date(year, month, 1), date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+
+
+def _aggregates():
+    return {
+        'present_days': Count('pk', filter=Q(status='Present')),
+        'absent_days': Count('pk', filter=Q(status='Absent')),
+        'leave_days': Count('pk', filter=Q(status='Leave')),
+        'late_arrivals': Count('pk', filter=Q(status='Present', check_in_time__gt=late_after())),
+        'work': Sum('work_duration'),
+    }
+
+
+def refresh_month(year, month, employee_ids=None):
+    """Recompute the rollups of one month from Attendance; return rows written.
+
+    With `employee_ids` only those employees are recomputed, otherwise the
+    whole month is. Rollups left without any attendance rows are removed.
+    """
+    start, end = month_bounds(year, month)
+    rows = Attendance.objects.filter(date__gte=start, date__lt=end)
+    rollups = AttendanceMonthlyRollup.objects.filter(year=year, month=month)
+    if employee_ids is not None:
+        rows = rows.filter(employee_id__in=employee_ids)
+        rollups = rollups.filter(employee_id__in=employee_ids)
+
+    fresh = [
+        AttendanceMonthlyRollup(
+            employee_id=row['employee_id'], year=year, month=month,
+            present_days=row['present_days'], absent_days=row['absent_days'], leave_days=row['leave_days'],
+            late_arrivals=row['late_arrivals'],
+            work_seconds=int(row['work'].total_seconds()) if row['work'] else 0,
+        )
+        for row in rows.order_by().values('employee_id').annotate(**_aggregates())
+    ]
+    with transaction.atomic():
+        rollups.exclude(employee_id__in=[r.employee_id for r in fresh]).delete()
+        AttendanceMonthlyRollup.objects.bulk_create(
+            fresh, batch_size=1000,
+            update_conflicts=True, unique_fields=['employee', 'year', 'month'], update_fields=[*COUNTERS, 'updated_at'],
+        )
+    return len(fresh)
+
+
+def refresh_rollups(keys):
+    """Recompute the rollups touched by (employee_id, date) pairs."""
+    by_month = defaultdict(set)
+    for employee_id, day in keys:
+        by_month[(day.year, day.month)].add(employee_id)
+    for (year, month), employee_ids in by_month.items():
+        refresh_month(year, month, employee_ids)
+
+
+def _increment(employee_id, day, **deltas):
+    rollup = AttendanceMonthlyRollup.objects.filter(employee_id=employee_id, year=day.year, month=day.month)
+    changes = {field: F(field) + value for field, value in deltas.items() if value}
+    if not changes or rollup.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            AttendanceMonthlyRollup.objects.create(employee_id=employee_id, year=day.year, month=day.month, **deltas)
+    except IntegrityError:
+        # Another punch created the row first
+        rollup.update(**changes)
+
+
+def record_check_in(employee_id, day, check_in_time):
+    """Count a newly inserted Present row."""
+    _increment(employee_id, day, present_days=1, late_arrivals=int(check_in_time > late_after()))
+
+
+def record_check_out(employee_id, day, work_duration):
+    """Add a closed shift's duration."""
+    _increment(employee_id, day, work_seconds=int(work_duration.total_seconds()) if work_duration else 0)
@@ -1,48 +1,119 @@
+from django.conf import settings
 from django.utils import timezone
 from django.db import models
+from django.db.models import Avg, Count, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 from department.models import Department
-from leave.models import LeaveRequest
-from hr.models import PerformanceReview, Attendance
+from leave.models import LeaveBalance, LeaveRequest
+from hr.models import PerformanceReview, Attendance, AttendanceMonthlyRollup, DashboardSnapshot
+
+
+def _scalar(queryset, group_by, aggregate):
+    """Wrap an aggregate over `queryset` as a scalar subquery.
+
+    `queryset` is expected to be filtered on `group_by` against an OuterRef,
+    so grouping by that field collapses the subquery to a single row.
+    """
+    return Subquery(queryset.order_by().values(group_by).annotate(value=aggregate).values('value')[:1])
+
+
+def _count(queryset, group_by):
+    return Coalesce(_scalar(queryset, group_by, Count('pk')), 0)
 
 
 def employee_dashboard(user):
+    """Personal metrics for an employee, evaluated as a single SELECT."""
     data = {}
-    approved_leaves = LeaveRequest.objects.filter(employee=user, status=LeaveRequest.Status.APPROVED)
-    total_days = sum((l.end_date - l.start_date).days + 1 for l in approved_leaves)
-    data['my_leave_days_used'] = total_days
-    pending_requests = LeaveRequest.objects.filter(employee=user, status=LeaveRequest.Status.PENDING).count()
-    data['my_pending_requests'] = pending_requests
-    next_review = PerformanceReview.objects.filter(employee=user, created_at__gt=timezone.now()).order_by('created_at').first()
-    data['days_until_next_review'] = (next_review.created_at.date() - timezone.now().date()).days if next_review else None
     User = get_user_model()
-    team_size = User.objects.filter(department=user.department, role=User.Role.EMPLOYEE).count() if user.department else 0
-    data['my_team_size'] = team_size
+    now = timezone.now()
+    today = timezone.localdate()
+    me = OuterRef('pk')
+    # Approved days across all years, from the per-year LeaveBalance totals
+    ledger = LeaveBalance.objects.filter(user=me, leave_type__isnull=True)
+    this_month = AttendanceMonthlyRollup.objects.filter(employee=me, year=today.year, month=today.month)
+    row = (
+        User.objects.filter(pk=user.pk)
+        .annotate(
+            leave_days_used=_scalar(ledger, 'user', Sum('used')),
+            pending_count=_count(LeaveRequest.objects.filter(employee=me, status=LeaveRequest.Status.PENDING), 'employee'),
+            next_review_at=Subquery(
+                PerformanceReview.objects.filter(employee=me, created_at__gt=now).order_by('created_at').values('created_at')[:1]
+            ),
+            team_size=_count(User.objects.filter(department=OuterRef('department'), role=User.Role.EMPLOYEE), 'department'),
+            days_present=_scalar(this_month, 'employee', Sum('present_days')),
+            late_arrivals=_scalar(this_month, 'employee', Sum('late_arrivals')),
+            work_seconds=_scalar(this_month, 'employee', Sum('work_seconds')),
+        )
+        .values('leave_days_used', 'pending_count', 'next_review_at', 'team_size', 'days_present', 'late_arrivals', 'work_seconds')
+        .get()
+    )
+    data['my_leave_days_used'] = float(row['leave_days_used'] or 0)
+    data['my_pending_requests'] = row['pending_count']
+    next_review_at = row['next_review_at']
+    data['days_until_next_review'] = (next_review_at.date() - now.date()).days if next_review_at else None
+    data['my_team_size'] = row['team_size']
+    data['my_days_present_this_month'] = row['days_present'] or 0
+    data['my_late_arrivals_this_month'] = row['late_arrivals'] or 0
+    data['my_hours_this_month'] = round((row['work_seconds'] or 0) / 3600, 2)
     return data
 
 
 def manager_dashboard(user):
+    """Department metrics for a manager, evaluated as a single SELECT."""
     data = {}
     User = get_user_model()
     today = timezone.localdate()
-    team_size = User.objects.filter(department=user.department, role=User.Role.EMPLOYEE).count() if user.department else 0
-    data['my_team_size'] = team_size
-    on_leave = Attendance.objects.filter(employee__department=user.department, status='Leave', date=today).count() if user.department else 0
-    data['employees_on_leave'] = on_leave
-    pending = LeaveRequest.objects.filter(employee__department=user.department, status=LeaveRequest.Status.PENDING).count() if user.department else 0
-    data['pending_leave_requests'] = pending
     first_of_month = today.replace(day=1)
-    new_hires = User.objects.filter(department=user.department, date_joined__gte=first_of_month).count() if user.department else 0
-    data['new_hires_this_month'] = new_hires
-    from django.db.models import Avg
-    avg_score = PerformanceReview.objects.filter(employee__department=user.department).aggregate(avg=Avg('overall_score'))['avg'] or 0
-    data['team_avg_performance_score'] = round(avg_score, 2)
-    reviews_month = PerformanceReview.objects.filter(employee__department=user.department, created_at__gte=first_of_month).count() if user.department else 0
-    data['performance_reviews_this_month'] = reviews_month
+    keys = (
+        'my_team_size', 'employees_on_leave', 'pending_leave_requests', 'new_hires_this_month',
+        'team_avg_performance_score', 'performance_reviews_this_month',
+        'team_late_arrivals_this_month', 'team_hours_this_month',
+    )
+    if not user.department_id:
+        return dict.fromkeys(keys, 0)
+
+    dept = OuterRef('department')
+    reviews = PerformanceReview.objects.filter(employee__department=dept)
+    rollups = AttendanceMonthlyRollup.objects.filter(employee__department=dept, year=today.year, month=today.month)
+    row = (
+        User.objects.filter(pk=user.pk)
+        .annotate(
+            my_team_size=_count(User.objects.filter(department=dept, role=User.Role.EMPLOYEE), 'department'),
+            employees_on_leave=_count(
+                Attendance.objects.filter(employee__department=dept, status='Leave', date=today), 'employee__department'
+            ),
+            pending_leave_requests=_count(
+                LeaveRequest.objects.filter(employee__department=dept, status=LeaveRequest.Status.PENDING), 'employee__department'
+            ),
+            new_hires_this_month=_count(User.objects.filter(department=dept, date_joined__date__gte=first_of_month), 'department'),
+            team_avg_performance_score=_scalar(reviews, 'employee__department', Avg('overall_score')),
+            performance_reviews_this_month=_count(reviews.filter(created_at__date__gte=first_of_month), 'employee__department'),
+            team_late_arrivals_this_month=Coalesce(_scalar(rollups, 'employee__department', Sum('late_arrivals')), 0),
+            team_hours_this_month=_scalar(rollups, 'employee__department', Sum('work_seconds')),
+        )
+        .values(*keys)
+        .get()
+    )
+    data.update(row)
+    data['team_avg_performance_score'] = round(float(row['team_avg_performance_score'] or 0), 2)
+    data['team_hours_this_month'] = round((row['team_hours_this_month'] or 0) / 3600, 2)
     return data
 
 
-def ceo_dashboard(user):
+CEO_SNAPSHOT_KEY = 'ceo'
+
+
+def _years_ago(today, years):
+    """Return the date `years` before `today` (Feb 29 falls back to Feb 28)."""
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:
+        return today.replace(year=today.year - years, day=28)
+
+
+def compute_ceo_dashboard():
+    """Aggregate company-wide metrics with a fixed number of queries."""
     data = {}
     User = get_user_model()
     today = timezone.localdate()
@@ -51,27 +122,40 @@ def ceo_dashboard(user):
     from datetime import timedelta
     last_30 = now - timedelta(days=30)
 
-    total_users = User.objects.filter(deleted_at__isnull=True).count()
-    employees = User.objects.filter(role=User.Role.EMPLOYEE).count()
-    managers = User.objects.filter(role=User.Role.MANAGER).count()
-    hr_count = User.objects.filter(role=User.Role.HR).count()
+    # Headcount, hires, attrition and age buckets in one pass over the user table.
+    # Age < N is equivalent to a date of birth after the date N years ago.
+    cutoffs = {n: _years_ago(today, n) for n in (25, 35, 45, 55)}
+    totals = User.all_objects.aggregate(
+        total_active_users=Count('pk', filter=Q(deleted_at__isnull=True)),
+        employees=Count('pk', filter=Q(role=User.Role.EMPLOYEE)),
+        managers=Count('pk', filter=Q(role=User.Role.MANAGER)),
+        hr=Count('pk', filter=Q(role=User.Role.HR)),
+        hires_this_month=Count('pk', filter=Q(date_joined__date__gte=first_of_month)),
+        deleted_last_30=Count('pk', filter=Q(deleted_at__gte=last_30)),
+        age_lt_25=Count('pk', filter=Q(date_of_birth__gt=cutoffs[25])),
+        age_lt_35=Count('pk', filter=Q(date_of_birth__gt=cutoffs[35])),
+        age_lt_45=Count('pk', filter=Q(date_of_birth__gt=cutoffs[45])),
+        age_lt_55=Count('pk', filter=Q(date_of_birth__gt=cutoffs[55])),
+        age_known=Count('pk', filter=Q(date_of_birth__isnull=False)),
+    )
+
+    total_users = totals['total_active_users']
     data['headcount'] = {
         'total_active_users': total_users,
-        'employees': employees,
-        'managers': managers,
-        'hr': hr_count,
+        'employees': totals['employees'],
+        'managers': totals['managers'],
+        'hr': totals['hr'],
     }
 
-    dept_counts = []
-    for dept in Department.objects.all():
-        emp_count = User.objects.filter(department=dept, deleted_at__isnull=True).count()
-        dept_counts.append({'id': dept.id, 'name': dept.name, 'emp_count': emp_count})
-    data['departments'] = dept_counts
+    data['departments'] = list(
+        Department.objects
+        .annotate(emp_count=Count('custom_users', filter=Q(custom_users__deleted_at__isnull=True)))
+        .values('id', 'name', 'emp_count')
+    )
 
-    hires_this_month = User.objects.filter(date_joined__date__gte=first_of_month).count()
-    data['hires_this_month'] = hires_this_month
+    data['hires_this_month'] = totals['hires_this_month']
 
-    deleted_last_30 = User.all_objects.filter(deleted_at__gte=last_30).count()
+    deleted_last_30 = totals['deleted_last_30']
     previous_period_baseline = total_users + deleted_last_30 if (total_users + deleted_last_30) else 1
     attrition_rate = deleted_last_30 / previous_period_baseline
     data['attrition_last_30_days'] = {
@@ -79,50 +163,83 @@ def ceo_dashboard(user):
         'rate': round(attrition_rate, 4)
     }
 
-    pending_leave = LeaveRequest.objects.pending().count()
-    approved_leave_today = LeaveRequest.objects.approved().filter(start_date__lte=today, end_date__gte=today).count()
-    data['leave'] = {
-        'pending_requests': pending_leave,
-        'employees_on_approved_leave_today': approved_leave_today,
-    }
+    leave = LeaveRequest.objects.aggregate(
+        pending_requests=Count('pk', filter=Q(status=LeaveRequest.Status.PENDING)),
+        employees_on_approved_leave_today=Count('pk', filter=Q(
+            status=LeaveRequest.Status.APPROVED, start_date__lte=today, end_date__gte=today,
+        )),
+    )
+    data['leave'] = leave
 
-    from django.db.models import Avg, Max
     perf_qs = PerformanceReview.objects.all()
-    avg_score = perf_qs.aggregate(avg=Avg('overall_score'))['avg'] or 0
-    reviews_this_month = perf_qs.filter(created_at__date__gte=first_of_month).count()
+    perf = perf_qs.aggregate(
+        avg=Avg('overall_score'),
+        reviews_this_month=Count('pk', filter=Q(created_at__date__gte=first_of_month)),
+    )
     top_performers = (
         perf_qs.values('employee__id', 'employee__first_name', 'employee__last_name')
         .annotate(max_score=Max('overall_score'))
         .order_by('-max_score')[:5]
     )
     data['performance'] = {
-        'average_score': round(avg_score, 2),
-        'reviews_this_month': reviews_this_month,
-        'top_performers': list(top_performers),
+        'average_score': round(float(perf['avg'] or 0), 2),
+        'reviews_this_month': perf['reviews_this_month'],
+        'top_performers': [
+            {**row, 'max_score': float(row['max_score']) if row['max_score'] is not None else None}
+            for row in top_performers
+        ],
     }
 
-    # Age distribution
-    ages = []
-    for dob in User.objects.filter(date_of_birth__isnull=False).values_list('date_of_birth', flat=True):
-        age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
-        ages.append(age)
-    buckets = {'<25':0,'25-34':0,'35-44':0,'45-54':0,'55+':0}
-    for a in ages:
-        if a < 25:
-            buckets['<25'] += 1
-        elif a < 35:
-            buckets['25-34'] += 1
-        elif a < 45:
-            buckets['35-44'] += 1
-        elif a < 55:
-            buckets['45-54'] += 1
-        else:
-            buckets['55+'] += 1
-    data['age_distribution'] = buckets
+    # Age distribution: buckets are differences of the cumulative "younger than" counts
+    data['age_distribution'] = {
+        '<25': totals['age_lt_25'],
+        '25-34': totals['age_lt_35'] - totals['age_lt_25'],
+        '35-44': totals['age_lt_45'] - totals['age_lt_35'],
+        '45-54': totals['age_lt_55'] - totals['age_lt_45'],
+        '55+': totals['age_known'] - totals['age_lt_55'],
+    }
 
     return data
 
 
+def _snapshot_needs_refresh(snapshot):
+    age = (timezone.now() - snapshot.computed_at).total_seconds()
+    if age >= getattr(settings, 'DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS', 300):
+        return True
+    return snapshot.is_stale and age >= getattr(settings, 'DASHBOARD_SNAPSHOT_REFRESH_SECONDS', 30)
+
+
+def refresh_ceo_snapshot():
+    """Recompute the company-wide payload and store it as the CEO snapshot."""
+    # Stamp before computing so writes that land mid-computation keep the row stale
+    computed_at = timezone.now()
+    payload = compute_ceo_dashboard()
+    snapshot, _ = DashboardSnapshot.objects.update_or_create(
+        key=CEO_SNAPSHOT_KEY,
+        defaults={'payload': payload, 'computed_at': computed_at},
+    )
+    return snapshot
+
+
+def ceo_snapshot():
+    """Return the CEO snapshot, rebuilding it first if it is due for refresh.
+
+    Staleness bound: a write to a source model (see hr.signals) is reflected
+    within DASHBOARD_SNAPSHOT_REFRESH_SECONDS of the next read; time-derived
+    metrics (month-to-date, leave today, ages) within
+    DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS.
+    """
+    snapshot = DashboardSnapshot.objects.filter(key=CEO_SNAPSHOT_KEY).first()
+    if snapshot is None or _snapshot_needs_refresh(snapshot):
+        snapshot = refresh_ceo_snapshot()
+    return snapshot
+
+
+def ceo_dashboard(user):
+    """Company-wide dashboard served from the materialized snapshot."""
+    return ceo_snapshot().payload
+
+
 def build_dashboard(user):
     role = getattr(user, 'role', None)
     if role == getattr(user.__class__, 'Role').EMPLOYEE:
@@ -0,0 +1,134 @@
+"""Cache layer for the dashboard payload returned by /api/auth/me/.
+
+Entries live in the 'dashboard' cache alias and are keyed by scope:
+CEO/HR share the company entry, managers share one entry per department and
+employees get a personal entry. Department and user entries embed a version
+number; hr.signals bumps the versions (and drops the company entry) when a
+model the dashboards read is written.
+
+Invalidation only reaches processes that share the cache backend. The
+default locmem backend is private to each process, so with several
+gunicorn workers a worker keeps serving its own entry, for up to
+DASHBOARD_CACHE_TIMEOUT, after another worker handled the write. Use a
+shared backend ('db' or 'file') in production.
+
+Hit/miss counters cost one extra cache write per read; set
+DASHBOARD_CACHE_STATS to False to skip them.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from .dashboard import build_dashboard, ceo_snapshot
+
+CACHE_ALIAS = 'dashboard'
+COMPANY_KEY = 'dashboard:company'
+STATS_KEYS = {'hits': 'dashboard:stats:hits', 'misses': 'dashboard:stats:misses'}
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _timeout():
+    return getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+
+
+def _version(kind, obj_id):
+    """Current version for a department or user scope.
+
+    Missing versions are seeded from the clock rather than 0 so an evicted
+    version key can never resurrect an entry written under an older version.
+    """
+    key = f'dashboard:version:{kind}:{obj_id}'
+    version = _cache().get(key)
+    if version is None:
+        version = time.time_ns()
+        if not _cache().add(key, version, timeout=None):
+            version = _cache().get(key, version)
+    return version
+
+
+def _bump(kind, obj_id):
+    key = f'dashboard:version:{kind}:{obj_id}'
+    try:
+        _cache().incr(key)
+    except ValueError:
+        _cache().set(key, time.time_ns(), timeout=None)
+
+
+def _record(outcome):
+    if not getattr(settings, 'DASHBOARD_CACHE_STATS', True):
+        return
+    key = STATS_KEYS[outcome]
+    try:
+        _cache().incr(key)
+    except ValueError:
+        if not _cache().add(key, 1, timeout=None):
+            _cache().incr(key)
+
+
+def dashboard_cache_key(user):
+    """Return the cache key for `user`'s dashboard, or COMPANY_KEY for CEO/HR."""
+    Role = user.__class__.Role
+    if user.role == Role.MANAGER:
+        return f'dashboard:dept:{user.department_id}:v{_version("dept", user.department_id)}'
+    if user.role == Role.EMPLOYEE:
+        return (
+            f'dashboard:user:{user.pk}'
+            f':v{_version("user", user.pk)}:d{_version("dept", user.department_id)}'
+        )
+    return COMPANY_KEY
+
+
+def get_dashboard(user):
+    """Return `user`'s dashboard payload, building and caching it on a miss."""
+    key = dashboard_cache_key(user)
+    payload = _cache().get(key)
+    if payload is not None:
+        _record('hits')
+        return payload
+    _record('misses')
+
+    if key != COMPANY_KEY:
+        payload = build_dashboard(user)
+        _cache().set(key, payload, _timeout())
+        return payload
+
+    # Only cache a fresh snapshot, and never past its max age, so the cache
+    # does not extend the snapshot's own staleness bound.
+    snapshot = ceo_snapshot()
+    if not snapshot.is_stale:
+        age = (timezone.now() - snapshot.computed_at).total_seconds()
+        remaining = getattr(settings, 'DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS', 300) - age
+        if remaining >= 1:
+            _cache().set(key, snapshot.payload, min(_timeout(), int(remaining)))
+    return snapshot.payload
+
+
+def invalidate_dashboards(user_ids=(), department_ids=()):
+    """Drop cached payloads that depend on the given users and departments."""
+    _cache().delete(COMPANY_KEY)
+    for user_id in set(user_ids) - {None}:
+        _bump('user', user_id)
+    for department_id in set(department_ids):
+        _bump('dept', department_id)
+
+
+def dashboard_cache_stats():
+    """Hit/miss counters; None while DASHBOARD_CACHE_STATS is off."""
+    backend = settings.CACHES[CACHE_ALIAS]['BACKEND']
+    if not getattr(settings, 'DASHBOARD_CACHE_STATS', True):
+        return {'backend': backend, 'hits': None, 'misses': None, 'hit_rate': None}
+    values = _cache().get_many(list(STATS_KEYS.values()))
+    hits = values.get(STATS_KEYS['hits'], 0)
+    misses = values.get(STATS_KEYS['misses'], 0)
+    total = hits + misses
+    return {
+        'backend': backend,
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+    }
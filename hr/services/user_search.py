@@ -0,0 +1,36 @@
+"""Employee directory search (UserSearchDocument + core.search)."""
+from django.contrib.auth import get_user_model
+
+from core.search import normalize, search
+from hr.models import UserSearchDocument
+
+
+def document_for(user):
+    department = user.department
+    phone_digits = ''.join(ch for ch in user.phone_number or '' if ch.isdigit())
+    return normalize(
+        user.first_name, user.last_name, user.email, user.job_title, user.phone_number, phone_digits,
+        department.name if department else '', department.code if department else '',
+    )
+
+
+def refresh_user_documents(user_ids):
+    """Rewrite the search documents of `user_ids`; soft-deleted users are dropped."""
+    user_ids = set(user_ids) - {None}
+    if not user_ids:
+        return
+    users = list(
+        get_user_model().all_objects.filter(pk__in=user_ids, deleted_at__isnull=True).select_related('department')
+    )
+    UserSearchDocument.objects.filter(pk__in=user_ids - {u.pk for u in users}).delete()
+    UserSearchDocument.objects.bulk_create(
+        [UserSearchDocument(user=user, document=document_for(user)) for user in users], batch_size=1000,
+        update_conflicts=True, unique_fields=['user'], update_fields=['document', 'updated_at'],
+    )
+
+
+def search_users(text, queryset, limit=20):
+    """Users from `queryset` matching `text` by prefix, best match first."""
+    ids = search(UserSearchDocument, text, limit=limit, queryset=queryset)
+    users = queryset.in_bulk(ids)
+    return [users[pk] for pk in ids if pk in users]
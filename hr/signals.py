@@ -1,9 +1,116 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.db.models import F, Q
 from django.dispatch import receiver
-from .models import CustomUser
+from django.utils import timezone
+from department.models import Department
+from leave.models import LeaveRequest
+from .models import CustomUser, PerformanceReview, Attendance, DashboardSnapshot
+from .services.attendance_rollup import refresh_rollups
+from .services.dashboard_cache import invalidate_dashboards
+from .services.user_search import refresh_user_documents
 
 @receiver(post_save, sender=CustomUser)
 def sync_employee_role(sender, instance, **kwargs):
     if instance.role == 'employee':
         # Perform any additional logic for employees if needed
         pass
+
+
+# Saves that only touch these fields (e.g. last_login on every sign-in) do not
+# change anything derived from users and are ignored by the handlers below.
+TRIVIAL_USER_FIELDS = {'last_login', 'password'}
+
+
+def is_trivial_user_save(update_fields):
+    return bool(update_fields) and set(update_fields) <= TRIVIAL_USER_FIELDS
+
+
+@receiver(pre_save, sender=CustomUser)
+def remember_previous_scope(sender, instance, update_fields=None, **kwargs):
+    """Keep the stored (role, department_id) so handlers can see what moved."""
+    instance._previous_scope = None
+    if instance.pk and not is_trivial_user_save(update_fields):
+        instance._previous_scope = (
+            CustomUser.all_objects.filter(pk=instance.pk).values_list('role', 'department_id').first()
+        )
+
+
+# Models the dashboards are derived from. Any write flags the materialized
+# snapshots stale and drops the cached payloads of the affected scopes.
+DASHBOARD_SOURCE_MODELS = (CustomUser, Department, LeaveRequest, PerformanceReview, Attendance)
+
+
+def _dashboard_scopes(instance):
+    """Return (user_ids, department_ids) whose dashboards read `instance`."""
+    if isinstance(instance, Department):
+        return (), ()
+    if isinstance(instance, CustomUser):
+        department_ids = {instance.department_id}
+        previous = getattr(instance, '_previous_scope', None)
+        if previous:
+            department_ids.add(previous[1])
+        return {instance.pk}, department_ids
+    try:
+        department_id = instance.employee.department_id
+    except CustomUser.DoesNotExist:
+        # The employee row is already gone (cascade delete)
+        department_id = None
+    return {instance.employee_id}, {department_id}
+
+
+def mark_dashboards_stale(user_ids=(), department_ids=()):
+    """Flag the snapshots stale and drop the cached payloads of the given scopes.
+
+    Call this directly after bulk writes (queryset.update(), bulk_create) to
+    dashboard source models, which do not send model signals.
+    """
+    # Skip snapshots that are already stale so bursts of writes (e.g. the
+    # morning check-in peak) do not all queue on the same row lock
+    DashboardSnapshot.objects.filter(
+        Q(invalidated_at__isnull=True) | Q(invalidated_at__lt=F('computed_at'))
+    ).update(invalidated_at=timezone.now())
+    invalidate_dashboards(user_ids=user_ids, department_ids=department_ids)
+
+
+def invalidate_dashboard_snapshots(sender, instance, update_fields=None, **kwargs):
+    if sender is CustomUser and is_trivial_user_save(update_fields):
+        return
+    user_ids, department_ids = _dashboard_scopes(instance)
+    mark_dashboards_stale(user_ids=user_ids, department_ids=department_ids)
+
+
+for _model in DASHBOARD_SOURCE_MODELS:
+    post_save.connect(invalidate_dashboard_snapshots, sender=_model, dispatch_uid=f'dashboard_snapshot_save_{_model.__name__}')
+    post_delete.connect(invalidate_dashboard_snapshots, sender=_model, dispatch_uid=f'dashboard_snapshot_delete_{_model.__name__}')
+
+
+@receiver(pre_save, sender=Attendance)
+def remember_previous_rollup_key(sender, instance, update_fields=None, **kwargs):
+    """Keep the stored (employee_id, date) so a moved row refreshes both months."""
+    instance._previous_rollup_key = None
+    if instance.pk and not (update_fields and not {'employee', 'date'} & set(update_fields)):
+        instance._previous_rollup_key = (
+            Attendance.all_objects.filter(pk=instance.pk).values_list('employee_id', 'date').first()
+        )
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def refresh_attendance_rollup(sender, instance, **kwargs):
+    keys = {(instance.employee_id, instance.date)}
+    previous = getattr(instance, '_previous_rollup_key', None)
+    if previous:
+        keys.add(previous)
+    refresh_rollups(keys)
+
+
+@receiver(post_save, sender=CustomUser)
+def refresh_user_search_document(sender, instance, update_fields=None, **kwargs):
+    if not is_trivial_user_save(update_fields):
+        refresh_user_documents({instance.pk})
+
+
+@receiver(post_save, sender=Department)
+def refresh_department_search_documents(sender, instance, **kwargs):
+    # Member documents include the department name and code
+    refresh_user_documents(CustomUser.all_objects.filter(department=instance).values_list('pk', flat=True))
@@ -1,3 +1,490 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from department.models import Department
+from leave.models import LeaveRequest
+from .models import Attendance, AttendanceMonthlyRollup, DashboardSnapshot, PerformanceReview
+from .services import attendance as attendance_service
+from .services.dashboard import ceo_dashboard, employee_dashboard, manager_dashboard
+from .services.dashboard_cache import dashboard_cache_stats
+
+
+class CEODashboardSnapshotTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.dept = Department.objects.create(name="IT", code="IT")
+        self.ceo = User.objects.create_user(email="ceo@example.com", password="pass", role="ceo")
+        today = timezone.localdate()
+        User.objects.create_user(
+            email="young@example.com", password="pass", role="employee", department=self.dept,
+            date_of_birth=today - timedelta(days=20 * 365),
+        )
+        User.objects.create_user(
+            email="senior@example.com", password="pass", role="manager", department=self.dept,
+            date_of_birth=date(today.year - 60, 1, 1),
+        )
+
+    def test_payload_is_aggregated_and_materialized(self):
+        data = ceo_dashboard(self.ceo)
+        self.assertEqual(data['headcount'], {'total_active_users': 3, 'employees': 1, 'managers': 1, 'hr': 0})
+        self.assertEqual(data['departments'], [{'id': self.dept.id, 'name': 'IT', 'emp_count': 2}])
+        self.assertEqual(data['age_distribution'], {'<25': 1, '25-34': 0, '35-44': 0, '45-54': 0, '55+': 1})
+        self.assertTrue(DashboardSnapshot.objects.filter(key='ceo').exists())
+
+        # A fresh snapshot is a single-row read
+        with self.assertNumQueries(1):
+            self.assertEqual(ceo_dashboard(self.ceo), data)
+
+    @override_settings(DASHBOARD_SNAPSHOT_REFRESH_SECONDS=0)
+    def test_writes_invalidate_snapshot(self):
+        ceo_dashboard(self.ceo)
+        get_user_model().objects.create_user(email="hr@example.com", password="pass", role="hr")
+        self.assertTrue(DashboardSnapshot.objects.get(key='ceo').is_stale)
+        self.assertEqual(ceo_dashboard(self.ceo)['headcount']['hr'], 1)
+
+
+class RoleDashboardQueryBudgetTests(TestCase):
+    """Role dashboards must not grow their query count with table sizes."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.dept = Department.objects.create(name="Ops", code="OPS")
+        self.manager = User.objects.create_user(email="mgr@example.com", password="pass", role="manager", department=self.dept)
+        self.emp = User.objects.create_user(email="emp@example.com", password="pass", role="employee", department=self.dept)
+        User.objects.create_user(email="emp2@example.com", password="pass", role="employee", department=self.dept)
+        today = timezone.localdate()
+        for offset in range(3):
+            # Explicit durations keep the totals independent of weekends and holidays
+            start = date(today.year, 1, 1) + timedelta(days=30 * offset)
+            LeaveRequest.objects.create(
+                employee=self.emp, start_date=start, end_date=start + timedelta(days=offset),
+                duration_days=offset + 1, status=LeaveRequest.Status.APPROVED,
+            )
+        LeaveRequest.objects.create(employee=self.emp, start_date=today, end_date=today)
+        Attendance.objects.create(employee=self.emp, date=today, status='Leave')
+        PerformanceReview.objects.create(employee=self.emp, reviewer=self.manager, overall_score=Decimal('4.00'))
+        PerformanceReview.objects.create(employee=self.manager, review_type='mid', overall_score=Decimal('3.00'))
+
+    def test_employee_dashboard_single_query(self):
+        with self.assertNumQueries(1):
+            data = employee_dashboard(self.emp)
+        self.assertEqual(data, {
+            'my_leave_days_used': 6,
+            'my_pending_requests': 1,
+            'days_until_next_review': None,
+            'my_team_size': 2,
+            'my_days_present_this_month': 0,
+            'my_late_arrivals_this_month': 0,
+            'my_hours_this_month': 0,
+        })
+
+    def test_manager_dashboard_single_query(self):
+        with self.assertNumQueries(1):
+            data = manager_dashboard(self.manager)
+        self.assertEqual(data, {
+            'my_team_size': 2,
+            'employees_on_leave': 1,
+            'pending_leave_requests': 1,
+            'new_hires_this_month': 3,
+            'team_avg_performance_score': 3.5,
+            'performance_reviews_this_month': 2,
+            'team_late_arrivals_this_month': 0,
+            'team_hours_this_month': 0,
+        })
+
+    def test_manager_without_department_skips_queries(self):
+        self.manager.department = None
+        with self.assertNumQueries(0):
+            data = manager_dashboard(self.manager)
+        self.assertEqual(set(data.values()), {0})
+
+
+class DashboardCacheTests(APITestCase):
+    def setUp(self):
+        caches['dashboard'].clear()
+        User = get_user_model()
+        self.dept = Department.objects.create(name="Sales", code="SAL")
+        self.emp = User.objects.create_user(email="emp@example.com", password="pass", role="employee", department=self.dept)
+        self.client.force_authenticate(user=self.emp)
+
+    def test_me_dashboard_is_cached_until_a_source_write(self):
+        first = self.client.get('/api/auth/me/')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data['dashboard']['my_pending_requests'], 0)
+        self.client.get('/api/auth/me/')
+        self.assertEqual(dashboard_cache_stats()['hits'], 1)
+
+        today = timezone.localdate()
+        LeaveRequest.objects.create(employee=self.emp, start_date=today, end_date=today)
+        res = self.client.get('/api/auth/me/')
+        self.assertEqual(res.data['dashboard']['my_pending_requests'], 1)
+        stats = dashboard_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+    @override_settings(DASHBOARD_CACHE_STATS=False)
+    def test_stats_can_be_turned_off(self):
+        self.client.get('/api/auth/me/')
+        self.client.get('/api/auth/me/')
+        self.assertFalse(caches['dashboard'].get_many(['dashboard:stats:hits', 'dashboard:stats:misses']))
+        self.assertIsNone(dashboard_cache_stats()['hits'])
+
+
+class AttendanceImportTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.hr = User.objects.create_user(email="hr@example.com", password="pass", role="hr")
+        self.emp = User.objects.create_user(email="Emp@Example.com", password="pass", role="employee")
+        Attendance.objects.create(employee=self.emp, date=date(2025, 3, 3), status='Absent')
+
+    def test_bulk_endpoint_upserts_and_reports_errors(self):
+        body = (
+            "employee,employee_email,date,status,check_in_time,check_out_time\n"
+            f"{self.emp.pk},,2025-03-03,Present,09:00,17:30\n"
+            ",emp@example.com,2025-03-04,present,22:00,06:00\n"
+            ",emp@example.com,2025-13-01,Present,,\n"
+            ",nobody@example.com,2025-03-05,Present,,\n"
+        )
+        self.client.force_authenticate(user=self.hr)
+        upload = SimpleUploadedFile('attendance.csv', body.encode(), content_type='text/csv')
+        res = self.client.post('/api/attendance/bulk/', {'file': upload}, format='multipart')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual((res.data['processed'], res.data['upserted'], res.data['error_count']), (4, 2, 2))
+        self.assertEqual([e['line'] for e in res.data['errors']], [4, 5])
+
+        rows = {a.date: a for a in Attendance.objects.filter(employee=self.emp)}
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[date(2025, 3, 3)].status, 'Present')
+        self.assertEqual(rows[date(2025, 3, 3)].work_duration, timedelta(hours=8, minutes=30))
+        # Overnight shift
+        self.assertEqual(rows[date(2025, 3, 4)].work_duration, timedelta(hours=8))
+
+    def test_bulk_endpoint_is_hr_only(self):
+        self.client.force_authenticate(user=self.emp)
+        res = self.client.post('/api/attendance/bulk/', 'employee,date\n', content_type='text/csv')
+        self.assertEqual(res.status_code, 403)
+
+        self.client.force_authenticate(user=self.hr)
+        body = json.dumps({'employee_email': 'emp@example.com', 'date': '2025-03-10'}) + '\n'
+        res = self.client.post('/api/attendance/bulk/', body, content_type='application/x-ndjson')
+        self.assertEqual(res.data['upserted'], 1)
+
+    def test_command_reads_gzipped_ndjson(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'backfill.ndjson.gz')
+            with gzip.open(path, 'wt') as fh:
+                for day in range(1, 4):
+                    fh.write(json.dumps({'employee': self.emp.pk, 'date': f'2025-04-0{day}', 'status': 'Absent'}) + '\n')
+            call_command('import_attendance', path, stdout=open(os.devnull, 'w'))
+        self.assertEqual(Attendance.objects.filter(employee=self.emp, status='Absent', date__month=4).count(), 3)
+
+
+class CloseAttendanceDayTests(TestCase):
+    day = date(2025, 3, 5)  # a Wednesday
+
+    def setUp(self):
+        User = get_user_model()
+        joined = timezone.make_aware(timezone.datetime(2025, 1, 1))
+        self.absent, self.on_leave, self.worker, self.reset = [
+            User.objects.create_user(email=f"u{i}@example.com", password="pass", role="employee", date_joined=joined)
+            for i in range(4)
+        ]
+        User.objects.create_user(email="new@example.com", password="pass", role="employee")
+        LeaveRequest.objects.create(employee=self.on_leave, start_date=self.day, end_date=self.day + timedelta(days=1), status=LeaveRequest.Status.APPROVED)
+        LeaveRequest.objects.create(employee=self.reset, start_date=self.day, end_date=self.day, status=LeaveRequest.Status.APPROVED)
+        Attendance.objects.create(employee=self.worker, date=self.day, check_in_time=timezone.datetime(2025, 3, 5, 9, 15).time())
+        Attendance.objects.create(employee=self.reset, date=self.day, status='Absent')
+
+    def test_marks_leave_absence_and_closes_check_ins(self):
+        call_command('close_attendance_day', date=self.day.isoformat(), checkout_time='18:00', stdout=open(os.devnull, 'w'))
+        rows = {a.employee_id: a for a in Attendance.objects.filter(date=self.day)}
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[self.absent.pk].status, 'Absent')
+        self.assertEqual(rows[self.on_leave.pk].status, 'Leave')
+        self.assertEqual(rows[self.reset.pk].status, 'Leave')
+        self.assertEqual(str(rows[self.worker.pk].check_out_time), '18:00:00')
+        self.assertEqual(rows[self.worker.pk].work_duration, timedelta(hours=8, minutes=45))
+
+        # Re-running is a no-op
+        call_command('close_attendance_day', date=self.day.isoformat(), stdout=open(os.devnull, 'w'))
+        self.assertEqual(Attendance.objects.filter(date=self.day).count(), 4)
+
+    def test_statement_count_is_independent_of_headcount(self):
+        for i in range(10):
+            get_user_model().objects.create_user(email=f"extra{i}@example.com", password="pass", date_joined=timezone.make_aware(timezone.datetime(2025, 1, 1)))
+        with CaptureQueriesContext(connection) as ctx:
+            call_command('close_attendance_day', date=self.day.isoformat(), stdout=open(os.devnull, 'w'))
+        self.assertLess(len(ctx.captured_queries), 20)
+        self.assertEqual(Attendance.objects.filter(date=self.day, status='Absent').count(), 11)
+
+
+class AttendanceMonthlySummaryTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.hr = User.objects.create_user(email="hr@example.com", password="pass", role="hr")
+        self.a = User.objects.create_user(email="a@example.com", password="pass", role="employee")
+        self.b = User.objects.create_user(email="b@example.com", password="pass", role="employee")
+        for day in range(1, 13):
+            Attendance.objects.create(employee=self.a, date=date(2025, 5, day), work_duration=timedelta(hours=8))
+        Attendance.objects.create(employee=self.b, date=date(2025, 5, 2), status='Leave')
+        Attendance.objects.create(employee=self.b, date=date(2025, 5, 3), status='Absent')
+        Attendance.objects.create(employee=self.b, date=date(2025, 6, 1))
+        self.client.force_authenticate(user=self.hr)
+        self.url = '/api/attendance/monthly-summary/'
+
+    def test_aggregates_without_records(self):
+        with self.assertNumQueries(2):
+            res = self.client.get(self.url, {'month': 5, 'year': 2025, 'records': 'none'})
+        self.assertEqual(res.data['stats'], {
+            'total_days_recorded': 14, 'present': 12, 'leave': 1, 'absent': 1, 'late_arrivals': 0, 'total_hours': 96.0,
+        })
+        self.assertEqual(
+            [(e['email'], e['total_days_recorded'], e['total_hours']) for e in res.data['employees']],
+            [('a@example.com', 12, 96.0), ('b@example.com', 2, 0)],
+        )
+        self.assertNotIn('records', res.data)
+
+    def test_records_are_paginated_by_default(self):
+        res = self.client.get(self.url, {'month': 5, 'year': 2025})
+        self.assertEqual(res.data['records']['count'], 14)
+        self.assertEqual(len(res.data['records']['results']), 10)
+
+    def test_all_records_stream_as_json(self):
+        res = self.client.get(self.url, {'month': 5, 'year': 2025, 'records': 'all'})
+        self.assertTrue(res.streaming)
+        data = json.loads(b''.join(res.streaming_content))
+        self.assertEqual(data['stats']['present'], 12)
+        self.assertEqual(len(data['records']), 14)
+
+
+class AttendancePunchTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="emp@example.com", password="pass", role="employee")
+        self.client.force_authenticate(user=self.user)
+        self.morning = timezone.make_aware(timezone.datetime(2025, 5, 6, 9, 0))
+
+    def _statements(self, ctx):
+        # Savepoints come from the test case's transaction, not the punch
+        verbs = [q['sql'].split()[0] for q in ctx.captured_queries]
+        return [verb for verb in verbs if verb not in ('SAVEPOINT', 'RELEASE')]
+
+    def test_check_in_is_one_insert_and_double_click_is_rejected(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(attendance_service.check_in(self.user, self.morning).hour, 9)
+        # The attendance row, then the month's rollup (created on first use)
+        self.assertEqual(self._statements(ctx), ['INSERT', 'UPDATE', 'INSERT'])
+        with self.assertRaises(attendance_service.PunchError) as err:
+            attendance_service.check_in(self.user, self.morning + timedelta(seconds=1))
+        self.assertEqual(err.exception.extra['check_in_time'].hour, 9)
+        self.assertEqual(Attendance.objects.filter(employee=self.user).count(), 1)
+
+    def test_check_out_computes_duration_in_the_update(self):
+        attendance_service.check_in(self.user, self.morning)
+        with CaptureQueriesContext(connection) as ctx:
+            _, hours = attendance_service.check_out(self.user, self.morning + timedelta(hours=8, minutes=30))
+        self.assertEqual(self._statements(ctx), ['UPDATE', 'SELECT', 'UPDATE'])
+        self.assertEqual(hours, 8.5)
+        self.assertEqual(Attendance.objects.get(employee=self.user).work_duration, timedelta(hours=8, minutes=30))
+        with self.assertRaises(attendance_service.PunchError) as err:
+            attendance_service.check_out(self.user, self.morning + timedelta(hours=9))
+        self.assertEqual(err.exception.extra['total_hours'], 8.5)
+
+    def test_check_out_before_check_in_follows_the_overnight_rule(self):
+        attendance_service.check_in(self.user, self.morning)
+        early = self.morning - timedelta(minutes=30)
+        _, hours = attendance_service.check_out(self.user, early)
+        expected = attendance_service.compute_work_duration(early.date(), self.morning.time(), early.time())
+        self.assertEqual(Attendance.objects.get(employee=self.user).work_duration, expected)
+        self.assertEqual(hours, 23.5)
+
+    def test_existing_or_deleted_row_is_claimed(self):
+        Attendance.objects.create(employee=self.user, date=self.morning.date(), status='Absent')
+        attendance_service.check_in(self.user, self.morning)
+        row = Attendance.objects.get(employee=self.user)
+        self.assertEqual((row.status, row.check_in_time.hour), ('Present', 9))
+
+        row.delete()
+        attendance_service.check_in(self.user, self.morning + timedelta(hours=1))
+        row = Attendance.objects.get(employee=self.user)
+        self.assertEqual((row.check_in_time.hour, row.check_out_time), (10, None))
+
+    def test_endpoints_keep_their_responses(self):
+        res = self.client.post('/api/attendance/check-out/')
+        self.assertEqual((res.status_code, res.data['detail']), (400, 'No check-in found for today.'))
+        self.assertEqual(self.client.post('/api/attendance/check-in/').data['detail'], 'Check-in recorded')
+        self.assertEqual(self.client.post('/api/attendance/check-in/').data['detail'], 'Already checked in.')
+        res = self.client.post('/api/attendance/check-out/')
+        self.assertEqual(res.data['detail'], 'Check-out recorded')
+        self.assertIn('total_hours', res.data)
+
+
+@override_settings(ATTENDANCE_LATE_AFTER='09:15')
+class AttendanceRollupTests(APITestCase):
+    def setUp(self):
+        self.dept = Department.objects.create(name="Ops")
+        self.user = get_user_model().objects.create_user(email="emp@example.com", password="pass", role="employee", department=self.dept)
+        self.day = date(2025, 5, 6)
+
+    def _rollup(self, month=5):
+        row = AttendanceMonthlyRollup.objects.filter(employee=self.user, year=2025, month=month).first()
+        return row and (row.present_days, row.absent_days, row.leave_days, row.late_arrivals, row.work_seconds)
+
+    def _punch(self, day, check_in, hours):
+        at = timezone.make_aware(timezone.datetime.combine(day, check_in))
+        attendance_service.check_in(self.user, at)
+        attendance_service.check_out(self.user, at + timedelta(hours=hours))
+
+    def test_punches_increment_the_month(self):
+        self._punch(self.day, timezone.datetime.min.time().replace(hour=9), 8)
+        self._punch(self.day + timedelta(days=1), timezone.datetime.min.time().replace(hour=10), 7)
+        self.assertEqual(self._rollup(), (2, 0, 0, 1, 15 * 3600))
+
+    def test_model_writes_and_bulk_paths_recompute(self):
+        row = Attendance.objects.create(employee=self.user, date=self.day, status='Leave')
+        self.assertEqual(self._rollup(), (0, 0, 1, 0, 0))
+        row.date = date(2025, 6, 2)
+        row.save()
+        self.assertIsNone(self._rollup())
+        self.assertEqual(self._rollup(month=6), (0, 0, 1, 0, 0))
+        row.delete()
+        self.assertIsNone(self._rollup(month=6))
+
+        # Bulk writes send no signals; close_attendance_day refreshes what it closed
+        ten = timezone.datetime.min.time().replace(hour=10)
+        Attendance.objects.bulk_create([Attendance(employee=self.user, date=self.day, check_in_time=ten)])
+        call_command('close_attendance_day', date=self.day.isoformat(), checkout_time='18:00', stdout=open(os.devnull, 'w'))
+        self.assertEqual(self._rollup(), (1, 0, 0, 1, 8 * 3600))
+
+    def test_rebuild_restores_drifted_rollups(self):
+        self._punch(self.day, timezone.datetime.min.time().replace(hour=9, minute=30), 8)
+        Attendance.objects.bulk_create([Attendance(employee=self.user, date=date(2025, 7, 1), status='Absent')])
+        AttendanceMonthlyRollup.objects.filter(month=5).update(present_days=9)
+        AttendanceMonthlyRollup.objects.create(employee=self.user, year=2024, month=1, present_days=3)
+
+        call_command('rebuild_attendance_rollups', stdout=open(os.devnull, 'w'))
+        self.assertEqual(self._rollup(), (1, 0, 0, 1, 8 * 3600))
+        self.assertEqual(self._rollup(month=7), (0, 1, 0, 0, 0))
+        self.assertFalse(AttendanceMonthlyRollup.objects.filter(year=2024).exists())
+
+    def test_dashboard_reads_this_month(self):
+        today = timezone.localdate()
+        AttendanceMonthlyRollup.objects.create(
+            employee=self.user, year=today.year, month=today.month, present_days=4, late_arrivals=1, work_seconds=30 * 3600,
+        )
+        data = employee_dashboard(self.user)
+        self.assertEqual(
+            (data['my_days_present_this_month'], data['my_late_arrivals_this_month'], data['my_hours_this_month']), (4, 1, 30.0)
+        )
+        manager = get_user_model().objects.create_user(email="mgr@example.com", password="pass", role="manager", department=self.dept)
+        data = manager_dashboard(manager)
+        self.assertEqual((data['team_late_arrivals_this_month'], data['team_hours_this_month']), (1, 30.0))
+
+
+class UserListQueryTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.hr = User.objects.create_user(email="hr@example.com", password="pass", role="hr")
+        self.client.force_authenticate(user=self.hr)
+        for i in range(3):
+            manager = User.objects.create_user(email=f"mgr{i}@example.com", password="pass", role="manager")
+            dept = Department.objects.create(name=f"Dept {i}", code=f"D{i}", manager=manager)
+            manager.department = dept
+            manager.save()
+            for n in range(i + 1):
+                User.objects.create_user(email=f"e{i}-{n}@example.com", password="pass", role="employee", department=dept)
+
+    def test_list_runs_a_fixed_number_of_queries(self):
+        first = Department.objects.get(code='D0')
+        with CaptureQueriesContext(connection) as ctx:
+            small = self.client.get('/api/users/', {'role': 'manager', 'department': first.pk})
+        with CaptureQueriesContext(connection) as ctx_full:
+            full = self.client.get('/api/users/')
+        # Page query, count and one grouped head-count query, whatever the page holds
+        self.assertEqual(len(ctx.captured_queries), 3)
+        self.assertEqual(len(ctx_full.captured_queries), 3)
+        self.assertEqual(len(full.data['results']), 10)
+
+        row = next(r for r in full.data['results'] if r['email'] == 'e2-0@example.com')
+        self.assertEqual(row['department']['head_count'], 4)
+        self.assertEqual(row['department']['manager']['email'], 'mgr2@example.com')
+        self.assertEqual(small.data['results'][0]['department']['head_count'], 2)
+
+    def test_sparse_fieldset_skips_department_join(self):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get('/api/users/', {'fields': 'email,role', 'role': 'MANAGER'})
+        self.assertEqual(res.data['count'], 3)
+        self.assertEqual(set(res.data['results'][0]), {'id', 'email', 'role'})
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertNotIn('department_department', ctx.captured_queries[-1]['sql'])
+        self.assertNotIn('last_login', ctx.captured_queries[-1]['sql'])
+
+        res = self.client.get(f'/api/users/{self.hr.pk}/', {'fields': 'email,department'})
+        self.assertEqual(res.data, {'id': self.hr.pk, 'email': 'hr@example.com', 'department': None})
+        self.assertEqual(self.client.get('/api/users/', {'fields': 'email,password'}).status_code, 400)
+
+
+class UserSearchTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.eng = Department.objects.create(name="Engineering", code="ENG")
+        self.ops = Department.objects.create(name="Operations", code="OPS")
+        self.hr = User.objects.create_user(email="hr@example.com", password="pass", role="hr")
+        self.jane = User.objects.create_user(
+            email="jane.doe@example.com", password="pass", role="employee", first_name="Jane", last_name="Doe",
+            job_title="Backend Developer", phone_number="+1 (555) 010-2030", department=self.eng,
+        )
+        self.john = User.objects.create_user(
+            email="jsmith@example.com", password="pass", role="employee", first_name="John", last_name="Smith",
+            job_title="Dispatcher", department=self.ops,
+        )
+        self.client.force_authenticate(user=self.hr)
+
+    def _emails(self, q, **params):
+        res = self.client.get('/api/users/search/', {'q': q, **params})
+        self.assertEqual(res.status_code, 200)
+        return [row['email'] for row in res.data['results']]
+
+    def test_prefix_terms_across_fields(self):
+        self.assertEqual(self._emails('ja'), ['jane.doe@example.com'])
+        self.assertEqual(self._emails('doe eng'), ['jane.doe@example.com'])
+        self.assertEqual(self._emails('back dev'), ['jane.doe@example.com'])
+        self.assertEqual(self._emails('15550102030'), ['jane.doe@example.com'])
+        self.assertCountEqual(self._emails('example', fields='email'), ['hr@example.com', 'jane.doe@example.com', 'jsmith@example.com'])
+        self.assertEqual(self._emails('doe ops'), [])
+        self.assertEqual(self.client.get('/api/users/search/', {'q': ' '}).status_code, 400)
+
+    def test_signals_keep_documents_current(self):
+        self.ops.name = "Logistics"
+        self.ops.save()
+        self.assertEqual(self._emails('logist'), ['jsmith@example.com'])
+        self.john.last_name = "Smythe"
+        self.john.save()
+        self.assertEqual(self._emails('smyth'), ['jsmith@example.com'])
+        self.john.delete()
+        self.assertEqual(self._emails('smyth'), [])
+
+    def test_manager_only_finds_own_department(self):
+        manager = get_user_model().objects.create_user(email="boss@example.com", password="pass", role="manager", department=self.ops)
+        self.client.force_authenticate(user=manager)
+        self.assertCountEqual(self._emails('example'), ['boss@example.com', 'jsmith@example.com'])
+        self.assertEqual(self._emails('jane'), [])
+
+    def test_rebuild_indexes_bulk_created_users(self):
+        User = get_user_model()
+        User.objects.bulk_create([User(email="bulk@example.com", first_name="Bulky", password="x")])
+        self.assertEqual(self._emails('bulky'), [])
+        call_command('rebuild_user_search_index', stdout=open(os.devnull, 'w'))
+        self.assertEqual(self._emails('bulky'), ['bulk@example.com'])
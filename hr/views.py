@@ -8,8 +8,9 @@ from rest_framework.response import Response
 import traceback
 from django.shortcuts import render
 from django.middleware.csrf import get_token
-from .models import CustomUser, PerformanceReview, Attendance, Complaint
+from .models import CustomUser, PerformanceReview, Attendance, AttendanceMonthlyRollup, Complaint
 from department.models import Department
+from department.serializers import head_counts
 from .serializers import UserSerializer, DepartmentSerializer, PerformanceReviewSerializer, AttendanceSerializer, ComplaintSerializer
 from rest_framework.views import APIView
 from rest_framework.exceptions import ValidationError
@@ -23,7 +24,14 @@ from .serializers import HighLevelUserSerializer
 from django.core.mail import send_mail
 from django.conf import settings
 from datetime import timedelta
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder as DRFJSONEncoder
 from core.utils_audit import log_audit
+from .services import attendance as attendance_service
+from .services.attendance_import import FORMATS, import_attendance, iter_records
+from .services.attendance_rollup import month_bounds
+from .services.user_search import search_users
+import codecs
 
 logger = logging.getLogger(__name__)
 
@@ -83,10 +91,17 @@ class UserViewSet(viewsets.ModelViewSet):
         Filter users by role query param first, then restrict to manager's department if requester is a manager.
         """
         queryset = CustomUser.objects.all()
-        # Apply role filter if provided
+        fields = self.requested_fields()
+        if fields is None or 'department' in fields:
+            queryset = queryset.select_related('department__manager')
+        else:
+            # Slim projection: load only the columns that are rendered
+            queryset = queryset.only(*fields)
+        # Apply role filter if provided; roles are stored lowercase, so an
+        # exact match can use the (role, department) index
         role = self.request.query_params.get('role')
         if role:
-            queryset = queryset.filter(role__iexact=role)
+            queryset = queryset.filter(role=role.lower())
         # Apply department filter if provided
         dept = self.request.query_params.get('department')
         if dept:
@@ -102,6 +117,65 @@ class UserViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(department=user.department)
         return queryset
 
+    def requested_fields(self):
+        """Parse `?fields=a,b` on reads; None when every field is wanted."""
+        if not hasattr(self, '_requested_fields'):
+            raw = self.request.query_params.get('fields') if self.request.method == 'GET' else None
+            fields = None
+            if raw:
+                fields = {name.strip() for name in raw.split(',') if name.strip()}
+                unknown = fields - UserSerializer.readable_field_names()
+                if unknown:
+                    raise ValidationError({'fields': f"Unknown fields: {', '.join(sorted(unknown))}."})
+                fields.add('id')
+            self._requested_fields = fields
+        return self._requested_fields
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.requested_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+
+        context = self.get_serializer_context()
+        fields = self.requested_fields()
+        if fields is None or 'department' in fields:
+            # Head counts of every department on the page in one grouped query
+            context['department_head_counts'] = head_counts(r.department_id for r in rows)
+        serializer = self.get_serializer(rows, many=True, context=context)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """Directory search: `?q=` prefix-matches name, email, job title, phone and department.
+
+        Results are ranked best first and limited by `?limit=` (default 20,
+        max 100); role, department, fields and manager scoping apply as on
+        the list.
+        """
+        q = request.query_params.get('q', '').strip()
+        if not q:
+            return Response({'detail': 'q is required.'}, status=400)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            return Response({'detail': 'limit must be an integer.'}, status=400)
+
+        rows = search_users(q, self.get_queryset(), limit=limit)
+        context = self.get_serializer_context()
+        fields = self.requested_fields()
+        if fields is None or 'department' in fields:
+            context['department_head_counts'] = head_counts(r.department_id for r in rows)
+        serializer = self.get_serializer(rows, many=True, context=context)
+        return Response({'query': q, 'results': serializer.data})
+
     def get_permissions(self):
         user = self.request.user
         # Allow managers to create employees
@@ -177,6 +251,37 @@ class PerformanceReviewViewSet(viewsets.ModelViewSet):
             return [AnyOf(IsCEO, IsHR, IsManager)]
         return [permissions.IsAuthenticated()]
 
+# Monthly summary counters, usable with aggregate() and grouped annotate()
+ATTENDANCE_STATS = {
+    'present': models.Sum('present_days'),
+    'leave': models.Sum('leave_days'),
+    'absent': models.Sum('absent_days'),
+    'late_arrivals': models.Sum('late_arrivals'),
+    'work_seconds': models.Sum('work_seconds'),
+}
+
+
+def _attendance_stats_row(row):
+    present, leave, absent = row['present'] or 0, row['leave'] or 0, row['absent'] or 0
+    return {
+        'total_days_recorded': present + leave + absent,
+        'present': present,
+        'leave': leave,
+        'absent': absent,
+        'late_arrivals': row['late_arrivals'] or 0,
+        'total_hours': round((row['work_seconds'] or 0) / 3600, 2),
+    }
+
+
+def _stream_summary(payload, records):
+    """Yield `payload` plus a "records" list as one JSON document, row by row."""
+    encoder = DRFJSONEncoder()
+    yield encoder.encode(payload)[:-1] + ', "records": ['
+    for i, record in enumerate(records.iterator(chunk_size=1000)):
+        yield (', ' if i else '') + encoder.encode(AttendanceSerializer(record).data)
+    yield ']}'
+
+
 class AttendanceViewSet(viewsets.ModelViewSet):
     queryset = Attendance.objects.all().select_related('employee')
     serializer_class = AttendanceSerializer
@@ -196,45 +301,58 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         return qs.filter(employee=user)
 
     def get_permissions(self):
-        if self.action in ['destroy', 'update', 'partial_update', 'create']:
+        if self.action in ['destroy', 'update', 'partial_update', 'create', 'bulk']:
             # Direct CRUD only for HR/CEO (normal users use custom actions)
             return [AnyOf(IsCEO, IsHR)]
         return [permissions.IsAuthenticated()]
 
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """Upsert many attendance rows from CSV or NDJSON.
+
+        Send a multipart `file` or the raw body (Content-Type text/csv or
+        application/x-ndjson). `?fmt=csv|ndjson` overrides format detection
+        and `?dry_run=1` validates without writing.
+        """
+        upload = request.FILES.get('file') if request.content_type.startswith('multipart/') else None
+        name = getattr(upload, 'name', '') or ''
+        fmt = request.query_params.get('fmt')
+        if not fmt:
+            ndjson = name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in request.content_type
+            fmt = 'ndjson' if ndjson else 'csv'
+        if fmt not in FORMATS:
+            return Response({'detail': 'fmt must be one of: csv, ndjson.'}, status=400)
+        source = upload if upload is not None else request.stream
+        if source is None:
+            return Response({'detail': 'No data received.'}, status=400)
+
+        dry_run = request.query_params.get('dry_run', '').lower() in ('1', 'true', 'yes')
+        # Decode and parse lazily so large files are never held in memory
+        lines = codecs.iterdecode(source, 'utf-8-sig')
+        try:
+            summary = import_attendance(iter_records(lines, fmt), dry_run=dry_run)
+        except UnicodeDecodeError:
+            return Response({'detail': 'File must be UTF-8 encoded.'}, status=400)
+        if summary['upserted'] and not dry_run:
+            log_audit(request, action='attendance_bulk_import', summary=f"Imported {summary['upserted']} attendance rows",
+                      target_model='hr.Attendance', extra={k: summary[k] for k in ('processed', 'upserted', 'error_count')})
+        return Response({**summary, 'dry_run': dry_run})
+
     @action(detail=False, methods=['post'], url_path='check-in')
     def check_in(self, request):
-        user = request.user
-        today = timezone.localdate()
-        att, created = Attendance.objects.get_or_create(employee=user, date=today, defaults={'status': 'Present'})
-        if att.check_in_time:
-            return Response({'detail': 'Already checked in.', 'check_in_time': att.check_in_time}, status=400)
-        att.check_in_time = timezone.localtime().time()
-        att.status = 'Present'
-        att.save(update_fields=['check_in_time', 'status'])
-        return Response({'detail': 'Check-in recorded', 'time': att.check_in_time})
+        try:
+            punched = attendance_service.check_in(request.user)
+        except attendance_service.PunchError as exc:
+            return Response({'detail': exc.detail, **exc.extra}, status=400)
+        return Response({'detail': 'Check-in recorded', 'time': punched})
 
     @action(detail=False, methods=['post'], url_path='check-out')
     def check_out(self, request):
-        user = request.user
-        today = timezone.localdate()
         try:
-            att = Attendance.objects.get(employee=user, date=today)
-        except Attendance.DoesNotExist:
-            return Response({'detail': 'No check-in found for today.'}, status=400)
-        if not att.check_in_time:
-            return Response({'detail': 'Cannot check-out without check-in.'}, status=400)
-        if att.check_out_time:
-            total_hours = None
-            if att.work_duration:
-                total_hours = round(att.work_duration.total_seconds() / 3600, 2)
-            return Response({'detail': 'Already checked out.', 'check_out_time': att.check_out_time, 'total_hours': total_hours}, status=400)
-        att.check_out_time = timezone.localtime().time()
-        att.save(update_fields=['check_out_time'])
-        att.finalize_duration()
-        total_hours = None
-        if att.work_duration:
-            total_hours = round(att.work_duration.total_seconds() / 3600, 2)
-        return Response({'detail': 'Check-out recorded', 'time': att.check_out_time, 'total_hours': total_hours})
+            punched, total_hours = attendance_service.check_out(request.user)
+        except attendance_service.PunchError as exc:
+            return Response({'detail': exc.detail, **exc.extra}, status=400)
+        return Response({'detail': 'Check-out recorded', 'time': punched, 'total_hours': total_hours})
 
     @action(detail=False, methods=['get'], url_path='today')
     def today(self, request):
@@ -246,43 +364,60 @@ class AttendanceViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='monthly-summary')
     def monthly_summary(self, request):
+        """Month stats, a per-employee breakdown and (optionally) the records.
+
+        Stats and the breakdown are each one grouped query over the monthly
+        rollups, not the raw records. `records=page` (default) paginates the
+        records with `?page=`, `records=none` omits them and `records=all`
+        streams every record as one JSON document.
+        """
         user = request.user
         role = getattr(user, 'role', '').lower()
-        month = int(request.query_params.get('month', timezone.localdate().month))
-        year = int(request.query_params.get('year', timezone.localdate().year))
-        start = timezone.datetime(year, month, 1, tzinfo=timezone.get_current_timezone())
-        # Next month start for range end
-        if month == 12:
-            end = timezone.datetime(year + 1, 1, 1, tzinfo=timezone.get_current_timezone())
-        else:
-            end = timezone.datetime(year, month + 1, 1, tzinfo=timezone.get_current_timezone())
-        qs = Attendance.objects.filter(date__gte=start.date(), date__lt=end.date())
+        today = timezone.localdate()
+        try:
+            month = int(request.query_params.get('month', today.month))
+            year = int(request.query_params.get('year', today.year))
+            start, end = month_bounds(year, month)
+        except ValueError:
+            return Response({'detail': 'month and year must be a valid month (1-12) and year.'}, status=400)
+        records_mode = request.query_params.get('records', 'page')
+        if records_mode not in ('none', 'page', 'all'):
+            return Response({'detail': 'records must be one of: none, page, all.'}, status=400)
+
+        qs = Attendance.objects.filter(date__gte=start, date__lt=end)
+        rollups = AttendanceMonthlyRollup.objects.filter(year=year, month=month)
         if role in ['ceo', 'hr']:
             pass
-        elif role == 'manager':
-            if user.department_id:
-                qs = qs.filter(models.Q(employee=user) | models.Q(employee__department_id=user.department_id))
-            else:
-                qs = qs.filter(employee=user)
+        elif role == 'manager' and user.department_id:
+            scope = models.Q(employee=user) | models.Q(employee__department_id=user.department_id)
+            qs, rollups = qs.filter(scope), rollups.filter(scope)
         else:
-            qs = qs.filter(employee=user)
-        total_days = qs.count()
-        present = qs.filter(status='Present').count()
-        leave = qs.filter(status='Leave').count()
-        absent = qs.filter(status='Absent').count()
-        total_hours = qs.aggregate(sum=models.Sum('work_duration'))['sum'] or timezone.timedelta(0)
-        return Response({
+            qs, rollups = qs.filter(employee=user), rollups.filter(employee=user)
+
+        payload = {
             'month': month,
             'year': year,
-            'records': AttendanceSerializer(qs, many=True).data,
-            'stats': {
-                'total_days_recorded': total_days,
-                'present': present,
-                'leave': leave,
-                'absent': absent,
-                'total_hours': round(total_hours.total_seconds() / 3600, 2) if total_hours else 0,
-            }
-        })
+            'stats': _attendance_stats_row(rollups.aggregate(**ATTENDANCE_STATS)),
+            'employees': [
+                {
+                    'employee': row['employee_id'],
+                    'first_name': row['employee__first_name'],
+                    'last_name': row['employee__last_name'],
+                    'email': row['employee__email'],
+                    **_attendance_stats_row(row),
+                }
+                for row in rollups.order_by('employee__email').values(
+                    'employee_id', 'employee__first_name', 'employee__last_name', 'employee__email'
+                ).annotate(**ATTENDANCE_STATS)
+            ],
+        }
+        records = qs.order_by('date', 'employee_id')
+        if records_mode == 'all':
+            return StreamingHttpResponse(_stream_summary(payload, records), content_type='application/json')
+        if records_mode == 'page':
+            page = self.paginate_queryset(records)
+            payload['records'] = self.get_paginated_response(AttendanceSerializer(page, many=True).data).data
+        return Response(payload)
 
     @action(detail=False, methods=['post'], url_path='reset-today', permission_classes=[AnyOf(IsCEO, IsHR)])
     def reset_today(self, request):
@@ -357,10 +492,10 @@ class ComplaintViewSet(viewsets.ModelViewSet):
             message = "\n".join(body_lines)
 
             # Recipients: all HR users, and CEO if send_to_ceo True
-            hr_emails = list(CustomUser.objects.filter(role__iexact='hr', is_active=True).values_list('email', flat=True))
+            hr_emails = list(CustomUser.objects.filter(role=CustomUser.Role.HR, is_active=True).values_list('email', flat=True))
             to_emails = hr_emails
             if complaint.send_to_ceo:
-                ceo_emails = list(CustomUser.objects.filter(role__iexact='ceo', is_active=True).values_list('email', flat=True))
+                ceo_emails = list(CustomUser.objects.filter(role=CustomUser.Role.CEO, is_active=True).values_list('email', flat=True))
                 to_emails = list(set(hr_emails + ceo_emails))
             if not to_emails:
                 return
@@ -480,6 +615,11 @@ class AnalyticsViewSet(viewsets.ViewSet):
             results.append({'department_id': r['employee__department__id'], 'department': name, 'avg_score': round(r['avg_score'] or 0, 2), 'reviews': r['reviews']})
         return Response({'results': results})
 
+    @action(detail=False, methods=['get'], url_path='dashboard-cache')
+    def dashboard_cache(self, request):
+        from .services.dashboard_cache import dashboard_cache_stats
+        return Response(dashboard_cache_stats())
+
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
@@ -504,9 +644,9 @@ class MeView(APIView):
     def get(self, request):
         try:
             user = request.user
-            from .services.dashboard import build_dashboard
+            from .services.dashboard_cache import get_dashboard
             data = UserSerializer(user).data
-            data['dashboard'] = build_dashboard(user)
+            data['dashboard'] = get_dashboard(user)
             return Response(data)
         except Exception as e:
             logger.error(f"Error retrieving user data: {e}", exc_info=True)
@@ -2,6 +2,7 @@ from django.utils.deprecation import MiddlewareMixin
 from django.utils import timezone
 from django.conf import settings
 from core.models import AuditLog
+from core.audit_writer import audit_writer
 
 SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
 
@@ -62,7 +63,7 @@ class AuditLogMiddleware(MiddlewareMixin):
             if not should_log:
                 return response
 
-            AuditLog.objects.create(
+            audit_writer.submit(AuditLog(
                 actor=actor,
                 action=action or 'api_call',
                 summary=f"{request.method} {path} -> {status_code}",
@@ -72,7 +73,7 @@ class AuditLogMiddleware(MiddlewareMixin):
                 ip_address=self._get_ip(request),
                 user_agent=request.META.get('HTTP_USER_AGENT', '')[:500],
                 extra={},
-            )
+            ))
         except Exception:
             # Don't break responses if logging fails
             pass
@@ -200,6 +200,93 @@ AUTHENTICATION_BACKENDS = [
 # Audit logging configuration
 # Modes: 'off' (no logs), 'minimal' (auth + 5xx errors), 'important' (adds key business heuristics), 'all' (every /api/*)
 AUDIT_LOG_MODE = os.environ.get('AUDIT_LOG_MODE', 'minimal').lower()
+# Audit rows are written by a background thread in batches (core.audit_writer).
+# The queue is bounded; entries that cannot be queued within the enqueue
+# timeout are dropped rather than blocking requests. Test runs write
+# synchronously so rows stay inside the test transaction.
+AUDIT_LOG_ASYNC = os.environ.get('AUDIT_LOG_ASYNC', 'True').lower() == 'true' and 'test' not in _sys.argv
+AUDIT_LOG_BATCH_SIZE = int(os.environ.get('AUDIT_LOG_BATCH_SIZE', 100))
+AUDIT_LOG_FLUSH_INTERVAL = float(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL', 2.0))
+AUDIT_LOG_QUEUE_SIZE = int(os.environ.get('AUDIT_LOG_QUEUE_SIZE', 10000))
+AUDIT_LOG_ENQUEUE_TIMEOUT = float(os.environ.get('AUDIT_LOG_ENQUEUE_TIMEOUT', 0.05))
+# Retention for `python manage.py archive_audit_logs`: rows older than this many
+# days move to monthly JSONL.gz files under AUDIT_LOG_ARCHIVE_DIR, leaving
+# daily per-action/status rollups behind.
+AUDIT_LOG_RETENTION_DAYS = int(os.environ.get('AUDIT_LOG_RETENTION_DAYS', 90))
+AUDIT_LOG_ARCHIVE_DIR = os.environ.get('AUDIT_LOG_ARCHIVE_DIR', os.path.join(BASE_DIR, 'audit_archive'))
+
+# SystemSetting reads are served from a per-process copy (core.settings_cache).
+# A process re-checks the version stamp in the default cache every
+# SYSTEM_SETTINGS_CACHE_TTL seconds and reloads unconditionally after
+# SYSTEM_SETTINGS_CACHE_MAX_AGE seconds. The default cache is per-process
+# locmem, so changes made in other workers arrive only through the max age.
+SYSTEM_SETTINGS_CACHE_TTL = int(os.environ.get('SYSTEM_SETTINGS_CACHE_TTL', 30))
+SYSTEM_SETTINGS_CACHE_MAX_AGE = int(os.environ.get('SYSTEM_SETTINGS_CACHE_MAX_AGE', 300))
+
+# Serialized leave approver lists are cached per (role, department) in the
+# default cache (leave.services.approvers). Signals retire them only in the
+# worker that made the change (the default cache is per process), so other
+# workers can show stale approvers for up to this many seconds.
+LEAVE_APPROVER_CACHE_TIMEOUT = int(os.environ.get('LEAVE_APPROVER_CACHE_TIMEOUT', 60))
+
+# Weekdays (Monday=0) that never count as leave days; public holidays are
+# managed as leave.PublicHoliday rows. Comma-separated in the environment.
+LEAVE_WEEKEND_DAYS = tuple(int(d) for d in os.environ.get('LEAVE_WEEKEND_DAYS', '5,6').split(',') if d.strip())
+# Working-day arrays (leave.services.working_calendar) are per process and
+# rebuilt after this many seconds, so a holiday edited in another worker is
+# picked up within it even though the default cache is not shared.
+LEAVE_CALENDAR_MAX_AGE = int(os.environ.get('LEAVE_CALENDAR_MAX_AGE', 300))
+
+# Check-out time recorded for check-ins still open when
+# `python manage.py close_attendance_day` runs (HH:MM, local time).
+ATTENDANCE_AUTO_CHECKOUT_TIME = os.environ.get('ATTENDANCE_AUTO_CHECKOUT_TIME', '18:00')
+
+# Check-ins after this time (HH:MM, local time) count as late arrivals in
+# hr.AttendanceMonthlyRollup. Run `manage.py rebuild_attendance_rollups`
+# after changing it.
+ATTENDANCE_LATE_AFTER = os.environ.get('ATTENDANCE_LATE_AFTER', '09:15')
+
+# Materialized CEO/HR dashboard (see hr.services.dashboard.ceo_dashboard).
+# After a write, the snapshot is rebuilt on the first read at least
+# DASHBOARD_SNAPSHOT_REFRESH_SECONDS after the previous build; any snapshot
+# older than DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS is rebuilt regardless.
+DASHBOARD_SNAPSHOT_REFRESH_SECONDS = int(os.environ.get('DASHBOARD_SNAPSHOT_REFRESH_SECONDS', 30))
+DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS = int(os.environ.get('DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS', 300))
+
+# Cache for /api/auth/me/ dashboard payloads (see hr.services.dashboard_cache).
+# Local memory by default, which is per process: with several gunicorn
+# workers, invalidation only reaches the worker that handled the write.
+# Production should use 'file' or 'db', which share entries across workers
+# ('db' needs `python manage.py createcachetable`).
+DASHBOARD_CACHE_BACKEND = os.environ.get('DASHBOARD_CACHE_BACKEND', 'locmem').lower()
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', 300))
+# Count cache hits/misses for /api/analytics/dashboard-cache/
+DASHBOARD_CACHE_STATS = os.environ.get('DASHBOARD_CACHE_STATS', 'True').lower() == 'true'
+_DASHBOARD_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'hrms-dashboard',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DASHBOARD_CACHE_LOCATION', os.path.join(BASE_DIR, 'cache', 'dashboard')),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': os.environ.get('DASHBOARD_CACHE_LOCATION', 'hrms_dashboard_cache'),
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'dashboard': {
+        **_DASHBOARD_CACHE_BACKENDS.get(DASHBOARD_CACHE_BACKEND, _DASHBOARD_CACHE_BACKENDS['locmem']),
+        'TIMEOUT': DASHBOARD_CACHE_TIMEOUT,
+    },
+}
 
 LOGGING = {
     'version': 1,
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import LeaveRequest, LeaveType, LeaveBalance, LeaveApproval
+from .models import LeaveRequest, LeaveType, LeaveBalance, LeaveApproval, PublicHoliday
 
 
 @admin.register(LeaveRequest)
@@ -26,3 +26,9 @@ class LeaveBalanceAdmin(admin.ModelAdmin):
 class LeaveApprovalAdmin(admin.ModelAdmin):
     list_display = ('leave_request', 'approver', 'decision', 'approved_at')
     list_filter = ('decision',)
+
+
+@admin.register(PublicHoliday)
+class PublicHolidayAdmin(admin.ModelAdmin):
+    list_display = ('date', 'name')
+    search_fields = ('name',)
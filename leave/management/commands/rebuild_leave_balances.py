@@ -0,0 +1,62 @@
+"""
+Reconcile the LeaveBalance ledger with leave request history.
+
+Recomputes `used` for every (user, leave type, year) and per-user yearly
+total from approved, non-deleted requests, creating missing rows and
+zeroing rows with no remaining requests. Run after bulk imports or any
+write that bypassed the model signals; safe to run at any time.
+"""
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from leave.models import LeaveBalance, LeaveType
+from leave.services.balances import history_totals
+
+
+class Command(BaseCommand):
+    help = 'Rebuild LeaveBalance.used from approved leave requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Only rebuild this year (default: all years).')
+        parser.add_argument('--dry-run', action='store_true', help='Report differences without changing anything.')
+
+    def handle(self, *args, **options):
+        year = options['year']
+        expected = history_totals(year)
+
+        with transaction.atomic():
+            balances = LeaveBalance.objects.select_for_update()
+            if year is not None:
+                balances = balances.filter(year=year)
+            existing = {(b.user_id, b.leave_type_id, b.year): b for b in balances}
+
+            to_update = []
+            for key, balance in existing.items():
+                used = expected.get(key, Decimal('0'))
+                if balance.used != used:
+                    balance.used = used
+                    to_update.append(balance)
+            allowances = dict(LeaveType.all_objects.values_list('pk', 'default_allowance_days'))
+            to_create = [
+                LeaveBalance(
+                    user_id=user_id, leave_type_id=type_id, year=ledger_year, used=used,
+                    allowance=allowances.get(type_id, 0) if type_id is not None else 0,
+                )
+                for (user_id, type_id, ledger_year), used in expected.items()
+                if (user_id, type_id, ledger_year) not in existing
+            ]
+
+            if options['dry_run']:
+                transaction.set_rollback(True)
+                self.stdout.write(self.style.NOTICE(
+                    f'{len(to_update)} balances would be corrected and {len(to_create)} created.'
+                ))
+                return
+            LeaveBalance.objects.bulk_update(to_update, ['used'], batch_size=500)
+            LeaveBalance.objects.bulk_create(to_create, batch_size=500)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Corrected {len(to_update)} and created {len(to_create)} leave balances.'
+        ))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leave', '0006_leavetype_remove_leaverequest_deleted_by_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='leavebalance',
+            name='leave_type',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='leave.leavetype'),
+        ),
+        migrations.AddConstraint(
+            model_name='leavebalance',
+            constraint=models.UniqueConstraint(condition=models.Q(('leave_type__isnull', True)), fields=('user', 'year'), name='uniq_leave_balance_total_per_year'),
+        ),
+    ]
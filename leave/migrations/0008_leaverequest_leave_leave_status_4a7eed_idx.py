@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leave', '0007_alter_leavebalance_leave_type_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['status', 'start_date', 'end_date'], name='leave_leave_status_4a7eed_idx'),
+        ),
+    ]
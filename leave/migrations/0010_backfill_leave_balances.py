@@ -0,0 +1,65 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations
+
+
+def backfill_balances(apps, schema_editor):
+    """Fill the LeaveBalance ledger from existing approved requests.
+
+    Same totals as the rebuild_leave_balances command, computed with the
+    historical models so the migration does not depend on later code.
+    """
+    LeaveBalance = apps.get_model('leave', 'LeaveBalance')
+    LeaveRequest = apps.get_model('leave', 'LeaveRequest')
+    LeaveType = apps.get_model('leave', 'LeaveType')
+    PublicHoliday = apps.get_model('leave', 'PublicHoliday')
+
+    weekend = set(getattr(settings, 'LEAVE_WEEKEND_DAYS', (5, 6)))
+    holidays = set(PublicHoliday.objects.values_list('date', flat=True))
+
+    def working_days(start, end):
+        days = (start + timedelta(days=i) for i in range((end - start).days + 1))
+        return sum(1 for day in days if day.weekday() not in weekend and day not in holidays)
+
+    totals = defaultdict(Decimal)
+    counted = LeaveRequest.objects.filter(status='APPROVED', deleted_at__isnull=True).values_list(
+        'employee_id', 'leave_type_id', 'start_date', 'end_date', 'duration_days'
+    )
+    for user_id, type_id, start, end, duration in counted.iterator():
+        days = Decimal(duration) if duration is not None else Decimal(working_days(start, end))
+        totals[(user_id, None, start.year)] += days
+        if type_id is not None:
+            totals[(user_id, type_id, start.year)] += days
+
+    existing = {(b.user_id, b.leave_type_id, b.year): b for b in LeaveBalance.objects.all()}
+    to_update = []
+    for key, balance in existing.items():
+        used = totals.get(key, Decimal('0'))
+        if balance.used != used:
+            balance.used = used
+            to_update.append(balance)
+    allowances = dict(LeaveType.objects.values_list('pk', 'default_allowance_days'))
+    to_create = [
+        LeaveBalance(
+            user_id=user_id, leave_type_id=type_id, year=year, used=used,
+            allowance=allowances.get(type_id, 0) if type_id is not None else 0,
+        )
+        for (user_id, type_id, year), used in totals.items()
+        if (user_id, type_id, year) not in existing
+    ]
+    LeaveBalance.objects.bulk_update(to_update, ['used'], batch_size=500)
+    LeaveBalance.objects.bulk_create(to_create, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leave', '0009_publicholiday'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
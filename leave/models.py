@@ -46,6 +46,10 @@ class LeaveRequest(SoftDeleteModel):
                 name='leave_end_after_start'
             )
         ]
+        indexes = [
+            # Interval-overlap lookups: status = X AND start_date <= to AND end_date >= from
+            models.Index(fields=['status', 'start_date', 'end_date']),
+        ]
 
     def __str__(self):
         return f"{self.employee} - {self.start_date} to {self.end_date} ({self.status})"
@@ -55,28 +59,41 @@ class LeaveRequest(SoftDeleteModel):
         self.deleted_at = timezone.now()
         self.save(update_fields=['deleted_at'])
 
+    def approver_scope(self):
+        """Return the (role, department_id) pair that determines the approvers.
+
+        Requests sharing a scope share approvers, so list views resolve each
+        scope once. Only employees' approvers depend on the department.
+        """
+        role = str(getattr(self.employee, 'role', '') or '').lower()
+        return role, self.employee.department_id if role == 'employee' else None
+
     def get_approvers(self):
         """Return queryset of users who can approve this leave request based on employee role."""
+        return self.approvers_for_scope(*self.approver_scope())
+
+    @staticmethod
+    def approvers_for_scope(role, department_id=None):
+        """Return the approver queryset for an employee role and department.
+
+        Roles are stored lowercase, so the filters are exact matches that can
+        use the (role, department) index.
+        """
         from django.contrib.auth import get_user_model
 
         CustomUser = get_user_model()
-        role = str(getattr(self.employee, 'role', '') or '').lower()
 
         if role == 'employee':
             approvers = CustomUser.objects.filter(
-                models.Q(role__iexact='ceo') |
-                models.Q(role__iexact='hr') |
-                (models.Q(role__iexact='manager') & models.Q(department=self.employee.department))
+                models.Q(role__in=['ceo', 'hr']) |
+                models.Q(role='manager', department_id=department_id)
             )
         elif role == 'manager':
-            approvers = CustomUser.objects.filter(
-                models.Q(role__iexact='ceo') |
-                models.Q(role__iexact='hr')
-            )
+            approvers = CustomUser.objects.filter(role__in=['ceo', 'hr'])
         elif role == 'hr':
-            approvers = CustomUser.objects.filter(role__iexact='ceo')
+            approvers = CustomUser.objects.filter(role='ceo')
         elif role == 'ceo':
-            approvers = CustomUser.objects.filter(role__iexact='hr')
+            approvers = CustomUser.objects.filter(role='hr')
         else:
             approvers = CustomUser.objects.none()
 
@@ -100,20 +117,47 @@ class LeaveType(SoftDeleteModel):
         return f"{self.name} ({self.code})"
 
 
+class PublicHoliday(models.Model):
+    """A non-working day for everyone, excluded from leave durations.
+
+    Weekends come from the LEAVE_WEEKEND_DAYS setting; see
+    leave.services.working_calendar.
+    """
+
+    date = models.DateField(unique=True)
+    name = models.CharField(max_length=150)
+
+    class Meta:
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.date} {self.name}"
+
+
 class LeaveBalance(models.Model):
     """Tracks remaining allowance per user and leave type for a year/period.
 
     This is separate from requests to allow fast checks and historical tracking.
+    `used` is kept in step with approved, non-deleted requests by
+    leave.signals (see leave.services.balances). The row with a null
+    `leave_type` holds the user's total across all types, which is what the
+    annual request cap is checked against.
     """
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='leave_balances')
-    leave_type = models.ForeignKey(LeaveType, on_delete=models.CASCADE, related_name='balances')
+    leave_type = models.ForeignKey(LeaveType, on_delete=models.CASCADE, related_name='balances', null=True, blank=True)
     year = models.IntegerField()
     allowance = models.DecimalField(max_digits=8, decimal_places=2, default=0)
     used = models.DecimalField(max_digits=8, decimal_places=2, default=0)
 
     class Meta:
         unique_together = [('user', 'leave_type', 'year')]
+        constraints = [
+            # unique_together does not cover NULL leave types
+            models.UniqueConstraint(
+                fields=['user', 'year'], condition=models.Q(leave_type__isnull=True), name='uniq_leave_balance_total_per_year'
+            ),
+        ]
 
     @property
     def remaining(self):
@@ -43,33 +43,33 @@ class LeaveRequestSerializer(serializers.ModelSerializer):
         }
 
     def get_approvers(self, obj):
-        return [
-            {
-                "id": u.id,
-                "first_name": u.first_name,
-                "last_name": u.last_name,
-                "email": u.email,
-                "role": u.role,
-            }
-            for u in obj.get_approvers()
-        ]
+        # Approver lists are cached per (role, department); list views also pass
+        # an `approvers_by_scope` memo so each scope is looked up once per page
+        from .services.approvers import approver_directory
+        memo = self.context.get('approvers_by_scope')
+        scope = obj.approver_scope()
+        if memo is None:
+            return approver_directory(*scope)
+        if scope not in memo:
+            memo[scope] = approver_directory(*scope)
+        return memo[scope]
 
     def _get_current_year(self):
         from django.utils import timezone
         return timezone.now().year
 
     def get_yearly_granted_days(self, obj):
-        """Return total approved leave days for the employee in the current year."""
-        year = self._get_current_year()
-        approved = LeaveRequest.objects.approved().filter(employee=obj.employee, start_date__year=year)
-        # Sum duration_days; fall back to difference if duration missing
-        total = 0
-        for r in approved:
-            if r.duration_days is not None:
-                total += float(r.duration_days)
-            else:
-                total += (r.end_date - r.start_date).days + 1
-        return total
+        """Return total approved leave days for the employee in the current year.
+
+        Reads the `yearly_granted_days` map from context (pre-filled from the
+        balance ledger for the whole page by list views) and reads missing
+        employees' balance rows on demand.
+        """
+        from .services.balances import annual_used_by_employee
+        totals = self.context.setdefault('yearly_granted_days', {})
+        if obj.employee_id not in totals:
+            totals.update(annual_used_by_employee([obj.employee_id], self._get_current_year()))
+        return float(totals[obj.employee_id])
 
     def get_yearly_remaining_days(self, obj):
         # Use system setting key 'annual_leave_request_max_days', default 15
@@ -82,3 +82,19 @@ class LeaveRequestSerializer(serializers.ModelSerializer):
     def get_system_annual_request_limit(self, obj):
         from core.models import SystemSetting
         return SystemSetting.get_int('annual_leave_request_max_days', default=15)
+
+
+class LeaveBulkDecisionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=500)
+    decision = serializers.CharField()
+    comment = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate_ids(self, value):
+        # Keep the caller's order but decide each request once
+        return list(dict.fromkeys(value))
+
+    def validate_decision(self, value):
+        value = value.strip().upper()
+        if value not in (LeaveRequest.Status.APPROVED, LeaveRequest.Status.DENIED):
+            raise serializers.ValidationError('Decision must be APPROVED or DENIED.')
+        return value
@@ -0,0 +1,65 @@
+"""Cached approver directory for leave requests.
+
+Approvers depend only on the requesting employee's role and, for
+employees, their department (see LeaveRequest.approver_scope), so the
+serialized approver list is cached per (role, department_id) in the
+'default' cache. Every entry embeds a single directory version;
+leave.signals bumps it when an approver's account or a department's
+manager changes, which retires all entries at once.
+
+The bump only reaches processes that share the 'default' cache; with the
+per-process locmem default, other workers keep their entries until
+LEAVE_APPROVER_CACHE_TIMEOUT (60 seconds by default) runs out. The
+directory is therefore for display only: leave.services.decisions checks
+who may decide against the database.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from leave.models import LeaveRequest
+
+VERSION_KEY = 'leave:approvers:version'
+
+# Roles whose accounts appear in some approver list
+APPROVER_ROLES = {'ceo', 'hr', 'manager'}
+
+
+def _cache():
+    return caches['default']
+
+
+def _version():
+    version = _cache().get(VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        if not _cache().add(VERSION_KEY, version, timeout=None):
+            version = _cache().get(VERSION_KEY, version)
+    return version
+
+
+def approver_directory(role, department_id=None):
+    """Return the serialized approvers for a (role, department_id) scope."""
+    key = f'leave:approvers:v{_version()}:{role}:{department_id}'
+    approvers = _cache().get(key)
+    if approvers is None:
+        approvers = [
+            {
+                "id": u.id,
+                "first_name": u.first_name,
+                "last_name": u.last_name,
+                "email": u.email,
+                "role": u.role,
+            }
+            for u in LeaveRequest.approvers_for_scope(role, department_id)
+        ]
+        _cache().set(key, approvers, getattr(settings, 'LEAVE_APPROVER_CACHE_TIMEOUT', 60))
+    return approvers
+
+
+def invalidate_approver_directory():
+    try:
+        _cache().incr(VERSION_KEY)
+    except ValueError:
+        _cache().set(VERSION_KEY, time.time_ns(), timeout=None)
@@ -0,0 +1,124 @@
+"""LeaveBalance ledger maintenance.
+
+Every approved, non-deleted request adds its days to two LeaveBalance rows
+for the year it starts in: the row for its leave type (when it has one)
+and the user's total row (null leave type). A request counts its
+`duration_days` when set and its working days (see
+leave.services.working_calendar) otherwise; approving a request stores
+that working-day count in `duration_days`, so holidays added later do not
+change what an approved request counts.
+
+leave.signals applies the difference between a request's previous and new
+contribution on every save and delete, locking the affected rows and
+incrementing `used` with F-expressions so concurrent decisions cannot lose
+updates. Writes that bypass signals (queryset.update()) must call
+`apply_balance_delta` themselves; `rebuild_leave_balances` reconciles the
+ledger from history.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import ExtractYear
+
+from leave.models import LeaveBalance, LeaveRequest, LeaveType
+from .working_calendar import working_days
+
+
+def request_days(start_date, end_date, duration_days=None):
+    if duration_days is not None:
+        return Decimal(duration_days)
+    return Decimal(working_days(start_date, end_date))
+
+
+def ledger_entry(request):
+    """Return (user_id, leave_type_id, year, days) for a counted request, else None."""
+    if request.status != LeaveRequest.Status.APPROVED or request.deleted_at is not None:
+        return None
+    return (
+        request.employee_id,
+        request.leave_type_id,
+        request.start_date.year,
+        request_days(request.start_date, request.end_date, request.duration_days),
+    )
+
+
+def _locked_balance(user_id, leave_type_id, year):
+    lookup = {'user_id': user_id, 'leave_type_id': leave_type_id, 'year': year}
+    balance = LeaveBalance.objects.select_for_update().filter(**lookup).first()
+    if balance is not None:
+        return balance
+    allowance = 0
+    if leave_type_id is not None:
+        allowance = LeaveType.all_objects.filter(pk=leave_type_id).values_list('default_allowance_days', flat=True).first() or 0
+    try:
+        with transaction.atomic():
+            return LeaveBalance.objects.create(allowance=allowance, **lookup)
+    except IntegrityError:
+        # Created concurrently; lock the winner's row instead
+        return LeaveBalance.objects.select_for_update().get(**lookup)
+
+
+def apply_balance_delta(user_id, leave_type_id, year, days):
+    """Add `days` (may be negative) to the user's total and typed balances."""
+    if not days:
+        return
+    with transaction.atomic():
+        for type_id in {None, leave_type_id}:
+            balance = _locked_balance(user_id, type_id, year)
+            LeaveBalance.objects.filter(pk=balance.pk).update(used=F('used') + days)
+
+
+def apply_ledger_change(before, after):
+    """Move a request's contribution from `before` to `after` ledger entries."""
+    if before == after:
+        return
+    with transaction.atomic():
+        if before:
+            apply_balance_delta(*before[:3], -before[3])
+        if after:
+            apply_balance_delta(*after)
+
+
+def annual_used_by_employee(employee_ids, year):
+    """Return {employee_id: days used in `year`} from the total balance rows."""
+    used = dict.fromkeys(employee_ids, Decimal('0'))
+    rows = LeaveBalance.objects.filter(
+        user_id__in=used.keys(), leave_type__isnull=True, year=year
+    ).values_list('user_id', 'used')
+    used.update(rows)
+    return used
+
+
+def history_totals(year=None):
+    """Recompute ledger values from requests.
+
+    Returns {(user_id, leave_type_id, year): days}, including the
+    (user_id, None, year) totals. Requests with a duration are summed in
+    SQL; the rest are counted with the working calendar as they stream in.
+    """
+    counted = LeaveRequest.objects.approved().filter(deleted_at__isnull=True)
+    if year is not None:
+        counted = counted.filter(start_date__year=year)
+    totals = defaultdict(Decimal)
+
+    def add(user_id, leave_type_id, ledger_year, days):
+        totals[(user_id, None, ledger_year)] += days
+        if leave_type_id is not None:
+            totals[(user_id, leave_type_id, ledger_year)] += days
+
+    dated = (
+        counted.filter(duration_days__isnull=False).order_by()
+        .annotate(ledger_year=ExtractYear('start_date'))
+        .values('employee_id', 'leave_type_id', 'ledger_year')
+        .annotate(days=Sum('duration_days'))
+    )
+    for row in dated:
+        add(row['employee_id'], row['leave_type_id'], row['ledger_year'], row['days'])
+    undated = counted.filter(duration_days__isnull=True).values_list(
+        'employee_id', 'leave_type_id', 'start_date', 'end_date'
+    )
+    for user_id, leave_type_id, start_date, end_date in undated.iterator():
+        add(user_id, leave_type_id, start_date.year, Decimal(working_days(start_date, end_date)))
+    return dict(totals)
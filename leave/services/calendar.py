@@ -0,0 +1,72 @@
+"""Per-day leave occupancy for team calendars.
+
+Approved leave intervals overlapping the requested window are fetched with
+one range query (served by the (status, start_date, end_date) index) and
+expanded with a sweep line: each interval becomes an "enter" event on its
+first visible day and a "leave" event the day after its last, so the whole
+window is walked once regardless of how many people are off.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from leave.models import LeaveRequest
+
+
+def approved_intervals(start, end, department_id=None):
+    """Approved, non-deleted leave overlapping [start, end] as value dicts."""
+    qs = LeaveRequest.objects.approved().filter(
+        deleted_at__isnull=True, start_date__lte=end, end_date__gte=start
+    )
+    if department_id is not None:
+        qs = qs.filter(employee__department_id=department_id)
+    return qs.order_by().values(
+        'id', 'employee_id', 'start_date', 'end_date',
+        'employee__first_name', 'employee__last_name', 'employee__email',
+    )
+
+
+def sweep_occupancy(intervals, start, end):
+    """Return [(day, sorted employee ids off that day)] for every day in [start, end]."""
+    events = defaultdict(list)
+    for interval in intervals:
+        first = max(interval['start_date'], start)
+        last = min(interval['end_date'], end)
+        if first > last:
+            continue
+        events[first].append((interval['employee_id'], 1))
+        events[last + timedelta(days=1)].append((interval['employee_id'], -1))
+
+    # Overlapping requests by the same person are counted once per day
+    active = defaultdict(int)
+    days = []
+    day = start
+    while day <= end:
+        for employee_id, delta in events.get(day, ()):
+            active[employee_id] += delta
+            if not active[employee_id]:
+                del active[employee_id]
+        days.append((day, sorted(active)))
+        day += timedelta(days=1)
+    return days
+
+
+def leave_calendar(start, end, department_id=None):
+    intervals = list(approved_intervals(start, end, department_id))
+    employees = {
+        i['employee_id']: {
+            'first_name': i['employee__first_name'],
+            'last_name': i['employee__last_name'],
+            'email': i['employee__email'],
+        }
+        for i in intervals
+    }
+    return {
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'department': department_id,
+        'employees': employees,
+        'days': [
+            {'date': day.isoformat(), 'count': len(ids), 'employee_ids': ids}
+            for day, ids in sweep_occupancy(intervals, start, end)
+        ],
+    }
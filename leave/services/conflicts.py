@@ -0,0 +1,97 @@
+"""Submit-time conflict checks for leave requests.
+
+Two queries: the employee's own pending/approved requests overlapping the
+new dates (served by the (status, start_date, end_date) index), and the
+department's active members left-joined to their approved leave in the
+same window, which yields the headcount and the intervals together. The
+department intervals are swept day by day (see leave.services.calendar)
+to find the day with the most people off if the request were approved.
+
+The optional `leave_max_concurrent_absences` SystemSetting caps that peak;
+0 or unset disables the check.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import FilteredRelation, Q
+
+from core.models import SystemSetting
+from leave.models import LeaveRequest
+from .calendar import sweep_occupancy
+
+MAX_CONCURRENT_SETTING = 'leave_max_concurrent_absences'
+
+
+def _department_absences(department_id, start, end):
+    """Return (headcount, approved intervals overlapping [start, end]) for a department.
+
+    Only active, non-deleted members count, for the intervals as well as
+    the headcount the ratios divide by.
+    """
+    overlapping = FilteredRelation('leave_requests', condition=Q(
+        leave_requests__status=LeaveRequest.Status.APPROVED,
+        leave_requests__deleted_at__isnull=True,
+        leave_requests__start_date__lte=end,
+        leave_requests__end_date__gte=start,
+    ))
+    rows = (
+        get_user_model().all_objects.filter(department_id=department_id, is_active=True, deleted_at__isnull=True)
+        .annotate(leave=overlapping)
+        .order_by()
+        .values_list('pk', 'leave__start_date', 'leave__end_date')
+    )
+    members, intervals = set(), []
+    for employee_id, leave_start, leave_end in rows:
+        members.add(employee_id)
+        if leave_start is not None:
+            intervals.append({'employee_id': employee_id, 'start_date': leave_start, 'end_date': leave_end})
+    return len(members), intervals
+
+
+def find_conflicts(employee_id, department_id, start, end, exclude_id=None):
+    """Return the conflict report for a request by `employee_id` over [start, end]."""
+    overlapping = LeaveRequest.objects.filter(
+        employee_id=employee_id,
+        status__in=[LeaveRequest.Status.PENDING, LeaveRequest.Status.APPROVED],
+        deleted_at__isnull=True,
+        start_date__lte=end,
+        end_date__gte=start,
+    )
+    if exclude_id is not None:
+        overlapping = overlapping.exclude(pk=exclude_id)
+    report = {
+        'overlapping_requests': [
+            {'id': r['id'], 'start_date': r['start_date'].isoformat(), 'end_date': r['end_date'].isoformat(), 'status': r['status']}
+            for r in overlapping.order_by('start_date').values('id', 'start_date', 'end_date', 'status')
+        ],
+        'department': None,
+    }
+    if department_id is None:
+        return report
+
+    headcount, intervals = _department_absences(department_id, start, end)
+    teammates = [i for i in intervals if i['employee_id'] != employee_id]
+    busiest_day, peak = start, 0
+    for day, off in sweep_occupancy(teammates, start, end):
+        if len(off) > peak:
+            busiest_day, peak = day, len(off)
+    # Count the requester as off on the busiest day
+    peak += 1
+    report['department'] = {
+        'headcount': headcount,
+        'peak_absent': peak,
+        'busiest_day': busiest_day.isoformat(),
+        'peak_absence_ratio': round(peak / headcount, 4) if headcount else None,
+        'peak_coverage_ratio': round(1 - peak / headcount, 4) if headcount else None,
+    }
+    return report
+
+
+def concurrency_violation(report):
+    """Return an error message if the report breaks the configured cap, else None."""
+    limit = SystemSetting.get_int(MAX_CONCURRENT_SETTING, default=0)
+    department = report['department']
+    if not limit or department is None or department['peak_absent'] <= limit:
+        return None
+    return (
+        f"{department['peak_absent']} people from this department would be off on "
+        f"{department['busiest_day']}; the limit is {limit}."
+    )
@@ -0,0 +1,88 @@
+"""Bulk approval and denial of leave requests.
+
+`bulk_decide` settles many pending requests in one transaction: it locks
+the requested rows, flips every eligible one with a single UPDATE, writes
+the LeaveApproval trail with one bulk_create and applies the resulting
+balance changes once per (user, leave type, year). Because the UPDATE
+bypasses model signals, the ledger and dashboard invalidation are done
+here explicitly, the latter once the transaction has committed.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from hr.signals import mark_dashboards_stale
+from leave.models import LeaveApproval, LeaveRequest
+from .balances import apply_balance_delta, request_days
+
+DECISIONS = (LeaveRequest.Status.APPROVED, LeaveRequest.Status.DENIED)
+
+
+def can_decide(approver, leave_request, memo=None):
+    """Return True if `approver` is one of the request's approvers.
+
+    Checked against the database, not the cached approver directory: that
+    cache is per process and may still list a user who was just demoted,
+    moved or deleted. `memo` caches the answer per approver scope.
+    """
+    scope = leave_request.approver_scope()
+    if memo is not None and scope in memo:
+        return memo[scope]
+    allowed = LeaveRequest.approvers_for_scope(*scope).filter(pk=approver.pk, deleted_at__isnull=True).exists()
+    if memo is not None:
+        memo[scope] = allowed
+    return allowed
+
+
+def bulk_decide(approver, ids, decision, comment=''):
+    """Apply `decision` to the pending requests in `ids`.
+
+    Returns {id: outcome} where outcome is the new status in lowercase
+    ('approved'/'denied') or one of 'not_found', 'forbidden',
+    'already_<status>'.
+    """
+    results = {pk: 'not_found' for pk in ids}
+    with transaction.atomic():
+        requests = (
+            LeaveRequest.objects.select_for_update(of=('self',))
+            .select_related('employee')
+            .filter(pk__in=results, deleted_at__isnull=True)
+        )
+        decided, allowed_scopes = [], {}
+        for leave in requests:
+            if leave.status != LeaveRequest.Status.PENDING:
+                results[leave.pk] = f'already_{leave.status.lower()}'
+            elif not can_decide(approver, leave, allowed_scopes):
+                results[leave.pk] = 'forbidden'
+            else:
+                decided.append(leave)
+                results[leave.pk] = decision.lower()
+        if not decided:
+            return results
+
+        LeaveRequest.objects.filter(pk__in=[leave.pk for leave in decided]).update(status=decision)
+        LeaveApproval.objects.bulk_create([
+            LeaveApproval(leave_request=leave, approver=approver, decision=decision, comment=comment)
+            for leave in decided
+        ])
+
+        # Pending requests hold no balance, so only approvals move the ledger
+        if decision == LeaveRequest.Status.APPROVED:
+            deltas, undated = defaultdict(int), []
+            for leave in decided:
+                if leave.duration_days is None:
+                    leave.duration_days = request_days(leave.start_date, leave.end_date)
+                    undated.append(leave)
+                key = (leave.employee_id, leave.leave_type_id, leave.start_date.year)
+                deltas[key] += leave.duration_days
+            # Store the count on approval, as leave.signals does for single saves
+            LeaveRequest.objects.bulk_update(undated, ['duration_days'], batch_size=500)
+            for (user_id, leave_type_id, year), days in deltas.items():
+                apply_balance_delta(user_id, leave_type_id, year, days)
+
+        # After commit, so a concurrent dashboard read cannot re-cache the
+        # pre-commit numbers under the new version
+        user_ids = {leave.employee_id for leave in decided}
+        department_ids = {leave.employee.department_id for leave in decided}
+        transaction.on_commit(lambda: mark_dashboards_stale(user_ids=user_ids, department_ids=department_ids))
+    return results
@@ -0,0 +1,116 @@
+"""Working-day arithmetic for leave durations.
+
+For each year the calendar builds a prefix-sum array over a bitmap of
+working days (not a LEAVE_WEEKEND_DAYS weekday, not a PublicHoliday):
+prefix[i] is the number of working days among the first i days of the
+year. The number of working days between two dates is then a difference of
+two array reads per calendar year spanned, so no caller iterates over
+date ranges.
+
+Arrays are built on first use (one holiday query per year) and kept per
+process. leave.signals calls `invalidate()` when holidays change, which
+drops this process's arrays and bumps a version stamp in the 'default'
+cache; other processes compare that stamp at most every
+VERSION_CHECK_SECONDS. The stamp only reaches other workers when the
+'default' cache is shared between them, which the locmem default is not,
+so arrays are also rebuilt once they are LEAVE_CALENDAR_MAX_AGE seconds
+old. That bounds how long a worker can miss a holiday edit.
+"""
+import threading
+import time
+from array import array
+from datetime import date, timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.core.cache import caches
+
+from leave.models import PublicHoliday
+
+VERSION_KEY = 'leave:working_calendar:version'
+VERSION_CHECK_SECONDS = 30
+
+_lock = threading.Lock()
+_prefixes = {}
+_checked = {'version': None, 'at': 0.0, 'built_at': 0.0}
+
+
+def _max_age():
+    return getattr(settings, 'LEAVE_CALENDAR_MAX_AGE', 300)
+
+
+def weekend_days():
+    """Weekday numbers (Monday=0) that are never working days."""
+    return tuple(sorted(set(getattr(settings, 'LEAVE_WEEKEND_DAYS', (5, 6)))))
+
+
+def _current_version():
+    now = time.monotonic()
+    if now - _checked['built_at'] >= _max_age():
+        # Holiday edits in other processes may never bump a local version
+        _prefixes.clear()
+        _checked['built_at'] = now
+    if _checked['version'] is not None and now - _checked['at'] < VERSION_CHECK_SECONDS:
+        return _checked['version']
+    cache = caches['default']
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(VERSION_KEY, version, timeout=None):
+            version = cache.get(VERSION_KEY, version)
+    if version != _checked['version']:
+        _prefixes.clear()
+        _checked['built_at'] = now
+    _checked.update(version=version, at=now)
+    return version
+
+
+def _year_prefix(year):
+    _current_version()
+    key = (year, weekend_days())
+    prefix = _prefixes.get(key)
+    if prefix is not None:
+        return prefix
+    with _lock:
+        prefix = _prefixes.get(key)
+        if prefix is None:
+            weekend = set(key[1])
+            holidays = set(PublicHoliday.objects.filter(date__year=year).values_list('date', flat=True))
+            first = date(year, 1, 1)
+            length = (date(year + 1, 1, 1) - first).days
+            bitmap = (
+                (first + timedelta(days=i)).weekday() not in weekend and first + timedelta(days=i) not in holidays
+                for i in range(length)
+            )
+            prefix = array('H', accumulate(bitmap, initial=0))
+            _prefixes[key] = prefix
+    return prefix
+
+
+def working_days(start, end):
+    """Number of working days in [start, end], inclusive; 0 if end < start."""
+    total = 0
+    for year in range(start.year, end.year + 1):
+        prefix = _year_prefix(year)
+        first = date(year, 1, 1)
+        lo = (max(start, first) - first).days
+        hi = (min(end, date(year, 12, 31)) - first).days
+        if hi >= lo:
+            total += prefix[hi + 1] - prefix[lo]
+    return total
+
+
+def is_working_day(day):
+    return working_days(day, day) == 1
+
+
+def invalidate():
+    """Drop this process's arrays and make other processes rebuild theirs."""
+    cache = caches['default']
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+    with _lock:
+        _prefixes.clear()
+        _checked.update(version=None, at=0.0, built_at=time.monotonic())
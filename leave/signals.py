@@ -0,0 +1,74 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from department.models import Department
+from hr.models import CustomUser
+from hr.signals import is_trivial_user_save
+from .models import LeaveRequest, PublicHoliday
+from .services import working_calendar
+from .services.approvers import APPROVER_ROLES, invalidate_approver_directory
+from .services.balances import apply_ledger_change, ledger_entry
+
+
+@receiver(post_save, sender=CustomUser, dispatch_uid='leave_approvers_user_saved')
+def refresh_approvers_on_user_save(sender, instance, update_fields=None, **kwargs):
+    if is_trivial_user_save(update_fields):
+        return
+    # hr.signals.remember_previous_scope stores the pre-save (role, department_id)
+    previous = getattr(instance, '_previous_scope', None)
+    roles = {instance.role, previous[0] if previous else None}
+    if roles & APPROVER_ROLES:
+        invalidate_approver_directory()
+
+
+@receiver(post_delete, sender=CustomUser, dispatch_uid='leave_approvers_user_deleted')
+def refresh_approvers_on_user_delete(sender, instance, **kwargs):
+    if instance.role in APPROVER_ROLES:
+        invalidate_approver_directory()
+
+
+@receiver(pre_save, sender=Department, dispatch_uid='leave_approvers_department_pre_save')
+def remember_previous_manager(sender, instance, **kwargs):
+    instance._previous_manager_id = (
+        Department.all_objects.filter(pk=instance.pk).values_list('manager_id', flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Department, dispatch_uid='leave_approvers_department_saved')
+def refresh_approvers_on_department_save(sender, instance, created, **kwargs):
+    if not created and getattr(instance, '_previous_manager_id', None) != instance.manager_id:
+        invalidate_approver_directory()
+
+
+@receiver(post_delete, sender=Department, dispatch_uid='leave_approvers_department_deleted')
+def refresh_approvers_on_department_delete(sender, instance, **kwargs):
+    invalidate_approver_directory()
+
+
+@receiver(pre_save, sender=LeaveRequest, dispatch_uid='leave_balance_pre_save')
+def remember_ledger_entry(sender, instance, **kwargs):
+    """Keep the stored request's ledger contribution for the post_save delta."""
+    previous = LeaveRequest.all_objects.filter(pk=instance.pk).first() if instance.pk else None
+    instance._previous_ledger_entry = ledger_entry(previous) if previous else None
+
+
+@receiver(post_save, sender=LeaveRequest, dispatch_uid='leave_balance_saved')
+def update_balance_on_save(sender, instance, **kwargs):
+    entry = ledger_entry(instance)
+    if entry and instance.duration_days is None:
+        # Store the count on approval so later holiday edits cannot shift the ledger
+        instance.duration_days = entry[3]
+        LeaveRequest.all_objects.filter(pk=instance.pk).update(duration_days=entry[3])
+    apply_ledger_change(getattr(instance, '_previous_ledger_entry', None), entry)
+
+
+@receiver(post_delete, sender=LeaveRequest, dispatch_uid='leave_balance_deleted')
+def update_balance_on_delete(sender, instance, **kwargs):
+    apply_ledger_change(ledger_entry(instance), None)
+
+
+@receiver(post_save, sender=PublicHoliday, dispatch_uid='working_calendar_holiday_saved')
+@receiver(post_delete, sender=PublicHoliday, dispatch_uid='working_calendar_holiday_deleted')
+def refresh_working_calendar(sender, **kwargs):
+    working_calendar.invalidate()
@@ -1,3 +1,348 @@
-from django.test import TestCase
+import os
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from core import settings_cache
+from core.models import SystemSetting
+from department.models import Department
+from hr.services.dashboard_cache import dashboard_cache_key
+from .models import LeaveApproval, LeaveBalance, LeaveRequest, LeaveType, PublicHoliday
+from .services import working_calendar
+from .services.conflicts import find_conflicts
+from .services.decisions import bulk_decide
+from .services.approvers import approver_directory, invalidate_approver_directory
+
+
+def monday(day):
+    """The first Monday on or after `day`, so fixtures fall on known weekdays."""
+    return day + timedelta(days=-day.weekday() % 7)
+
+
+class LeaveRequestListQueryTests(APITestCase):
+    def setUp(self):
+        settings_cache.invalidate()
+        settings_cache.get_int('annual_leave_request_max_days')
+        User = get_user_model()
+        self.dept = Department.objects.create(name="Ops", code="OPS")
+        self.hr = User.objects.create_user(email="hr@example.com", password="pass", role="hr")
+        User.objects.create_user(email="mgr@example.com", password="pass", role="manager", department=self.dept)
+        self.employees = [
+            User.objects.create_user(email=f"emp{i}@example.com", password="pass", role="employee", department=self.dept)
+            for i in range(4)
+        ]
+        self.year_start = timezone.now().date().replace(month=1, day=1)
+        self.client.force_authenticate(user=self.hr)
+
+    def _add_requests(self, per_employee):
+        for emp in self.employees:
+            for i in range(per_employee):
+                start = self.year_start + timedelta(days=10 * i)
+                LeaveRequest.objects.create(employee=emp, start_date=start, end_date=start + timedelta(days=1), status=LeaveRequest.Status.APPROVED)
+
+    def _list_query_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get('/api/leaves/leave-requests/')
+        self.assertEqual(res.status_code, 200)
+        return len(ctx.captured_queries), res.data
+
+    def test_list_query_count_does_not_grow_with_rows(self):
+        self._add_requests(1)
+        self._list_query_count()  # warm the approver directory
+        small, _ = self._list_query_count()
+        self._add_requests(1)
+        large, data = self._list_query_count()
+        self.assertEqual(small, large)
+        self.assertEqual(data['count'], 8)
+
+    def test_yearly_totals_match_per_request_rules(self):
+        emp = self.employees[0]
+        start = monday(self.year_start + timedelta(days=40))
+        # duration_days wins when set; otherwise the inclusive span counts
+        LeaveRequest.objects.create(employee=emp, start_date=start, end_date=start + timedelta(days=4), status=LeaveRequest.Status.APPROVED, duration_days=Decimal('2.5'))
+        LeaveRequest.objects.create(employee=emp, start_date=start, end_date=start + timedelta(days=2), status=LeaveRequest.Status.APPROVED)
+        LeaveRequest.objects.create(employee=emp, start_date=start, end_date=start)
+        _, data = self._list_query_count()
+        rows = [r for r in data['results'] if r['employee'] == emp.pk]
+        self.assertEqual({r['yearly_granted_days'] for r in rows}, {5.5})
+        self.assertEqual({r['yearly_remaining_days'] for r in rows}, {9.5})
+        self.assertEqual(len(rows[0]['approvers']), 2)
+
+
+class ApproverDirectoryTests(APITestCase):
+    def setUp(self):
+        invalidate_approver_directory()
+        User = get_user_model()
+        self.dept = Department.objects.create(name="Ops", code="OPS")
+        self.hr = User.objects.create_user(email="hr@example.com", password="pass", role="hr")
+        self.manager = User.objects.create_user(email="mgr@example.com", password="pass", role="manager", department=self.dept)
+        self.emp = User.objects.create_user(email="emp@example.com", password="pass", role="employee", department=self.dept)
+
+    def _emails(self):
+        return sorted(a['email'] for a in approver_directory('employee', self.dept.pk))
+
+    def test_directory_is_cached_until_an_approver_changes(self):
+        self.assertEqual(self._emails(), ['hr@example.com', 'mgr@example.com'])
+        with self.assertNumQueries(0):
+            self._emails()
+
+        # Employee-only changes keep the cache
+        self.emp.first_name = 'Renamed'
+        self.emp.save()
+        with self.assertNumQueries(0):
+            self._emails()
+
+        self.manager.role = 'employee'
+        self.manager.save()
+        self.assertEqual(self._emails(), ['hr@example.com'])
+
+        get_user_model().objects.create_user(email="ceo@example.com", password="pass", role="ceo")
+        self.assertEqual(self._emails(), ['ceo@example.com', 'hr@example.com'])
+
+    def test_department_manager_change_invalidates(self):
+        self._emails()
+        self.dept.manager = self.manager
+        self.dept.save()
+        with self.assertNumQueries(1):
+            self._emails()
+
+
+class LeaveBalanceLedgerTests(APITestCase):
+    def setUp(self):
+        settings_cache.invalidate()
+        self.emp = get_user_model().objects.create_user(email="emp@example.com", password="pass", role="employee")
+        self.annual = LeaveType.objects.create(code='annual', name='Annual', default_allowance_days=Decimal('20'))
+        self.year = timezone.now().year
+        self.start = monday(date(self.year, 1, 5))
+
+    def _used(self, leave_type=None):
+        return LeaveBalance.objects.get(user=self.emp, leave_type=leave_type, year=self.year).used
+
+    def test_ledger_follows_decisions_and_soft_deletes(self):
+        leave = LeaveRequest.objects.create(employee=self.emp, leave_type=self.annual, start_date=self.start, end_date=self.start + timedelta(days=2))
+        self.assertFalse(LeaveBalance.objects.exists())
+
+        leave.status = LeaveRequest.Status.APPROVED
+        leave.save()
+        self.assertEqual((self._used(), self._used(self.annual)), (3, 3))
+        self.assertEqual(LeaveBalance.objects.get(leave_type=self.annual).allowance, 20)
+
+        # The count is stored on approval; a holiday added later does not move it
+        self.addCleanup(working_calendar.invalidate)
+        PublicHoliday.objects.create(date=self.start, name="Holiday")
+        leave.refresh_from_db()
+        self.assertEqual(leave.duration_days, 3)
+        leave.save()
+        call_command('rebuild_leave_balances', stdout=open(os.devnull, 'w'))
+        self.assertEqual(self._used(), 3)
+
+        leave.duration_days = Decimal('2.5')
+        leave.save()
+        self.assertEqual(self._used(), Decimal('2.5'))
+
+        leave.soft_delete()
+        self.assertEqual((self._used(), self._used(self.annual)), (0, 0))
+
+    def test_cap_check_reads_ledger_and_rejects_with_400(self):
+        # Three working weeks (15 days) use up the default cap
+        LeaveRequest.objects.create(employee=self.emp, start_date=self.start, end_date=self.start + timedelta(days=18), status=LeaveRequest.Status.APPROVED)
+        self.client.force_authenticate(user=self.emp)
+        june = monday(date(self.year, 6, 1))
+        payload = {'start_date': june, 'end_date': june + timedelta(days=1)}
+        res = self.client.post('/api/leaves/leave-requests/', payload)
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('annual allowed leave request limit', str(res.data))
+
+    def test_rebuild_command_reconciles_drift(self):
+        LeaveRequest.objects.create(employee=self.emp, leave_type=self.annual, start_date=self.start, end_date=self.start, status=LeaveRequest.Status.APPROVED)
+        LeaveBalance.objects.update(used=Decimal('9'))
+        # Writes that bypass signals leave the ledger stale until rebuilt
+        LeaveRequest.objects.filter(employee=self.emp).update(duration_days=Decimal('0.5'))
+        call_command('rebuild_leave_balances', stdout=open(os.devnull, 'w'))
+        self.assertEqual((self._used(), self._used(self.annual)), (Decimal('0.5'), Decimal('0.5')))
+
+
+class LeaveBulkDecisionTests(APITestCase):
+    def setUp(self):
+        invalidate_approver_directory()
+        User = get_user_model()
+        self.ops = Department.objects.create(name="Ops", code="OPS")
+        other = Department.objects.create(name="Sales", code="SAL")
+        self.manager = User.objects.create_user(email="mgr@example.com", password="pass", role="manager", department=self.ops)
+        self.emp = User.objects.create_user(email="emp@example.com", password="pass", role="employee", department=self.ops)
+        outsider = User.objects.create_user(email="out@example.com", password="pass", role="employee", department=other)
+        start = monday(date(timezone.now().year, 3, 2))
+        self.pending = [
+            LeaveRequest.objects.create(employee=self.emp, start_date=start + timedelta(days=7 * i), end_date=start + timedelta(days=7 * i + 1))
+            for i in range(3)
+        ]
+        self.foreign = LeaveRequest.objects.create(employee=outsider, start_date=start, end_date=start)
+        self.done = LeaveRequest.objects.create(employee=self.emp, start_date=start, end_date=start, status=LeaveRequest.Status.DENIED)
+        self.client.force_authenticate(user=self.manager)
+
+    def test_bulk_approve_reports_per_id_results(self):
+        ids = [r.pk for r in self.pending] + [self.foreign.pk, self.done.pk, 999999]
+        res = self.client.post('/api/leaves/bulk-decide/', {'ids': ids, 'decision': 'approved', 'comment': 'ok'}, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['updated'], 3)
+        self.assertEqual([r['result'] for r in res.data['results']], ['approved'] * 3 + ['forbidden', 'already_denied', 'not_found'])
+
+        self.assertEqual(LeaveRequest.objects.filter(status=LeaveRequest.Status.APPROVED).count(), 3)
+        self.assertEqual(LeaveApproval.objects.filter(approver=self.manager, decision='APPROVED', comment='ok').count(), 3)
+        year = timezone.now().year
+        self.assertEqual(LeaveBalance.objects.get(user=self.emp, leave_type=None, year=year).used, 6)
+        self.assertEqual(set(LeaveRequest.objects.filter(pk__in=ids[:3]).values_list('duration_days', flat=True)), {2})
+
+    def test_demoted_approver_is_forbidden_despite_cached_directory(self):
+        approver_directory('employee', self.ops.pk)
+        # A bulk update skips the signals that would invalidate the directory
+        get_user_model().objects.filter(pk=self.manager.pk).update(role='employee')
+        ids = [r.pk for r in self.pending]
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post('/api/leaves/bulk-decide/', {'ids': ids, 'decision': 'approved'}, format='json')
+        self.assertEqual([r['result'] for r in res.data['results']], ['forbidden'] * 3)
+        self.assertEqual(LeaveRequest.objects.filter(status=LeaveRequest.Status.PENDING).count(), 4)
+        # One authorization query for the shared scope, not one per request
+        self.assertEqual(sum(q['sql'].startswith('SELECT 1 AS') and '"role"' in q['sql'] for q in ctx.captured_queries), 1)
+
+    def test_dashboards_are_invalidated_after_commit(self):
+        key = dashboard_cache_key(self.emp)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            bulk_decide(self.manager, [self.pending[0].pk], LeaveRequest.Status.APPROVED)
+            self.assertEqual(dashboard_cache_key(self.emp), key)
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(dashboard_cache_key(self.emp), key)
+
+    def test_invalid_decision_is_rejected(self):
+        res = self.client.post('/api/leaves/bulk-decide/', {'ids': [self.pending[0].pk], 'decision': 'maybe'}, format='json')
+        self.assertEqual(res.status_code, 400)
+
+
+class LeaveCalendarTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.ops = Department.objects.create(name="Ops", code="OPS")
+        self.sales = Department.objects.create(name="Sales", code="SAL")
+        self.a = User.objects.create_user(email="a@example.com", password="pass", role="employee", department=self.ops)
+        self.b = User.objects.create_user(email="b@example.com", password="pass", role="employee", department=self.ops)
+        outsider = User.objects.create_user(email="c@example.com", password="pass", role="employee", department=self.sales)
+        approved = LeaveRequest.Status.APPROVED
+        LeaveRequest.objects.create(employee=self.a, start_date=date(2025, 4, 28), end_date=date(2025, 5, 2), status=approved)
+        LeaveRequest.objects.create(employee=self.b, start_date=date(2025, 5, 2), end_date=date(2025, 5, 3), status=approved)
+        # Overlapping request by the same person counts once per day
+        LeaveRequest.objects.create(employee=self.a, start_date=date(2025, 5, 1), end_date=date(2025, 5, 1), status=approved)
+        LeaveRequest.objects.create(employee=self.b, start_date=date(2025, 5, 1), end_date=date(2025, 5, 1))
+        LeaveRequest.objects.create(employee=outsider, start_date=date(2025, 5, 1), end_date=date(2025, 5, 1), status=approved)
+
+    def test_calendar_counts_each_day_in_range(self):
+        self.client.force_authenticate(user=self.a)
+        with self.assertNumQueries(1):
+            res = self.client.get('/api/leaves/calendar/', {'from': '2025-05-01', 'to': '2025-05-04'})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['department'], self.ops.pk)
+        self.assertEqual(
+            [(d['date'], d['employee_ids']) for d in res.data['days']],
+            [('2025-05-01', [self.a.pk]), ('2025-05-02', [self.a.pk, self.b.pk]), ('2025-05-03', [self.b.pk]), ('2025-05-04', [])],
+        )
+
+    def test_other_departments_are_hidden_from_non_hr(self):
+        self.client.force_authenticate(user=self.a)
+        res = self.client.get('/api/leaves/calendar/', {'department': self.sales.pk})
+        self.assertEqual(res.status_code, 403)
+
+
+class LeaveConflictTests(APITestCase):
+    def setUp(self):
+        settings_cache.invalidate()
+        User = get_user_model()
+        self.dept = Department.objects.create(name="Ops", code="OPS")
+        self.emp = User.objects.create_user(email="emp@example.com", password="pass", role="employee", department=self.dept)
+        mates = [
+            User.objects.create_user(email=f"mate{i}@example.com", password="pass", role="employee", department=self.dept)
+            for i in range(3)
+        ]
+        self.year = timezone.now().year
+        for i, mate in enumerate(mates[:2]):
+            LeaveRequest.objects.create(employee=mate, start_date=date(self.year, 7, 1 + i), end_date=date(self.year, 7, 3), status=LeaveRequest.Status.APPROVED)
+        self.own = LeaveRequest.objects.create(employee=self.emp, start_date=date(self.year, 7, 3), end_date=date(self.year, 7, 4))
+        self.client.force_authenticate(user=self.emp)
+
+    def _submit(self):
+        return self.client.post('/api/leaves/leave-requests/', {'start_date': date(self.year, 7, 2), 'end_date': date(self.year, 7, 3)})
+
+    def test_conflicts_are_reported_on_submit(self):
+        res = self._submit()
+        self.assertEqual(res.status_code, 201)
+        conflicts = res.data['conflicts']
+        self.assertEqual([r['id'] for r in conflicts['overlapping_requests']], [self.own.pk])
+        self.assertEqual(conflicts['department']['headcount'], 4)
+        self.assertEqual(conflicts['department']['peak_absent'], 3)
+        self.assertEqual(conflicts['department']['busiest_day'], date(self.year, 7, 2).isoformat())
+        self.assertEqual(conflicts['department']['peak_coverage_ratio'], 0.25)
+
+    def test_hr_form_submission_does_not_count_the_employee_twice(self):
+        LeaveRequest.objects.filter(pk=self.own.pk).update(status=LeaveRequest.Status.APPROVED)
+        self.client.force_authenticate(user=get_user_model().objects.create_user(email="hr@example.com", password="pass", role="hr"))
+        payload = {'employee': self.emp.pk, 'start_date': date(self.year, 7, 3), 'end_date': date(self.year, 7, 3)}
+        form = self.client.post('/api/leaves/leave-requests/', payload)
+        as_json = self.client.post('/api/leaves/leave-requests/', payload, format='json')
+        self.assertEqual((form.status_code, as_json.status_code), (201, 201))
+        self.assertEqual(form.data['conflicts']['department'], as_json.data['conflicts']['department'])
+        self.assertEqual(form.data['conflicts']['department']['peak_absent'], 3)
+
+        payload['employee'] = 'abc'
+        self.assertEqual(self.client.post('/api/leaves/leave-requests/', payload).status_code, 400)
+
+    def test_one_query_for_own_requests_and_one_for_the_department(self):
+        inactive = get_user_model().objects.create_user(email="gone@example.com", password="pass", role="employee", department=self.dept, is_active=False)
+        LeaveRequest.objects.create(employee=inactive, start_date=date(self.year, 7, 2), end_date=date(self.year, 7, 2), status=LeaveRequest.Status.APPROVED)
+        with self.assertNumQueries(2):
+            report = find_conflicts(self.emp.pk, self.dept.pk, date(self.year, 7, 2), date(self.year, 7, 3))
+        self.assertEqual((report['department']['headcount'], report['department']['peak_absent']), (4, 3))
+
+    def test_max_concurrent_absences_setting_is_enforced(self):
+        SystemSetting.objects.create(key='leave_max_concurrent_absences', int_value=2)
+        res = self._submit()
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.data['conflicts']['department']['peak_absent'], 3)
+        self.assertFalse(LeaveRequest.objects.filter(start_date=date(self.year, 7, 2), employee=self.emp).exists())
+
+
+class WorkingCalendarTests(APITestCase):
+    def setUp(self):
+        working_calendar.invalidate()
+        self.addCleanup(working_calendar.invalidate)
+        self.emp = get_user_model().objects.create_user(email="emp@example.com", password="pass", role="employee")
+
+    def test_weekends_and_holidays_are_excluded(self):
+        # Mon 2024-12-30 .. Fri 2025-01-10 spans a year boundary and one weekend in between
+        self.assertEqual(working_calendar.working_days(date(2024, 12, 30), date(2025, 1, 10)), 10)
+        PublicHoliday.objects.create(date=date(2025, 1, 1), name="New Year")
+        with self.assertNumQueries(2):
+            self.assertEqual(working_calendar.working_days(date(2024, 12, 30), date(2025, 1, 10)), 9)
+        with self.assertNumQueries(0):
+            self.assertEqual(working_calendar.working_days(date(2025, 1, 4), date(2025, 1, 5)), 0)
+
+    def test_arrays_expire_without_a_version_bump(self):
+        span = (date(2024, 12, 30), date(2025, 1, 10))
+        self.assertEqual(working_calendar.working_days(*span), 10)
+        # A holiday added by another worker: no signal and no version bump here
+        PublicHoliday.objects.bulk_create([PublicHoliday(date=date(2025, 1, 1), name="New Year")])
+        self.assertEqual(working_calendar.working_days(*span), 10)
+        with override_settings(LEAVE_CALENDAR_MAX_AGE=0):
+            self.assertEqual(working_calendar.working_days(*span), 9)
+
+    def test_duration_days_counts_working_days(self):
+        PublicHoliday.objects.create(date=date(2031, 6, 2), name="Holiday")
+        self.client.force_authenticate(user=self.emp)
+        # Fri 2031-05-30 .. Tue 2031-06-03: Fri, Mon (holiday), Tue -> 2 days
+        res = self.client.post('/api/leaves/leave-requests/', {'start_date': '2031-05-30', 'end_date': '2031-06-03'})
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(LeaveRequest.objects.get(pk=res.data['id']).duration_days, 2)
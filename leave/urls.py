@@ -1,10 +1,12 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path, include
-from .views import LeaveRequestViewSet
+from .views import LeaveBulkDecisionView, LeaveCalendarView, LeaveRequestViewSet
 
 router = DefaultRouter()
 router.register(r'leave-requests', LeaveRequestViewSet, basename='leaverequest')
 
 urlpatterns = [
+    path('bulk-decide/', LeaveBulkDecisionView.as_view(), name='leave-bulk-decide'),
+    path('calendar/', LeaveCalendarView.as_view(), name='leave-calendar'),
     path('', include(router.urls)),
 ]
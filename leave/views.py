@@ -1,7 +1,19 @@
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from .models import LeaveRequest
-from .serializers import LeaveRequestSerializer
+from .serializers import LeaveBulkDecisionSerializer, LeaveRequestSerializer
+from .services.calendar import leave_calendar
+from .services.conflicts import concurrency_violation, find_conflicts
+from .services.decisions import bulk_decide
+from .services.working_calendar import working_days
+from django.contrib.auth import get_user_model
+from django.utils.dateparse import parse_date
+from calendar import monthrange
+from core.utils_audit import log_audit
+from rest_framework.views import APIView
+from .services.balances import annual_used_by_employee
+from rest_framework.exceptions import ValidationError
+from django.utils import timezone
 import logging
 from rest_framework.response import Response
 
@@ -17,18 +29,47 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
         role_lower = role.lower()
         # Employees only see their own leave requests
         if role_lower == 'employee':
-            return LeaveRequest.objects.filter(employee=user)
+            qs = LeaveRequest.objects.filter(employee=user)
         # HR and CEO see all, including soft-deleted
-        if role_lower in ['hr', 'ceo']:
-            return LeaveRequest.all_objects.all()
+        elif role_lower in ['hr', 'ceo']:
+            qs = LeaveRequest.all_objects.all()
         # Others see only active
-        return LeaveRequest.objects.all()
+        else:
+            qs = LeaveRequest.objects.all()
+        # The serializer reads the employee's name, role and department on every row
+        return qs.select_related('employee')
     serializer_class = LeaveRequestSerializer
     permission_classes = [IsAuthenticated]
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+
+        # Precompute per-row lookups for the whole page: yearly approved totals
+        # from the balance ledger in one query, approvers once per (role, department)
+        context = self.get_serializer_context()
+        context['yearly_granted_days'] = annual_used_by_employee(
+            {r.employee_id for r in rows}, timezone.now().year
+        )
+        context['approvers_by_scope'] = {}
+        serializer = self.get_serializer_class()(rows, many=True, context=context)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
     def create(self, request, *args, **kwargs):
+        self._conflicts = None
         try:
-            return super().create(request, *args, **kwargs)
+            response = super().create(request, *args, **kwargs)
+            # Overlaps and department coverage found by perform_create
+            response.data['conflicts'] = self._conflicts
+            return response
+        except ValidationError as exc:
+            # Validation and cap errors are client errors, not server failures
+            if self._conflicts is None:
+                raise
+            return Response({**exc.detail, 'conflicts': self._conflicts}, status=400)
         except Exception as e:
             logger.exception("Error creating leave request")
             return Response({"error": "An error occurred while creating the leave request."}, status=500)
@@ -57,8 +98,14 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
         if role == 'hr':
             employee_id = self.request.data.get('employee')
             if not employee_id:
-                from rest_framework.exceptions import ValidationError
                 raise ValidationError({'employee': 'This field is required for HR.'})
+            # Form-encoded bodies carry the id as a string; conflict checks compare ints
+            try:
+                employee_id = int(employee_id)
+            except (TypeError, ValueError):
+                raise ValidationError({'employee': 'A valid employee id is required.'})
+            department_id = get_user_model().objects.filter(pk=employee_id).values_list('department_id', flat=True).first()
+            self._check_conflicts(serializer, employee_id, department_id)
             instance = serializer.save(employee_id=employee_id, requested_by=user)
         else:
             # Before saving, enforce the CEO-configured yearly cap for total requested days
@@ -67,31 +114,102 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
 
             start_date = serializer.validated_data.get('start_date')
             end_date = serializer.validated_data.get('end_date')
-            requested_days = (end_date - start_date).days + 1 if start_date and end_date else 0
+            requested_days = working_days(start_date, end_date) if start_date and end_date else 0
 
-            # Calculate already granted approved days for current year
-            from django.utils import timezone
+            # Already granted days this year: one read of the user's balance row
             year = timezone.now().year
-            already_approved = LeaveRequest.objects.approved().filter(employee=user, start_date__year=year)
-            approved_total = 0
-            for r in already_approved:
-                if r.duration_days is not None:
-                    approved_total += float(r.duration_days)
-                else:
-                    approved_total += (r.end_date - r.start_date).days + 1
+            approved_total = float(annual_used_by_employee([user.pk], year)[user.pk])
 
             if approved_total + requested_days > max_days:
-                from rest_framework.exceptions import ValidationError
                 raise ValidationError({
                     'non_field_errors': [f'Request exceeds annual allowed leave request limit of {max_days} days. You have {max_days - approved_total} days remaining.']
                 })
 
+            self._check_conflicts(serializer, user.pk, user.department_id)
             instance = serializer.save(employee=user, requested_by=user)
 
-        # Auto-calc duration_days if not provided
+        # Auto-calc duration_days if not provided (weekends and public holidays excluded)
         if instance.duration_days is None and instance.start_date and instance.end_date:
-            days = (instance.end_date - instance.start_date).days + 1
-            instance.duration_days = days
+            instance.duration_days = working_days(instance.start_date, instance.end_date)
             instance.save(update_fields=['duration_days'])
+
+    def _check_conflicts(self, serializer, employee_id, department_id):
+        """Find overlaps and coverage for the new request; reject it if over the absence cap."""
+        data = serializer.validated_data
+        self._conflicts = find_conflicts(employee_id, department_id, data['start_date'], data['end_date'])
+        message = concurrency_violation(self._conflicts)
+        if message:
+            raise ValidationError({'non_field_errors': [message]})
     # Optionally, add logging to other methods as well (e.g., list, retrieve)
- 
\ No newline at end of file
+ 
+
+
+class LeaveBulkDecisionView(APIView):
+    """POST /api/leaves/bulk-decide/ — approve or deny many pending requests at once.
+
+    Body: {"ids": [..], "decision": "APPROVED" | "DENIED", "comment": ""}.
+    Requests the caller may not decide are reported as 'forbidden' rather
+    than failing the whole batch.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = LeaveBulkDecisionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        results = bulk_decide(request.user, data['ids'], data['decision'], data['comment'])
+
+        decided = [pk for pk, outcome in results.items() if outcome == data['decision'].lower()]
+        if decided:
+            log_audit(
+                request, action='leave_bulk_decided',
+                summary=f"{data['decision'].title()} {len(decided)} leave requests",
+                target_model='leave.LeaveRequest', extra={'ids': decided},
+            )
+        return Response({
+            'decision': data['decision'],
+            'updated': len(decided),
+            'results': [{'id': pk, 'result': outcome} for pk, outcome in results.items()],
+        })
+
+
+class LeaveCalendarView(APIView):
+    """GET /api/leaves/calendar/?department=&from=&to= — who is off on each day.
+
+    HR and CEO may ask for any department (or all, by omitting it); everyone
+    else only sees their own department. Defaults to the current month;
+    ranges are capped at MAX_DAYS.
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_DAYS = 366
+
+    def get(self, request):
+        user = request.user
+        params = request.query_params
+        today = timezone.localdate()
+        try:
+            start = parse_date(params['from']) if params.get('from') else today.replace(day=1)
+            end = parse_date(params['to']) if params.get('to') else start.replace(day=monthrange(start.year, start.month)[1])
+        except ValueError:
+            start = end = None
+        if start is None or end is None:
+            return Response({'detail': 'from/to must be dates (YYYY-MM-DD).'}, status=400)
+        if end < start:
+            return Response({'detail': '`to` must not be before `from`.'}, status=400)
+        if (end - start).days + 1 > self.MAX_DAYS:
+            return Response({'detail': f'Range is limited to {self.MAX_DAYS} days.'}, status=400)
+
+        department = params.get('department')
+        if department is not None and not str(department).isdigit():
+            return Response({'detail': 'department must be an id.'}, status=400)
+        department = int(department) if department is not None else None
+
+        role = str(getattr(user, 'role', '') or '').lower()
+        if role not in ('hr', 'ceo'):
+            if user.department_id is None:
+                return Response({'detail': 'You are not assigned to a department.'}, status=400)
+            if department not in (None, user.department_id):
+                return Response({'detail': 'You can only view your own department.'}, status=403)
+            department = user.department_id
+
+        return Response(leave_calendar(start, end, department))
@@ -0,0 +1,28 @@
+"""
+Recreate every TaskSearchDocument from tasks and their comments.
+
+Migration tasks.0003 builds the documents on deploy; run this after bulk
+writes to tasks or comments that bypassed the model signals. The vendor index follows the
+documents, so nothing else needs rebuilding.
+"""
+from django.core.management.base import BaseCommand
+
+from tasks.models import Task, TaskSearchDocument
+from tasks.services.search import refresh_task_documents
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the task search documents'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        task_ids = list(Task.all_objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(task_ids), chunk_size):
+            refresh_task_documents(task_ids[start:start + chunk_size])
+        # Documents of tasks that no longer exist
+        TaskSearchDocument.objects.exclude(task__in=Task.all_objects.all()).delete()
+        count = TaskSearchDocument.objects.count()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} tasks for search.'))
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from core.search import index_operations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskSearchDocument',
+            fields=[
+                ('task', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='tasks.task')),
+                ('document', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        # FTS5 table and triggers on SQLite, a GIN tsvector index on PostgreSQL
+        *index_operations('tasks_tasksearchdocument', 'task_id'),
+    ]
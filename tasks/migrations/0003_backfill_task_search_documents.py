@@ -0,0 +1,42 @@
+from collections import defaultdict
+
+from django.db import migrations
+
+from core.search import normalize
+
+
+def backfill_documents(apps, schema_editor):
+    """Build search documents for tasks created before task search existed.
+
+    Same documents as tasks.services.search.refresh_task_documents (title
+    twice, description, comments); the search index triggers or GIN index
+    pick the rows up as they are inserted.
+    """
+    Task = apps.get_model('tasks', 'Task')
+    TaskComment = apps.get_model('tasks', 'TaskComment')
+    TaskSearchDocument = apps.get_model('tasks', 'TaskSearchDocument')
+
+    comments = defaultdict(list)
+    for task_id, content in TaskComment.objects.filter(deleted_at__isnull=True).values_list('task_id', 'content').iterator():
+        comments[task_id].append(content)
+    existing = set(TaskSearchDocument.objects.values_list('pk', flat=True))
+    tasks = Task.objects.filter(deleted_at__isnull=True).values_list('pk', 'title', 'description')
+    TaskSearchDocument.objects.bulk_create(
+        [
+            TaskSearchDocument(task_id=pk, document=normalize(title, title, description, *comments[pk]))
+            for pk, title, description in tasks.iterator()
+            if pk not in existing
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_tasksearchdocument'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
@@ -70,3 +70,14 @@ class TaskAttachment(SoftDeleteModel):
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     file = models.FileField(upload_to="task_attachments/%Y/%m/%d/")
     uploaded_at = models.DateTimeField(auto_now_add=True)
+
+
+class TaskSearchDocument(models.Model):
+    """Denormalized searchable text for one task: title, description and comments.
+
+    Kept current by tasks.signals and indexed by the vendor search index
+    (see core.search); `manage.py rebuild_task_search_index` recreates it.
+    """
+    task = models.OneToOneField(Task, on_delete=models.CASCADE, primary_key=True, related_name="search_document")
+    document = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,60 @@
+"""Task search (TaskSearchDocument + core.search)."""
+from collections import defaultdict
+
+from core.search import highlight, normalize, search, terms
+from tasks.models import Task, TaskComment, TaskSearchDocument
+
+SNIPPET_WIDTH = 160
+
+
+def refresh_task_documents(task_ids):
+    """Rewrite the search documents of `task_ids`; soft-deleted tasks are dropped.
+
+    Title words are indexed twice so that title hits rank above matches
+    that only occur in the description or comments.
+    """
+    task_ids = set(task_ids) - {None}
+    if not task_ids:
+        return
+    tasks = list(Task.objects.filter(pk__in=task_ids).only('pk', 'title', 'description'))
+    comments = defaultdict(list)
+    for task_id, content in TaskComment.objects.filter(task_id__in=task_ids).values_list('task_id', 'content'):
+        comments[task_id].append(content)
+    TaskSearchDocument.objects.filter(pk__in=task_ids - {t.pk for t in tasks}).delete()
+    TaskSearchDocument.objects.bulk_create(
+        [
+            TaskSearchDocument(task=task, document=normalize(task.title, task.title, task.description, *comments[task.pk]))
+            for task in tasks
+        ],
+        batch_size=1000, update_conflicts=True, unique_fields=['task'], update_fields=['document', 'updated_at'],
+    )
+
+
+def search_tasks(text, queryset, limit=20):
+    """Tasks from `queryset` matching `text`, best first, each with `highlights`.
+
+    `highlights` holds the marked-up title, a description snippet and a
+    snippet of the first matching comment (None where nothing matched).
+    """
+    ids = search(TaskSearchDocument, text, limit=limit, queryset=queryset)
+    tasks = queryset.in_bulk(ids)
+    comments = defaultdict(list)
+    for task_id, content in TaskComment.objects.filter(task_id__in=ids).order_by('created_at').values_list('task_id', 'content'):
+        comments[task_id].append(content)
+
+    query_terms = terms(text)
+    results = []
+    for pk in ids:
+        if pk not in tasks:
+            continue
+        task = tasks[pk]
+        task.highlights = {
+            'title': highlight(task.title, query_terms),
+            'description': highlight(task.description, query_terms, width=SNIPPET_WIDTH),
+            'comment': next(
+                (snippet for snippet in (highlight(c, query_terms, width=SNIPPET_WIDTH) for c in comments[pk]) if snippet),
+                None,
+            ),
+        }
+        results.append(task)
+    return results
@@ -0,0 +1,37 @@
+"""Which tasks a user can see; shared by every task viewset.
+
+CEO, HR and superusers see every task. Managers see their department's
+tasks plus tasks they created or are assigned to; employees see tasks they
+created or are assigned to.
+
+`visible_task_ids()` expresses the restricted cases as a UNION ALL of
+single-table id queries (tasks by department, tasks by creator, rows of
+the assignee table), used as an `IN (...)` subquery. The outer list then
+never joins the assignee table and needs no DISTINCT; duplicates in the
+union are harmless under IN.
+"""
+from tasks.models import Task
+from tasks.permissions import is_hr_or_ceo, is_manager
+
+
+def visible_task_ids(user):
+    """An id subquery of the tasks `user` can see, or None when unrestricted."""
+    if is_hr_or_ceo(user):
+        return None
+    Assignee = Task.assignees.through
+    branches = [
+        Task.objects.filter(creator_id=user.pk).order_by().values('pk'),
+        Assignee.objects.filter(**{f'{Task.assignees.field.m2m_reverse_field_name()}_id': user.pk}).values('task_id'),
+    ]
+    if is_manager(user) and user.department_id:
+        branches.append(Task.objects.filter(department_id=user.department_id).order_by().values('pk'))
+    first, *rest = branches
+    return first.union(*rest, all=True)
+
+
+def visible(queryset, user, field='pk'):
+    """Restrict `queryset` to rows whose `field` points at a task `user` can see."""
+    ids = visible_task_ids(user)
+    if ids is None:
+        return queryset
+    return queryset.filter(**{f'{field}__in': ids})
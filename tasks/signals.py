@@ -1,8 +1,9 @@
-from django.db.models.signals import m2m_changed, post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from django.core.mail import send_mail
 from django.conf import settings
-from .models import Task, TaskAssignment
+from .models import Task, TaskAssignment, TaskComment
+from .services.search import refresh_task_documents
 
 
 def _send_notification_email(subject, message, recipient_list):
@@ -39,3 +40,14 @@ def notify_task_assigned(sender, instance: TaskAssignment, created, **kwargs):
             message=f"You have been assigned to task '{instance.task.title}'.",
             recipient_list=[instance.assigned_to.email],
         )
+
+
+@receiver(post_save, sender=Task)
+def refresh_task_search_document(sender, instance: Task, **kwargs):
+    refresh_task_documents({instance.pk})
+
+
+@receiver(post_save, sender=TaskComment)
+@receiver(post_delete, sender=TaskComment)
+def refresh_commented_task_search_document(sender, instance: TaskComment, **kwargs):
+    refresh_task_documents({instance.task_id})
@@ -1,9 +1,11 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from department.models import Department
-from .models import Task
+from .models import Task, TaskAssignment, TaskComment
 
 
 class TaskFlowTests(APITestCase):
@@ -52,3 +54,104 @@ class TaskFlowTests(APITestCase):
         items = data.get("results", data)  # handle paginated or non-paginated
         ids = [t["id"] for t in items]
         self.assertIn(task_id, ids)
+
+
+class TaskSearchTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.manager = User.objects.create_user(email="mgr@example.com", password="pass", role="manager")
+        self.emp = User.objects.create_user(email="emp@example.com", password="pass", role="employee")
+        self.dept = Department.objects.create(name="IT", code="IT", manager=self.manager)
+        self.manager.department = self.dept
+        self.manager.save(update_fields=["department"])
+        self.report = Task.objects.create(
+            title="Quarterly report", description="Collect <KPIs> from every team and compile the quarterly summary.",
+            creator=self.manager, department=self.dept,
+        )
+        self.other = Task.objects.create(title="Office move", description="Pack the quarterly archive boxes.", creator=self.manager)
+        self.client.force_authenticate(user=self.manager)
+
+    def _search(self, q, client=None):
+        res = (client or self.client).get("/api/tasks/search/", {"q": q})
+        self.assertEqual(res.status_code, 200)
+        return res.data["results"]
+
+    def test_ranked_hits_with_highlights(self):
+        results = self._search("quarter")
+        self.assertEqual([r["id"] for r in results], [self.report.id, self.other.id])
+        self.assertEqual(results[0]["highlights"]["title"], "<mark>Quarterly</mark> report")
+        self.assertIn("&lt;<mark>KPIs</mark>&gt;", self._search("kpi")[0]["highlights"]["description"])
+        self.assertEqual(self.client.get("/api/tasks/search/").status_code, 400)
+
+    def test_comments_are_indexed_and_list_search_uses_the_index(self):
+        comment = TaskComment.objects.create(task=self.other, author=self.manager, content="Movers arrive Thursday")
+        results = self._search("thurs")
+        self.assertEqual([r["id"] for r in results], [self.other.id])
+        self.assertEqual(results[0]["highlights"]["comment"], "Movers arrive <mark>Thursday</mark>")
+
+        res = self.client.get("/api/tasks/", {"search": "movers"})
+        self.assertEqual([t["id"] for t in res.data["results"]], [self.other.id])
+        comment.delete()
+        self.assertEqual(self._search("thurs"), [])
+
+    def test_results_respect_task_scoping(self):
+        client = APIClient()
+        client.force_authenticate(user=self.emp)
+        self.assertEqual(self._search("quarterly", client), [])
+        self.other.assignees.add(self.emp)
+        self.assertEqual([r["id"] for r in self._search("quarterly", client)], [self.other.id])
+
+
+class TaskVisibilityTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.manager = User.objects.create_user(email="mgr@example.com", password="pass", role="manager")
+        self.emp = User.objects.create_user(email="emp@example.com", password="pass", role="employee")
+        self.dept = Department.objects.create(name="IT", code="IT", manager=self.manager)
+        self.other_dept = Department.objects.create(name="Ops", code="OPS")
+        self.manager.department = self.dept
+        self.manager.save(update_fields=["department"])
+        self.dept_task = Task.objects.create(title="Dept", department=self.dept)
+        self.assigned = Task.objects.create(title="Assigned", department=self.other_dept)
+        self.assigned.assignees.add(self.manager, self.emp)
+        self.created = Task.objects.create(title="Created", creator=self.emp)
+        self.hidden = Task.objects.create(title="Hidden", department=self.other_dept)
+        for task in (self.dept_task, self.assigned, self.created, self.hidden):
+            TaskComment.objects.create(task=task, author=self.manager, content=f"On {task.title}")
+
+    def _ids(self, user, url):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as ctx:
+            res = client.get(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse([q for q in ctx.captured_queries if "DISTINCT" in q["sql"]])
+        return {row.get("task", row["id"]) for row in res.data["results"]}
+
+    def test_each_viewset_applies_the_same_scope(self):
+        expected = {
+            self.manager: {self.dept_task.id, self.assigned.id},
+            self.emp: {self.assigned.id, self.created.id},
+        }
+        for user, ids in expected.items():
+            self.assertEqual(self._ids(user, "/api/tasks/"), ids)
+            self.assertEqual(self._ids(user, "/api/task-comments/"), ids)
+
+    def test_employees_only_see_their_own_assignment_rows(self):
+        TaskAssignment.objects.create(task=self.assigned, assigned_by=self.manager, assigned_to=self.manager)
+        own = TaskAssignment.objects.create(task=self.assigned, assigned_by=self.manager, assigned_to=self.emp)
+        client = APIClient()
+        client.force_authenticate(user=self.emp)
+        res = client.get("/api/task-assignments/")
+        self.assertEqual([row["id"] for row in res.data["results"]], [own.id])
+        client.force_authenticate(user=self.manager)
+        self.assertEqual(client.get("/api/task-assignments/").data["count"], 2)
+
+    def test_list_does_not_join_the_assignee_table(self):
+        client = APIClient()
+        client.force_authenticate(user=self.emp)
+        with CaptureQueriesContext(connection) as ctx:
+            client.get("/api/tasks/")
+        listing = next(q["sql"] for q in ctx.captured_queries if q["sql"].startswith('SELECT "tasks_task"."id"'))
+        self.assertNotIn("tasks_task_assignees", listing.split(" IN (")[0])
+        self.assertIn("UNION ALL", listing)
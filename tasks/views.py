@@ -5,37 +5,57 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 
-from .models import Task, TaskComment, TaskAttachment, TaskAssignment
+from core.search import matches
+from .models import Task, TaskComment, TaskAttachment, TaskAssignment, TaskSearchDocument
 from .serializers import (
     TaskSerializer,
     TaskCommentSerializer,
     TaskAttachmentSerializer,
     TaskAssignmentSerializer,
 )
-from .permissions import CanManageTasks
+from .permissions import CanManageTasks, is_manager
+from .services.search import search_tasks
+from .services.visibility import visible, visible_task_ids
+
+
+class TaskSearchFilter(filters.BaseFilterBackend):
+    """`?search=` over title, description and comments via the task search index."""
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get("search", "").strip()
+        if not text:
+            return queryset
+        return queryset.filter(matches(TaskSearchDocument, text))
 
 
 class TaskViewSet(viewsets.ModelViewSet):
     queryset = Task.objects.select_related("creator", "department").prefetch_related("assignees")
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated, CanManageTasks]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["title", "description"]
+    filter_backends = [TaskSearchFilter, filters.OrderingFilter]
     ordering_fields = ["due_date", "priority", "created_at"]
 
     def get_queryset(self):
-        user = self.request.user
-        qs = super().get_queryset()
         # Scope: HR/CEO see all; managers see dept; employees see assigned/created
-        if user.is_superuser or getattr(user, "role", "").lower() in {"hr", "ceo"}:
-            return qs.distinct()
-        if getattr(user, "role", "").lower() == "manager":
-            return qs.filter(Q(department_id=user.department_id) | Q(creator_id=user.id) | Q(assignees=user)).distinct()
-        return qs.filter(Q(creator_id=user.id) | Q(assignees=user)).distinct()
+        return visible(super().get_queryset(), self.request.user)
 
     def perform_create(self, serializer):
         serializer.save(creator=self.request.user, assigned_by=self.request.user)
 
+    @action(detail=False, methods=["get"])  # GET /tasks/search/?q=
+    def search(self, request):
+        """Ranked search over visible tasks, with highlighted title, description and comment."""
+        q = request.query_params.get("q", "").strip()
+        if not q:
+            return Response({"detail": "q is required."}, status=400)
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), 100)
+        except ValueError:
+            return Response({"detail": "limit must be an integer."}, status=400)
+        tasks = search_tasks(q, self.get_queryset(), limit=limit)
+        results = [{**TaskSerializer(task).data, "highlights": task.highlights} for task in tasks]
+        return Response({"query": q, "results": results})
+
     @action(detail=True, methods=["post"])  # POST /tasks/{id}/assign/
     def assign(self, request, pk=None):
         task = self.get_object()
@@ -73,16 +93,8 @@ class TaskCommentViewSet(viewsets.ModelViewSet):
         serializer.save(author=self.request.user)
 
     def get_queryset(self):
-        user = self.request.user
-        qs = super().get_queryset()
-        # only comments on visible tasks to user - reproduce the same scoping as TaskViewSet
-        if user.is_superuser or getattr(user, "role", "").lower() in {"hr", "ceo"}:
-            return qs
-        if getattr(user, "role", "").lower() == "manager":
-            task_qs = Task.objects.filter(Q(department_id=user.department_id) | Q(creator_id=user.id) | Q(assignees=user))
-        else:
-            task_qs = Task.objects.filter(Q(creator_id=user.id) | Q(assignees=user))
-        return qs.filter(task__in=task_qs.distinct())
+        # only comments on tasks visible to the user
+        return visible(super().get_queryset(), self.request.user, field="task")
 
 
 class TaskAttachmentViewSet(viewsets.ModelViewSet):
@@ -95,15 +107,7 @@ class TaskAttachmentViewSet(viewsets.ModelViewSet):
         serializer.save(uploaded_by=self.request.user)
 
     def get_queryset(self):
-        user = self.request.user
-        qs = super().get_queryset()
-        if user.is_superuser or getattr(user, "role", "").lower() in {"hr", "ceo"}:
-            return qs
-        if getattr(user, "role", "").lower() == "manager":
-            task_qs = Task.objects.filter(Q(department_id=user.department_id) | Q(creator_id=user.id) | Q(assignees=user))
-        else:
-            task_qs = Task.objects.filter(Q(creator_id=user.id) | Q(assignees=user))
-        return qs.filter(task__in=task_qs.distinct())
+        return visible(super().get_queryset(), self.request.user, field="task")
 
 
 class TaskAssignmentViewSet(viewsets.ReadOnlyModelViewSet):
@@ -114,8 +118,13 @@ class TaskAssignmentViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         user = self.request.user
         qs = super().get_queryset()
-        if getattr(user, "role", "").lower() in {"hr", "ceo"} or user.is_superuser:
+        ids = visible_task_ids(user)
+        if ids is None:
             return qs
-        if getattr(user, "role", "").lower() == "manager":
-            return qs.filter(task__department_id=user.department_id)
-        return qs.filter(Q(assigned_to=user) | Q(assigned_by=user))
+        own = Q(assigned_to=user) | Q(assigned_by=user)
+        if not is_manager(user):
+            # Employees only see their own rows, not who else worked on a task
+            return qs.filter(own)
+        # History of visible tasks, plus the manager's own assignments even
+        # after they were removed from the task
+        return qs.filter(Q(task__in=ids) | own)